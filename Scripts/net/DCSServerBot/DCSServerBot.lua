@@ -15,8 +15,11 @@ dofile(lfs.writedir() .. 'Scripts/net/DCSServerBot/DCSServerBotConfig.lua')
 local config = require('DCSServerBotConfig')
 loadfile(lfs.writedir() .. 'Config/serverSettings.lua')()
 local JSON = loadfile(lfs.currentdir() .. "Scripts\\JSON.lua")()
+local MessagePack = loadfile(lfs.writedir() .. 'Scripts/net/DCSServerBot/MessagePack.lua')()
 
 dcsbot = base.dcsbot or {}
+-- wire encoding, set by the hook after the negotiation with the bot
+dcsbot.encoding = dcsbot.encoding or 'json'
 if dcsbot.UDPSendSocket == nil then
 	package.path  = package.path..";.\\LuaSocket\\?.lua;"
 	package.cpath = package.cpath..";.\\LuaSocket\\?.dll;"
@@ -34,8 +37,31 @@ end
 dcsbot.sendBotTable = dcsbot.sendBotTable or function (tbl, channel)
 	tbl.server_name = cfg.name
 	tbl.channel = channel or "-1"
-	local tbl_json_txt = JSON:encode(tbl)
-	socket.try(dcsbot.UDPSendSocket:sendto(tbl_json_txt, config.BOT_HOST, config.BOT_PORT))
+	local msg
+	if dcsbot.encoding == 'msgpack' then
+		msg = MessagePack.encode(tbl)
+	else
+		msg = JSON:encode(tbl)
+	end
+	dcsbot.sendDatagram(msg)
+end
+
+-- messages larger than that are split into chunks of the format #<msg_id>:<seq>:<total>#<data>
+dcsbot.MAX_CHUNK_SIZE = 60000
+dcsbot.msg_id = dcsbot.msg_id or 0
+
+dcsbot.sendDatagram = dcsbot.sendDatagram or function(msg)
+	if #msg <= dcsbot.MAX_CHUNK_SIZE then
+		socket.try(dcsbot.UDPSendSocket:sendto(msg, config.BOT_HOST, config.BOT_PORT))
+		return
+	end
+	dcsbot.msg_id = dcsbot.msg_id + 1
+	local total = math.ceil(#msg / dcsbot.MAX_CHUNK_SIZE)
+	for i = 1, total do
+		local chunk = string.sub(msg, (i - 1) * dcsbot.MAX_CHUNK_SIZE + 1, i * dcsbot.MAX_CHUNK_SIZE)
+		socket.try(dcsbot.UDPSendSocket:sendto('#' .. dcsbot.msg_id .. ':' .. i .. ':' .. total .. '#' .. chunk,
+											   config.BOT_HOST, config.BOT_PORT))
+	end
 end
 
 dcsbot.sendEmbed = dcsbot.sendEmbed or function(title, description, img, fields, footer, channel)
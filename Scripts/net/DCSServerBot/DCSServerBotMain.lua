@@ -8,7 +8,7 @@ local loadfile	= base.loadfile
 
 local lfs		= require('lfs')
 local config	= require("DCSServerBotConfig")
-local JSON 		= loadfile("Scripts\\JSON.lua")()
+local utils 	= require("DCSServerBotUtils")
 
 package.path  = package.path..";.\\LuaSocket\\?.lua;"
 package.cpath = package.cpath..";.\\LuaSocket\\?.dll;"
@@ -16,6 +16,15 @@ local socket 	= require("socket")
 
 local dcsbotgui = {}
 
+-- several commands, sent by the bot in one datagram
+function dcsbot.batch(json)
+	for _, cmd in ipairs(json.commands) do
+		if dcsbot[cmd.command] ~= nil then
+			dcsbot[cmd.command](cmd)
+		end
+	end
+end
+
 function dcsbotgui.onSimulationFrame()
 	-- general idea from HypeMan
 	if not dcsbotgui.UDPRecvSocket then
@@ -30,7 +39,7 @@ function dcsbotgui.onSimulationFrame()
 	repeat
 		msg, err = dcsbotgui.UDPRecvSocket:receive()
 		if not err then
-			json = JSON:decode(msg)
+			json = utils.decode(msg)
 			if dcsbot[json.command] ~= nil then
 				dcsbot[json.command](json)
 			end
@@ -12,6 +12,7 @@ local base   		= _G
 module('DCSServerBotUtils')
 
 local loadfile 		= base.loadfile
+local math			= base.math
 local net			= base.net
 local package		= base.package
 local pairs			= base.pairs
@@ -28,6 +29,7 @@ local U 			= require('me_utilities')
 local config		= require('DCSServerBotConfig')
 
 local JSON = loadfile(lfs.currentdir() .. "Scripts\\JSON.lua")()
+local MessagePack = loadfile(lfs.writedir() .. "Scripts/net/DCSServerBot/MessagePack.lua")()
 
 package.path  = package.path..";.\\LuaSocket\\?.lua;"
 package.cpath = package.cpath..";.\\LuaSocket\\?.dll;"
@@ -36,14 +38,50 @@ UDPSendSocket = socket.udp()
 
 local server_name
 
+-- wire encoding, negotiated with the bot on registration (json or msgpack)
+encoding = 'json'
+
+function encode(tbl)
+	if encoding == 'msgpack' then
+		return MessagePack.encode(tbl)
+	else
+		return JSON:encode(tbl)
+	end
+end
+
+function decode(msg)
+	-- JSON messages always start with "{", everything else is msgpack
+	if msg:byte(1) == 123 then
+		return JSON:decode(msg)
+	else
+		return MessagePack.decode(msg)
+	end
+end
+
 function sendBotTable(tbl, channel)
 	if server_name == nil then
 		server_name = loadSettingsRaw().name
 	end
 	tbl.server_name = server_name
 	tbl.channel = channel or "-1"
-	local tbl_json_txt = JSON:encode(tbl)
-	socket.try(UDPSendSocket:sendto(tbl_json_txt, config.BOT_HOST, config.BOT_PORT))
+	sendDatagram(encode(tbl))
+end
+
+-- messages larger than that are split into chunks of the format #<msg_id>:<seq>:<total>#<data>
+local MAX_CHUNK_SIZE = 60000
+local msg_id = 0
+
+function sendDatagram(msg)
+	if #msg <= MAX_CHUNK_SIZE then
+		socket.try(UDPSendSocket:sendto(msg, config.BOT_HOST, config.BOT_PORT))
+		return
+	end
+	msg_id = msg_id + 1
+	local total = math.ceil(#msg / MAX_CHUNK_SIZE)
+	for i = 1, total do
+		local chunk = string.sub(msg, (i - 1) * MAX_CHUNK_SIZE + 1, i * MAX_CHUNK_SIZE)
+		socket.try(UDPSendSocket:sendto('#' .. msg_id .. ':' .. i .. ':' .. total .. '#' .. chunk, config.BOT_HOST, config.BOT_PORT))
+	end
 end
 
 function loadSettingsRaw()
@@ -0,0 +1,306 @@
+-- MessagePack.lua
+---------------------------------------------------------
+-- Minimal MessagePack encoder / decoder for Lua 5.1.
+-- Only the types that can be exchanged between DCS and
+-- DCSServerBot are supported (nil, boolean, number,
+-- string, table). Map keys are always sent as strings,
+-- to behave like the JSON encoding.
+---------------------------------------------------------
+local char      = string.char
+local byte      = string.byte
+local sub       = string.sub
+local format    = string.format
+local floor     = math.floor
+local frexp     = math.frexp
+local ldexp     = math.ldexp
+local huge      = math.huge
+local concat    = table.concat
+local pairs     = pairs
+local type      = type
+local tostring  = tostring
+local error     = error
+
+local MessagePack = {}
+
+local function uint16(n)
+    return char(floor(n / 0x100) % 0x100, n % 0x100)
+end
+
+local function uint32(n)
+    return char(floor(n / 0x1000000) % 0x100, floor(n / 0x10000) % 0x100, floor(n / 0x100) % 0x100, n % 0x100)
+end
+
+local function encode_double(n)
+    local sign = 0
+    if n < 0 or (n == 0 and 1 / n < 0) then
+        sign = 0x80
+        n = -n
+    end
+    if n ~= n then
+        return char(0xCB, 0xFF, 0xF8, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00)
+    elseif n == huge then
+        return char(0xCB, sign + 0x7F, 0xF0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00)
+    end
+    local mant, expo = frexp(n)
+    if mant == 0 or expo < -0x3FE then
+        -- zero (subnormals are flushed to zero)
+        return char(0xCB, sign, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00)
+    end
+    expo = expo + 0x3FE
+    mant = floor((mant * 2.0 - 1.0) * ldexp(0.5, 53))
+    return char(0xCB,
+                sign + floor(expo / 0x10),
+                (expo % 0x10) * 0x10 + floor(mant / 0x1000000000000),
+                floor(mant / 0x10000000000) % 0x100,
+                floor(mant / 0x100000000) % 0x100,
+                floor(mant / 0x1000000) % 0x100,
+                floor(mant / 0x10000) % 0x100,
+                floor(mant / 0x100) % 0x100,
+                mant % 0x100)
+end
+
+local function encode_integer(n)
+    if n >= 0 then
+        if n < 0x80 then
+            return char(n)
+        elseif n < 0x100 then
+            return char(0xCC, n)
+        elseif n < 0x10000 then
+            return char(0xCD) .. uint16(n)
+        elseif n < 0x100000000 then
+            return char(0xCE) .. uint32(n)
+        else
+            return char(0xCF) .. uint32(floor(n / 0x100000000)) .. uint32(n % 0x100000000)
+        end
+    else
+        if n >= -0x20 then
+            return char(0x100 + n)
+        elseif n >= -0x80 then
+            return char(0xD0, 0x100 + n)
+        elseif n >= -0x8000 then
+            return char(0xD1) .. uint16(0x10000 + n)
+        elseif n >= -0x80000000 then
+            return char(0xD2) .. uint32(0x100000000 + n)
+        else
+            local high = floor(n / 0x100000000)
+            return char(0xD3) .. uint32(0x100000000 + high) .. uint32(n - high * 0x100000000)
+        end
+    end
+end
+
+local function encode_string(s)
+    local len = #s
+    if len < 0x20 then
+        return char(0xA0 + len) .. s
+    elseif len < 0x100 then
+        return char(0xD9, len) .. s
+    elseif len < 0x10000 then
+        return char(0xDA) .. uint16(len) .. s
+    else
+        return char(0xDB) .. uint32(len) .. s
+    end
+end
+
+local encode_value
+
+local function is_array(tbl)
+    local n = #tbl
+    local count = 0
+    for _ in pairs(tbl) do
+        count = count + 1
+        if count > n then
+            return false
+        end
+    end
+    return count == n
+end
+
+local function encode_table(buffer, tbl)
+    if is_array(tbl) then
+        local n = #tbl
+        if n < 0x10 then
+            buffer[#buffer + 1] = char(0x90 + n)
+        elseif n < 0x10000 then
+            buffer[#buffer + 1] = char(0xDC) .. uint16(n)
+        else
+            buffer[#buffer + 1] = char(0xDD) .. uint32(n)
+        end
+        for i = 1, n do
+            encode_value(buffer, tbl[i])
+        end
+    else
+        local n = 0
+        for _, v in pairs(tbl) do
+            local t = type(v)
+            if t ~= 'function' and t ~= 'userdata' and t ~= 'thread' then
+                n = n + 1
+            end
+        end
+        if n < 0x10 then
+            buffer[#buffer + 1] = char(0x80 + n)
+        elseif n < 0x10000 then
+            buffer[#buffer + 1] = char(0xDE) .. uint16(n)
+        else
+            buffer[#buffer + 1] = char(0xDF) .. uint32(n)
+        end
+        for k, v in pairs(tbl) do
+            local t = type(v)
+            if t ~= 'function' and t ~= 'userdata' and t ~= 'thread' then
+                buffer[#buffer + 1] = encode_string(tostring(k))
+                encode_value(buffer, v)
+            end
+        end
+    end
+end
+
+encode_value = function(buffer, value)
+    local t = type(value)
+    if t == 'string' then
+        buffer[#buffer + 1] = encode_string(value)
+    elseif t == 'number' then
+        if value == floor(value) and value >= -0x20000000000000 and value <= 0x20000000000000 then
+            buffer[#buffer + 1] = encode_integer(value)
+        else
+            buffer[#buffer + 1] = encode_double(value)
+        end
+    elseif t == 'table' then
+        encode_table(buffer, value)
+    elseif t == 'boolean' then
+        buffer[#buffer + 1] = value and char(0xC3) or char(0xC2)
+    else
+        buffer[#buffer + 1] = char(0xC0)
+    end
+end
+
+function MessagePack.encode(value)
+    local buffer = {}
+    encode_value(buffer, value)
+    return concat(buffer)
+end
+
+local function read_uint(s, pos, len)
+    local n = 0
+    for i = pos, pos + len - 1 do
+        n = n * 0x100 + byte(s, i)
+    end
+    return n, pos + len
+end
+
+local function read_int(s, pos, len)
+    local n = byte(s, pos)
+    if n > 0x7F then
+        n = n - 0x100
+    end
+    for i = pos + 1, pos + len - 1 do
+        n = n * 0x100 + byte(s, i)
+    end
+    return n, pos + len
+end
+
+local function read_float(s, pos)
+    local b1, b2, b3, b4 = byte(s, pos, pos + 3)
+    local sign = b1 > 0x7F and -1 or 1
+    local expo = (b1 % 0x80) * 0x2 + floor(b2 / 0x80)
+    local mant = ((b2 % 0x80) * 0x100 + b3) * 0x100 + b4
+    local n
+    if expo == 0 then
+        n = sign * ldexp(mant, -149)
+    elseif expo == 0xFF then
+        n = mant == 0 and sign * huge or 0 / 0
+    else
+        n = sign * ldexp(1.0 + mant / 0x800000, expo - 0x7F)
+    end
+    return n, pos + 4
+end
+
+local function read_double(s, pos)
+    local b1, b2, b3, b4, b5, b6, b7, b8 = byte(s, pos, pos + 7)
+    local sign = b1 > 0x7F and -1 or 1
+    local expo = (b1 % 0x80) * 0x10 + floor(b2 / 0x10)
+    local mant = ((((((b2 % 0x10) * 0x100 + b3) * 0x100 + b4) * 0x100 + b5) * 0x100 + b6) * 0x100 + b7) * 0x100 + b8
+    local n
+    if expo == 0 then
+        n = sign * ldexp(mant, -1074)
+    elseif expo == 0x7FF then
+        n = mant == 0 and sign * huge or 0 / 0
+    else
+        n = sign * ldexp(1.0 + mant / 0x10000000000000, expo - 0x3FF)
+    end
+    return n, pos + 8
+end
+
+local decode_value
+
+local function read_array(s, pos, n)
+    local tbl = {}
+    for i = 1, n do
+        tbl[i], pos = decode_value(s, pos)
+    end
+    return tbl, pos
+end
+
+local function read_map(s, pos, n)
+    local tbl = {}
+    for _ = 1, n do
+        local k, v
+        k, pos = decode_value(s, pos)
+        v, pos = decode_value(s, pos)
+        tbl[k] = v
+    end
+    return tbl, pos
+end
+
+decode_value = function(s, pos)
+    local b = byte(s, pos)
+    pos = pos + 1
+    if b < 0x80 then
+        return b, pos
+    elseif b < 0x90 then
+        return read_map(s, pos, b - 0x80)
+    elseif b < 0xA0 then
+        return read_array(s, pos, b - 0x90)
+    elseif b < 0xC0 then
+        local len = b - 0xA0
+        return sub(s, pos, pos + len - 1), pos + len
+    elseif b >= 0xE0 then
+        return b - 0x100, pos
+    elseif b == 0xC0 then
+        return nil, pos
+    elseif b == 0xC2 then
+        return false, pos
+    elseif b == 0xC3 then
+        return true, pos
+    elseif b == 0xCA then
+        return read_float(s, pos)
+    elseif b == 0xCB then
+        return read_double(s, pos)
+    elseif b >= 0xCC and b <= 0xCF then
+        return read_uint(s, pos, 2 ^ (b - 0xCC))
+    elseif b >= 0xD0 and b <= 0xD3 then
+        return read_int(s, pos, 2 ^ (b - 0xD0))
+    elseif b >= 0xC4 and b <= 0xC6 then
+        local len
+        len, pos = read_uint(s, pos, 2 ^ (b - 0xC4))
+        return sub(s, pos, pos + len - 1), pos + len
+    elseif b >= 0xD9 and b <= 0xDB then
+        local len
+        len, pos = read_uint(s, pos, 2 ^ (b - 0xD9))
+        return sub(s, pos, pos + len - 1), pos + len
+    elseif b == 0xDC or b == 0xDD then
+        local n
+        n, pos = read_uint(s, pos, b == 0xDC and 2 or 4)
+        return read_array(s, pos, n)
+    elseif b == 0xDE or b == 0xDF then
+        local n
+        n, pos = read_uint(s, pos, b == 0xDE and 2 or 4)
+        return read_map(s, pos, n)
+    end
+    error('MessagePack: unsupported type 0x' .. format('%02X', b))
+end
+
+function MessagePack.decode(s)
+    local value = decode_value(s, 1)
+    return value
+end
+
+return MessagePack
@@ -0,0 +1,111 @@
+"""
+Compares the size and the encode / decode cost of JSON and msgpack for the messages between the DCS hooks and the bot.
+The messages are read from a capture of real traffic (see EVENT_CAPTURE in dcsserverbot.ini). Without a capture, a
+set of typical messages is used (registerDCSServer, getMissionSituation, onMissionEvent, onGameEvent).
+Only the Python side is measured, the Lua side runs inside of DCS.
+
+    python benchmarks/encoding.py [capture] [--repeat N]
+"""
+import argparse
+import json
+import msgpack
+import random
+import timeit
+from typing import Iterator
+
+
+def read_capture(filename: str) -> Iterator[dict]:
+    # same format as replay.py reads
+    with open(filename, 'rb') as file:
+        for _, _, data in msgpack.Unpacker(file, unicode_errors='replace'):
+            yield data
+
+
+def sample_messages() -> Iterator[dict]:
+    players = [{
+        "id": i, "name": f'Pilot {i}', "ucid": ''.join(random.choices('0123456789abcdef', k=32)), "active": True,
+        "side": i % 2 + 1, "slot": str(i), "sub_slot": 0, "unit_type": "F-16C_50", "unit_name": f'Unit {i}',
+        "group_name": f'Group {i}', "group_id": i, "unit_callsign": f'Enfield{i}'
+    } for i in range(2, 62)]
+    yield {
+        "command": "registerDCSServer", "server_name": "Server 1", "channel": "-1", "hook_version": "2.7",
+        "dcs_version": "2.7.18.30348", "host": "127.0.0.1", "port": 6666, "statistics": True,
+        "current_mission": "Operation Sample", "current_map": "Caucasus", "mission_time": 1234.5,
+        "start_time": 28800, "date": {"Year": 2016, "Month": 6, "Day": 21}, "num_slots_blue": 60,
+        "num_slots_red": 60, "players": players,
+        "airbases": [{"name": f'Airbase {i}', "id": i, "code": "", "lat": 41.6 + i / 100, "lng": 41.6 + i / 100,
+                      "alt": 10.5, "position": {"x": -356437.5 + i, "y": 10.5, "z": 618211.5 - i},
+                      "runways": ["13", "31"], "frequencyList": [131000000, 262000000]} for i in range(20)],
+        "weather": {"season": {"temperature": 20}, "qnh": 760, "enable_fog": False,
+                    "visibility": {"distance": 80000},
+                    "wind": {key: {"dir": 270, "speed": 5} for key in ['atGround', 'at2000', 'at8000']},
+                    "clouds": {"base": 2500, "density": 4, "thickness": 1000}}
+    }
+    yield {
+        "command": "getMissionSituation", "server_name": "Server 1", "channel": "sync-1234", "coalitions": {
+            coalition: {
+                "airbases": [f'{coalition} Airbase {i}' for i in range(10)],
+                "units": {category: [f'{coalition} {category} {i}' for i in range(100)]
+                          for category in ['Airplanes', 'Helicopters', 'Ground Units', 'Ships']},
+                "statics": [f'{coalition} Static {i}' for i in range(50)]
+            } for coalition in ['BLUE', 'RED']
+        }
+    }
+    for i in range(100):
+        yield {
+            "command": "onMissionEvent", "server_name": "Server 1", "channel": "-1", "eventName": "S_EVENT_HIT",
+            "time": 1234.5 + i, "initiator": {"type": "UNIT", "unit_name": f'Unit {i}', "group_name": f'Group {i}',
+                                              "name": f'Pilot {i}', "coalition": 2, "unit_type": "F-16C_50",
+                                              "category": 0},
+            "target": {"type": "UNIT", "unit_name": f'AI Unit {i}', "coalition": 1, "unit_type": "T-72B",
+                       "category": 2},
+            "weapon": {"name": "AGM_65D"}
+        }
+        yield {
+            "command": "onGameEvent", "server_name": "Server 1", "channel": "-1", "eventName": "kill", "arg1": i,
+            "arg2": "F-16C_50", "arg3": 2, "arg4": -1, "arg5": "T-72B", "arg6": 1, "arg7": "AGM_65D",
+            "victimCategory": "Armor", "killerCategory": "Planes"
+        }
+
+
+def measure(func, repeat: int) -> float:
+    # best of 3, in µs per call
+    return min(timeit.repeat(func, number=repeat, repeat=3)) / repeat * 1000000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares JSON and msgpack for the messages of the DCS hooks.')
+    parser.add_argument('capture', nargs='?', help='capture file (see EVENT_CAPTURE), default: sample messages')
+    parser.add_argument('--repeat', type=int, default=1000, help='number of repetitions per message')
+    parser.add_argument('--max', type=int, default=100, help='maximum number of messages per command to measure')
+    args = parser.parse_args()
+    messages: dict[str, list[dict]] = {}
+    for data in (read_capture(args.capture) if args.capture else sample_messages()):
+        commands = messages.setdefault(data['command'], [])
+        if len(commands) < args.max:
+            commands.append(data)
+    print(f"{'Command':<24} {'Num':>5} {'JSON B':>8} {'msgpack B':>10} {'Size':>6} "
+          f"{'dec JSON':>9} {'dec mp':>8} {'enc JSON':>9} {'enc mp':>8}  (µs per message)")
+    totals = [0, 0, 0.0, 0.0, 0.0, 0.0]
+    for command, datas in sorted(messages.items()):
+        result = [0, 0, 0.0, 0.0, 0.0, 0.0]
+        for data in datas:
+            as_json = json.dumps(data).encode('utf-8')
+            as_msgpack = msgpack.packb(data)
+            result[0] += len(as_json)
+            result[1] += len(as_msgpack)
+            result[2] += measure(lambda: json.loads(as_json), args.repeat)
+            result[3] += measure(lambda: msgpack.unpackb(as_msgpack, unicode_errors='replace'), args.repeat)
+            result[4] += measure(lambda: json.dumps(data).encode('utf-8'), args.repeat)
+            result[5] += measure(lambda: msgpack.packb(data), args.repeat)
+        totals = [a + b for a, b in zip(totals, result)]
+        num = len(datas)
+        print(f'{command:<24} {num:>5} {result[0] / num:>8.0f} {result[1] / num:>10.0f} '
+              f'{result[1] / result[0]:>6.0%} {result[2] / num:>9.1f} {result[3] / num:>8.1f} '
+              f'{result[4] / num:>9.1f} {result[5] / num:>8.1f}')
+    print(f"{'Total':<24} {sum(len(x) for x in messages.values()):>5} {totals[0]:>8} {totals[1]:>10} "
+          f"{totals[1] / totals[0]:>6.0%} {totals[2]:>9.1f} {totals[3]:>8.1f} {totals[4]:>9.1f} {totals[5]:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
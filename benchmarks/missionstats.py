@@ -0,0 +1,78 @@
+"""
+Write throughput of the missionstats table: one INSERT and commit per mission event (as the listener did before)
+against the buffered COPY ... FROM STDIN in batches of 500 rows (MissionStatisticsEventListener.flush).
+The rows are written into a table benchmark_missionstats with the same columns and indexes as missionstats,
+which is dropped afterwards.
+
+    python benchmarks/missionstats.py postgres://<user>:<pass>@localhost:5432/<database> [--rows N]
+"""
+import argparse
+import asyncio
+import random
+import time
+from psycopg_pool import AsyncConnectionPool
+
+TABLE = 'benchmark_missionstats'
+SQL_CREATE = [
+    f'CREATE TABLE IF NOT EXISTS {TABLE} (id SERIAL PRIMARY KEY, mission_id INTEGER NOT NULL, event TEXT NOT NULL, '
+    f'init_id TEXT, init_side TEXT, init_type TEXT, init_cat TEXT, target_id TEXT, target_side TEXT, '
+    f'target_type TEXT, target_cat TEXT, weapon TEXT, place TEXT, comment TEXT, time TIMESTAMP NOT NULL DEFAULT NOW())',
+    f'CREATE INDEX IF NOT EXISTS idx_{TABLE}_init_id ON {TABLE}(init_id)',
+    f'CREATE INDEX IF NOT EXISTS idx_{TABLE}_target_id ON {TABLE}(target_id)'
+]
+COLUMNS = 'mission_id, event, init_id, init_side, init_type, init_cat, target_id, target_side, target_type, ' \
+          'target_cat, weapon, place, comment'
+SQL_INSERT = f"INSERT INTO {TABLE} ({COLUMNS}) VALUES ({', '.join(['%s'] * 13)})"
+SQL_COPY = f'COPY {TABLE} ({COLUMNS}) FROM STDIN'
+# has to match MissionStatisticsEventListener.BATCH_SIZE
+BATCH_SIZE = 500
+
+
+def generate_rows(num: int) -> list[tuple]:
+    events = ['S_EVENT_SHOT', 'S_EVENT_HIT', 'S_EVENT_KILL', 'S_EVENT_TAKEOFF', 'S_EVENT_LAND']
+    return [
+        (1, random.choice(events), ''.join(random.choices('0123456789abcdef', k=32)), 'BLUE', 'F-16C_50',
+         'Airplanes', '-1', 'RED', 'T-72B', 'Ground Units', 'AGM_65D', None, None)
+        for _ in range(num)
+    ]
+
+
+async def insert(pool: AsyncConnectionPool, rows: list[tuple]):
+    for row in rows:
+        async with pool.connection() as conn:
+            await conn.execute(SQL_INSERT, row)
+
+
+async def copy(pool: AsyncConnectionPool, rows: list[tuple]):
+    for i in range(0, len(rows), BATCH_SIZE):
+        async with pool.connection() as conn:
+            async with conn.cursor() as cursor:
+                async with cursor.copy(SQL_COPY) as _copy:
+                    for row in rows[i:i + BATCH_SIZE]:
+                        await _copy.write_row(row)
+
+
+async def main(args: argparse.Namespace):
+    rows = generate_rows(args.rows)
+    async with AsyncConnectionPool(args.database, min_size=1, max_size=2) as pool:
+        async with pool.connection() as conn:
+            for sql in SQL_CREATE:
+                await conn.execute(sql)
+        try:
+            for name, func in [('INSERT', insert), ('COPY', copy)]:
+                async with pool.connection() as conn:
+                    await conn.execute(f'TRUNCATE {TABLE}')
+                start = time.monotonic()
+                await func(pool, rows)
+                duration = time.monotonic() - start
+                print(f'{name:>6}: {args.rows} rows in {duration:.2f}s ({args.rows / duration:.0f} rows/s)')
+        finally:
+            async with pool.connection() as conn:
+                await conn.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compares single row INSERTs and COPY for the missionstats table.')
+    parser.add_argument('database', help='database URL, a table benchmark_missionstats is created and dropped in it')
+    parser.add_argument('--rows', type=int, default=10000, help='number of rows to write')
+    asyncio.run(main(parser.parse_args()))
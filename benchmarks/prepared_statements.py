@@ -0,0 +1,81 @@
+"""
+Planning overhead that the prepared statements (core/statements.py) save on the hot paths.
+Every statement is run as a plain statement and as a server-side prepared statement (PREPARE / EXECUTE), it reports
+the time per execution and the planning time Postgres reports for it (EXPLAIN ANALYZE).
+The statements run against the tables of the bot's database, all changes are rolled back afterwards.
+
+    python benchmarks/prepared_statements.py postgres://<user>:<pass>@localhost:5432/<database> [--repeat N]
+"""
+import argparse
+import psycopg2
+import random
+import re
+import time
+from contextlib import closing
+from typing import Callable
+
+# the statements that are registered in core/data/player.py and plugins/userstats/listener.py
+STATEMENTS: dict[str, str] = {
+    'players.load': 'SELECT p.discord_id, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END AS banned, p.manual, '
+                    'c.coalition FROM players p LEFT OUTER JOIN bans b ON p.ucid = b.ucid LEFT OUTER JOIN coalitions c '
+                    'ON p.ucid = c.player_ucid WHERE p.ucid = %s',
+    'players.last_seen': 'UPDATE players SET last_seen = NOW() WHERE ucid = %s',
+    'userstats.check_player': 'SELECT slot FROM statistics WHERE mission_id = %s AND player_ucid = %s AND '
+                              'hop_off IS NULL'
+}
+
+
+def get_params(cursor) -> dict[str, Callable[[], tuple]]:
+    cursor.execute('SELECT ucid FROM players LIMIT 1000')
+    ucids = [x[0] for x in cursor.fetchall()] or [''.join(random.choices('0123456789abcdef', k=32))]
+    cursor.execute('SELECT COALESCE(MAX(id), -1) FROM missions')
+    mission_id = cursor.fetchone()[0]
+    return {
+        'players.load': lambda: (random.choice(ucids), ),
+        'players.last_seen': lambda: (random.choice(ucids), ),
+        'userstats.check_player': lambda: (mission_id, random.choice(ucids))
+    }
+
+
+def planning_time(cursor, sql: str, params: tuple) -> float:
+    cursor.execute('EXPLAIN (ANALYZE, SUMMARY) ' + sql, params)
+    for row in cursor.fetchall():
+        match = re.match(r'Planning Time: ([\d.]+) ms', row[0])
+        if match:
+            return float(match.group(1))
+    return 0.0
+
+
+def benchmark(cursor, sql: str, params: Callable[[], tuple], repeat: int) -> tuple[float, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cursor.execute(sql, params())
+    duration = (time.perf_counter() - start) / repeat * 1000
+    planning = sum(planning_time(cursor, sql, params()) for _ in range(min(repeat, 100))) / min(repeat, 100)
+    return duration, planning
+
+
+def main(args: argparse.Namespace):
+    with closing(psycopg2.connect(args.database, sslmode='allow')) as conn:
+        with closing(conn.cursor()) as cursor:
+            params = get_params(cursor)
+            print(f"{'Statement':<24} {'plain':>9} {'prepared':>9} {'planning plain':>15} {'prepared':>9}  (ms)")
+            try:
+                for i, (name, sql) in enumerate(STATEMENTS.items(), start=1):
+                    num = len(params[name]())
+                    placeholders = iter(range(1, num + 1))
+                    cursor.execute(f"PREPARE benchmark_{i} AS {re.sub('%s', lambda _: f'${next(placeholders)}', sql)}")
+                    execute = f"EXECUTE benchmark_{i} ({', '.join(['%s'] * num)})"
+                    plain, plain_planning = benchmark(cursor, sql, params[name], args.repeat)
+                    prepared, prepared_planning = benchmark(cursor, execute, params[name], args.repeat)
+                    print(f'{name:<24} {plain:>9.3f} {prepared:>9.3f} {plain_planning:>15.3f} '
+                          f'{prepared_planning:>9.3f}')
+            finally:
+                conn.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compares plain and prepared execution of the hot statements.')
+    parser.add_argument('database', help='database URL of the bot, all changes are rolled back')
+    parser.add_argument('--repeat', type=int, default=10000, help='number of executions per statement')
+    main(parser.parse_args())
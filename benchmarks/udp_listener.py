@@ -0,0 +1,189 @@
+"""
+Throughput benchmark of the UDP listener: the former socketserver.ThreadingUDPServer implementation (one thread per
+datagram, a queue.Queue and an executor thread per server, call_soon_threadsafe into the loop) against the
+asyncio.DatagramProtocol of DCSServerBot.start_udp_listener (parsing and dispatching on the event loop).
+
+Both pipelines are rebuilt here without the bot around them, so that only the ingest path is measured: every message
+is parsed, queued per server and handed to an event listener queue, like it is in the bot.
+The messages are sent by a separate process, so its CPU time is not counted.
+
+    python benchmarks/udp_listener.py [--messages N] [--servers N] [--rate N]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import queue
+import random
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import BaseRequestHandler, ThreadingUDPServer
+from typing import Optional, Tuple
+
+HOST = '127.0.0.1'
+
+
+def sender(port: int, messages: int, servers: int, rate: int):
+    payloads = []
+    for i in range(100):
+        payloads.append(json.dumps({
+            "command": "onMissionEvent", "eventName": "S_EVENT_SHOT", "time": random.random() * 3600,
+            "initiator": {"type": "UNIT", "unit_name": f'AI Unit {i}', "coalition": 1, "unit_type": "T-72B",
+                          "category": 2},
+            "weapon": {"name": "AIM_120C"}, "server_name": f'Server {i % servers + 1}', "channel": "-1"
+        }).encode('utf-8'))
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        start = time.monotonic()
+        for i in range(messages):
+            sock.sendto(payloads[i % len(payloads)], (HOST, port))
+            # don't overrun the receive buffer, the benchmark measures processing and not packet loss
+            if rate and i % 100 == 99:
+                delay = (i + 1) / rate - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+
+class Counter:
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, messages: int):
+        self.loop = loop
+        self.messages = messages
+        self.received = 0
+        self.last = 0.0
+        self.done = loop.create_future()
+        self.queue = asyncio.Queue()
+        self.worker = loop.create_task(self.work())
+
+    def enqueue(self, data: dict):
+        self.queue.put_nowait(data)
+
+    async def work(self):
+        # stands in for an EventListener worker
+        while True:
+            data = await self.queue.get()
+            self.received += 1
+            self.last = time.monotonic()
+            if self.received == self.messages and not self.done.done():
+                self.done.set_result(None)
+
+
+def threaded_listener(loop: asyncio.AbstractEventLoop, counter: Counter) -> Tuple[ThreadingUDPServer, int]:
+
+    class RequestHandler(BaseRequestHandler):
+
+        def handle(s):
+            data = json.loads(s.request[0].strip())
+            server_name = data['server_name']
+            if server_name not in s.server.message_queue:
+                s.server.message_queue[server_name] = queue.Queue()
+                s.server.executor.submit(s.process, server_name)
+            s.server.message_queue[server_name].put(data)
+
+        def process(s, server_name: str):
+            data = s.server.message_queue[server_name].get()
+            while len(data):
+                loop.call_soon_threadsafe(counter.enqueue, data)
+                s.server.message_queue[server_name].task_done()
+                data = s.server.message_queue[server_name].get()
+
+    class MyThreadingUDPServer(ThreadingUDPServer):
+        allow_reuse_address = True
+        max_packet_size = 65504
+
+        def __init__(s, server_address: Tuple[str, int]):
+            s.message_queue: dict[str, queue.Queue] = {}
+            s.executor = ThreadPoolExecutor()
+            super().__init__(server_address, RequestHandler)
+
+        def server_bind(s):
+            s.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            super().server_bind()
+
+        def shutdown(s):
+            super().shutdown()
+            for q in s.message_queue.values():
+                q.put('')
+            s.executor.shutdown(wait=True)
+
+    server = MyThreadingUDPServer((HOST, 0))
+    return server, server.server_address[1]
+
+
+class DatagramProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, counter: Counter):
+        self.counter = counter
+        self.message_queue: dict[str, asyncio.Queue] = {}
+        self.workers: dict[str, asyncio.Task] = {}
+
+    def datagram_received(self, message: bytes, addr: Tuple[str, int]):
+        data = json.loads(message)
+        server_name = data['server_name']
+        if server_name not in self.message_queue:
+            self.message_queue[server_name] = asyncio.Queue()
+            self.workers[server_name] = asyncio.create_task(self.process(server_name))
+        self.message_queue[server_name].put_nowait(data)
+
+    async def process(self, server_name: str):
+        q = self.message_queue[server_name]
+        while True:
+            data = await q.get()
+            self.counter.enqueue(data)
+            q.task_done()
+
+
+async def run(implementation: str, args: argparse.Namespace) -> Tuple[int, float, float]:
+    loop = asyncio.get_running_loop()
+    counter = Counter(loop, args.messages)
+    executor: Optional[ThreadPoolExecutor] = None
+    if implementation == 'threaded':
+        server, port = threaded_listener(loop, counter)
+        executor = ThreadPoolExecutor(max_workers=1)
+        loop.run_in_executor(executor, server.serve_forever)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        sock.bind((HOST, 0))
+        port = sock.getsockname()[1]
+        server, _ = await loop.create_datagram_endpoint(lambda: DatagramProtocol(counter), sock=sock)
+    process = multiprocessing.Process(target=sender, args=(port, args.messages, args.servers, args.rate))
+    start = time.monotonic()
+    cpu = time.process_time()
+    process.start()
+    await loop.run_in_executor(None, process.join)
+    # wait for the listener to catch up, lost datagrams are never received
+    try:
+        await asyncio.wait_for(asyncio.shield(counter.done), timeout=args.timeout)
+    except asyncio.TimeoutError:
+        pass
+    # the time until the last message was processed, without the time waited for lost ones
+    duration = (counter.last or time.monotonic()) - start
+    cpu = time.process_time() - cpu
+    counter.worker.cancel()
+    if implementation == 'threaded':
+        server.shutdown()
+        server.server_close()
+        executor.shutdown()
+    else:
+        server.close()
+    return counter.received, duration, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the throughput of the threaded and the asyncio UDP '
+                                                 'listener.')
+    parser.add_argument('--messages', type=int, default=100000, help='number of messages to send')
+    parser.add_argument('--servers', type=int, default=8, help='number of servers the messages are spread over')
+    parser.add_argument('--rate', type=int, default=0, help='messages per second to send, 0 = as fast as possible')
+    parser.add_argument('--timeout', type=float, default=5, help='seconds to wait for outstanding messages')
+    args = parser.parse_args()
+    for implementation in ['threaded', 'asyncio']:
+        received, duration, cpu = asyncio.run(run(implementation, args))
+        print(f'{implementation:>8}: {received} / {args.messages} messages in {duration:.2f}s '
+              f'({received / duration:.0f} msg/s), CPU {cpu:.2f}s '
+              f'({cpu / received * 1000000 if received else 0:.1f} µs/msg), {args.messages - received} lost')
+
+
+if __name__ == "__main__":
+    main()
@@ -14,3 +14,6 @@ from .mizfile import *
 from .plugin import *
 from .utils import *
 from .report import *
+from .statements import *
+from .sqlstats import *
+from .dbpool import *
@@ -2,25 +2,28 @@ from __future__ import annotations
 import asyncio
 import discord
 import json
+import msgpack
 import platform
 import psycopg2
 import re
 import socket
 import string
+import time
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing
 from discord import Interaction, app_commands
 from core import utils, Server, Status, Channel, DataObjectFactory
 from datetime import datetime
-from discord.ext import commands
-from queue import Queue
-from socketserver import BaseRequestHandler, ThreadingUDPServer
-from typing import Callable, Optional, Tuple, Union, TYPE_CHECKING
-from .listener import EventListener
+from discord.ext import commands, tasks
+from psycopg_pool import AsyncConnectionPool
+from typing import Optional, Tuple, Union, TYPE_CHECKING, Callable, TypeVar
+from .listener import EventListener, EventQueue
 
 if TYPE_CHECKING:
     from discord.ext.commands.context import Context
 
+T = TypeVar("T")
+
 
 class DCSServerBot(commands.Bot):
 
@@ -31,10 +34,12 @@ class DCSServerBot(commands.Bot):
         self.sub_version: str = kwargs['sub_version']
         self.listeners = {}
         self.eventListeners: list[EventListener] = []
+        self.commandListeners: dict[str, list[EventListener]] = {}
         self.external_ip: Optional[str] = None
         self.udp_server = None
         self.servers: dict[str, Server] = dict()
         self.pool = kwargs['pool']
+        self.apool: Optional[AsyncConnectionPool] = None
         self.log = kwargs['log']
         self.config = kwargs['config']
         self.master: bool = self.config.getboolean('BOT', 'MASTER')
@@ -48,14 +53,44 @@ class DCSServerBot(commands.Bot):
         self.synced: bool = False
         self.tree.on_error = self.on_app_command_error
         self.executor = ThreadPoolExecutor(thread_name_prefix='BotExecutor')
+        # one socket for all messages to the DCS servers
+        self.dcs_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    async def setup_hook(self) -> None:
+        # the async pool has its own limits, as its connections come on top of the ones of the (sync) pool
+        if self.master:
+            pool_min = self.config['BOT']['MASTER_ASYNC_POOL_MIN']
+            pool_max = self.config['BOT']['MASTER_ASYNC_POOL_MAX']
+        else:
+            pool_min = self.config['BOT']['AGENT_ASYNC_POOL_MIN']
+            pool_max = self.config['BOT']['AGENT_ASYNC_POOL_MAX']
+        self.apool = AsyncConnectionPool(self.config['BOT']['DATABASE_URL'], min_size=int(pool_min),
+                                         max_size=int(pool_max), open=False)
+        await self.apool.open()
+        self.check_pool.start()
+
+    @tasks.loop(minutes=1.0)
+    async def check_pool(self):
+        # connections that are held that long are most likely not given back to the pool
+        threshold = int(self.config['BOT']['POOL_HOLD_WARNING'])
+        if threshold <= 0:
+            return
+        checkouts = self.pool.get_long_held(threshold, only_new=True)
+        if checkouts:
+            self.log.warning(f'{len(checkouts)} database connection(s) held longer than {threshold} seconds:\n' +
+                             self.pool.format_checkouts(checkouts))
 
     async def close(self):
         await super().close()
         self.log.debug('Shutting down...')
+        self.check_pool.cancel()
         if self.udp_server:
-            self.udp_server.shutdown()
-            self.udp_server.server_close()
+            await self.udp_server.shutdown()
         self.log.debug('- Listener stopped.')
+        self.dcs_socket.close()
+        if self.apool:
+            await self.apool.close()
+            self.log.debug('- Database pool closed.')
         self.executor.shutdown(wait=True)
         self.log.debug('- Executor stopped.')
         self.log.info('Shutdown complete.')
@@ -78,10 +113,7 @@ class DCSServerBot(commands.Bot):
         self.log.info('- Searching for running DCS servers, this might take a bit ...')
         servers = list(self.servers.values())
         timeout = (5 * len(self.servers)) if self.config.getboolean('BOT', 'SLOW_SYSTEM') else (3 * len(self.servers))
-        ret = await asyncio.gather(
-            *[server.sendtoDCSSync({"command": "registerDCSServer"}, timeout) for server in servers],
-            return_exceptions=True
-        )
+        ret = await self.sendtoDCSSyncAll(servers, {"command": "registerDCSServer"}, timeout)
         num = 0
         for i in range(0, len(servers)):
             if isinstance(ret[i], asyncio.TimeoutError):
@@ -94,6 +126,16 @@ class DCSServerBot(commands.Bot):
             self.log.info('- No running servers found.')
         self.log.info('DCSServerBot started, accepting commands.')
 
+    @staticmethod
+    async def sendtoDCSSyncAll(servers: list[Server], message: dict,
+                               timeout: Optional[int] = 5.0) -> list[Union[dict, Exception]]:
+        """
+        Sends the same request to multiple servers at once. Returns the responses in the order of the servers,
+        or the exception (like a TimeoutError) that occurred for the respective server.
+        """
+        return await asyncio.gather(*[server.sendtoDCSSync(message.copy(), timeout) for server in servers],
+                                    return_exceptions=True)
+
     async def load_plugin(self, plugin: str) -> bool:
         try:
             await self.load_extension(f'plugins.{plugin}.commands')
@@ -282,6 +324,32 @@ class DCSServerBot(commands.Bot):
             embed.set_footer(text=datetime.now().strftime("%d/%m/%y %H:%M:%S"))
             await self.audit_channel.send(embed=embed, allowed_mentions=discord.AllowedMentions(replied_user=False))
 
+    async def run_sync_db(self, func: Callable[..., T], *args) -> T:
+        """
+        Runs blocking psycopg2 code in the executor, until it has been migrated to the async pool (apool).
+        func gets a connection of the pool as first parameter. The transaction is committed afterwards or
+        rolled back on errors.
+        """
+        def _run() -> T:
+            conn = self.pool.getconn()
+            try:
+                result = func(conn, *args)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.pool.putconn(conn)
+
+        return await self.loop.run_in_executor(self.executor, _run)
+
+    def get_listener_stats(self) -> dict[str, dict[str, Union[int, float]]]:
+        return {type(listener).__name__: listener.get_stats() for listener in self.eventListeners}
+
+    def get_queue_stats(self) -> dict[str, dict[str, int]]:
+        return self.udp_server.get_stats() if self.udp_server else {}
+
     def sendtoBot(self, message: dict):
         message['channel'] = '-1'
         msg = json.dumps(message)
@@ -478,9 +546,16 @@ class DCSServerBot(commands.Bot):
     def register_eventListener(self, listener: EventListener):
         self.log.debug(f'- Registering EventListener {type(listener).__name__}')
         self.eventListeners.append(listener)
+        for command in listener.commands:
+            self.commandListeners.setdefault(command, []).append(listener)
 
-    def unregister_eventListener(self, listener: EventListener):
+    async def unregister_eventListener(self, listener: EventListener):
+        await listener.shutdown()
         self.eventListeners.remove(listener)
+        for command in listener.commands:
+            self.commandListeners[command].remove(listener)
+            if not self.commandListeners[command]:
+                del self.commandListeners[command]
         self.log.debug(f'- EventListener {type(listener).__name__} unregistered.')
 
     def register_server(self, data: dict) -> bool:
@@ -513,6 +588,13 @@ class DCSServerBot(commands.Bot):
         server.process = utils.find_process('DCS.exe', server.installation)
         server.options = data['options']
         server.dcs_version = data['dcs_version']
+        # negotiate the wire encoding, older hooks only support JSON
+        if 'encodings' in data:
+            if self.config.getboolean('BOT', 'MSGPACK') and 'msgpack' in data['encodings']:
+                server.encoding = 'msgpack'
+            else:
+                server.encoding = 'json'
+            server.sendtoDCS({"command": "setEncoding", "encoding": server.encoding})
         # update the database and check for server name changes
         conn = self.pool.getconn()
         try:
@@ -569,29 +651,118 @@ class DCSServerBot(commands.Bot):
         return None
 
     async def start_udp_listener(self):
-        class RequestHandler(BaseRequestHandler):
-
-            def handle(s):
-                data = json.loads(s.request[0].strip())
+        class DatagramProtocol(asyncio.DatagramProtocol):
+            # seconds to wait for the missing fragments of a message
+            FRAGMENT_TIMEOUT = 10
+
+            def __init__(s):
+                s.transport: Optional[asyncio.DatagramTransport] = None
+                s.message_queue: dict[str, EventQueue] = {}
+                s.workers: dict[str, asyncio.Task] = {}
+                s.queue_stats: dict[str, dict[str, int]] = {}
+                # incomplete fragmented messages, keyed by sender address and message id
+                s.fragments: dict[Tuple[Tuple[str, int], str], dict[int, bytes]] = {}
+                # capture all received messages to replay them later on (see replay.py)
+                capture = self.config['BOT'].get('EVENT_CAPTURE')
+                if capture:
+                    s.capture = open(capture, 'ab')
+                    self.log.info(f'- Capturing all received messages into {capture}')
+                else:
+                    s.capture = None
+
+            def connection_made(s, transport: asyncio.DatagramTransport):
+                s.transport = transport
+
+            def reassemble(s, fragment: bytes, addr: Tuple[str, int]) -> Optional[bytes]:
+                # fragments have the format #<msg_id>:<seq>:<total>#<data>
+                try:
+                    end = fragment.index(b'#', 1)
+                    msg_id, seq, total = fragment[1:end].decode().split(':')
+                    seq, total = int(seq), int(total)
+                    if not 0 < seq <= total:
+                        raise ValueError(seq)
+                except ValueError:
+                    self.log.warning('Invalid fragment received from {}: {}'.format(addr, fragment[:64]))
+                    return None
+                key = (addr, msg_id)
+                if key not in s.fragments:
+                    s.fragments[key] = {}
+                    self.loop.call_later(s.FRAGMENT_TIMEOUT, s.expire, key, s.fragments[key])
+                chunks = s.fragments[key]
+                chunks[seq] = fragment[end + 1:]
+                if len(chunks) < total:
+                    return None
+                del s.fragments[key]
+                return b''.join(chunks[i] for i in range(1, total + 1))
+
+            def expire(s, key: Tuple[Tuple[str, int], str], chunks: dict[int, bytes]):
+                # msg_ids might be reused by the sender, so only drop the buffer we've been scheduled for
+                if s.fragments.get(key) is chunks:
+                    del s.fragments[key]
+                    self.log.warning(f'Incomplete message {key[1]} from {key[0]} dropped '
+                                     f'({len(chunks)} fragments received).')
+
+            def datagram_received(s, message: bytes, addr: Tuple[str, int]):
+                # messages larger than the maximum UDP packet size are sent in fragments
+                if message[:1] == b'#':
+                    message = s.reassemble(message, addr)
+                    if not message:
+                        return
+                try:
+                    # JSON messages always start with "{", everything else is msgpack
+                    if message[:1] == b'{':
+                        data = json.loads(message)
+                    else:
+                        data = msgpack.unpackb(message, unicode_errors='replace')
+                except ValueError:
+                    self.log.warning('Invalid message received from {}: {}'.format(addr, message))
+                    return
+                if not isinstance(data, dict):
+                    self.log.warning('Invalid message received from {}: {}'.format(addr, data))
+                    return
                 # ignore messages not containing server names
                 if 'server_name' not in data:
                     self.log.warning('Message without server_name received: {}'.format(data))
                     return
                 server_name = data['server_name']
-                if server_name not in s.server.message_queue:
-                    s.server.message_queue[server_name] = Queue()
-                    s.server.executor.submit(s.process, server_name)
-                s.server.message_queue[server_name].put(data)
-
-            def process(s, server_name: str):
-                data = s.server.message_queue[server_name].get()
-                while len(data):
+                if s.capture:
+                    s.capture.write(msgpack.packb([time.monotonic(), server_name, data]))
+                if server_name not in s.message_queue:
+                    queue = EventQueue.from_config(self.config)
+                    # keep the statistics, if the queue of a server is created again
+                    queue.stats = s.queue_stats.setdefault(server_name, queue.stats)
+                    s.message_queue[server_name] = queue
+                    s.workers[server_name] = asyncio.create_task(s.process(server_name))
+                # events are only dispatched to the listener queues from here, so this queue only fills up while
+                # the server registers, the listeners apply the same policy to their own queues
+                queue = s.message_queue[server_name]
+                if not queue.offer(data) and queue.stats['dropped'] % 1000 == 1:
+                    self.log.warning(f'Event queue for server {server_name} is full, {queue.stats["dropped"]} '
+                                     f'events dropped so far.')
+
+            def get_stats(s) -> dict[str, dict[str, int]]:
+                return {
+                    server_name: {"depth": s.message_queue[server_name].qsize()
+                                  if server_name in s.message_queue else 0} | stats
+                    for server_name, stats in s.queue_stats.items()
+                }
+
+            def error_received(s, ex: Exception):
+                self.log.warning(f'UDP listener error: {ex}')
+
+            async def process(s, server_name: str):
+                queue = s.message_queue[server_name]
+                while True:
+                    data = await queue.get()
                     try:
                         self.log.debug('{}->HOST: {}'.format(data['server_name'], json.dumps(data)))
                         command = data['command']
                         if command == 'registerDCSServer':
-                            if not self.register_server(data):
-                                self.log.error(f"Error while registering server {server_name}. Exiting worker thread.")
+                            # registration accesses the database, so don't block the event loop
+                            if not await self.loop.run_in_executor(self.executor, self.register_server, data):
+                                self.log.error(f"Error while registering server {server_name}. Exiting worker.")
+                                del s.message_queue[server_name]
+                                del s.workers[server_name]
                                 return
                         elif (data['server_name'] not in self.servers or
                               self.servers[data['server_name']].status == Status.UNREGISTERED):
@@ -602,36 +773,30 @@ class DCSServerBot(commands.Bot):
                             if data['channel'] in self.listeners:
                                 f = self.listeners[data['channel']]
                                 if not f.done():
-                                    self.loop.call_soon_threadsafe(f.set_result, data)
+                                    f.set_result(data)
                                 if command != 'registerDCSServer':
                                     continue
-                        for listener in self.eventListeners:
-                            if command in listener.commands:
-                                self.loop.call_soon_threadsafe(asyncio.create_task, listener.processEvent(data))
+                        for listener in self.commandListeners.get(command, []):
+                            listener.enqueue(data)
                     except Exception as ex:
                         self.log.exception(ex)
                     finally:
-                        s.server.message_queue[server_name].task_done()
-                        data = s.server.message_queue[server_name].get()
-
-        class MyThreadingUDPServer(ThreadingUDPServer):
-            def __init__(self, server_address: Tuple[str, int], request_handler: Callable[..., BaseRequestHandler]):
-                # enable reuse, in case the restart was too fast and the port was still in TIME_WAIT
-                MyThreadingUDPServer.allow_reuse_address = True
-                MyThreadingUDPServer.max_packet_size = 65504
-                self.message_queue: dict[str, Queue[str]] = {}
-                self.executor = ThreadPoolExecutor(thread_name_prefix='UDPServer')
-                super().__init__(server_address, request_handler)
-
-            def shutdown(self) -> None:
-                super().shutdown()
-                for server_name, queue in self.message_queue.items():
-                    queue.join()
-                    queue.put('')
-                self.executor.shutdown(wait=True)
+                        queue.task_done()
+
+            async def shutdown(s) -> None:
+                s.transport.close()
+                if s.capture:
+                    s.capture.close()
+                for queue in s.message_queue.values():
+                    await queue.join()
+                for worker in s.workers.values():
+                    worker.cancel()
 
         host = self.config['BOT']['HOST']
         port = int(self.config['BOT']['PORT'])
-        self.udp_server = MyThreadingUDPServer((host, port), RequestHandler)
-        self.executor.submit(self.udp_server.serve_forever)
+        # enable reuse, in case the restart was too fast and the port was still in use
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        _, self.udp_server = await self.loop.create_datagram_endpoint(DatagramProtocol, sock=sock)
         self.log.debug('- Listener started on interface {} port {} accepting commands.'.format(host, port))
@@ -1,16 +1,27 @@
 from __future__ import annotations
 import discord
 import psycopg2
+import psycopg2.extras
 from contextlib import closing
 from core import utils
 from core.data.dataobject import DataObject, DataObjectFactory
 from core.data.const import Side, Coalition
+from core.statements import PreparedStatements
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from .server import Server
 
+PreparedStatements.register('players.load', 'SELECT p.discord_id, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE '
+                                            'END AS banned, p.manual, c.coalition FROM players p LEFT OUTER JOIN bans '
+                                            'b ON p.ucid = b.ucid LEFT OUTER JOIN coalitions c ON p.ucid = '
+                                            'c.player_ucid WHERE p.ucid = %s')
+PreparedStatements.register('players.upsert', 'INSERT INTO players (ucid, discord_id, name, last_seen) VALUES (%s, -1, '
+                                              '%s, NOW()) ON CONFLICT (ucid) DO UPDATE SET name=excluded.name, '
+                                              'last_seen=excluded.last_seen')
+PreparedStatements.register('players.last_seen', 'UPDATE players SET last_seen = NOW() WHERE ucid = %s')
+
 
 @dataclass
 @DataObjectFactory.register("Player")
@@ -32,43 +43,65 @@ class Player(DataObject):
     _member: discord.Member = field(compare=False, repr=False, default=None, init=False)
     _verified: bool = field(compare=False, default=False)
     _coalition: Coalition = field(compare=False, default=None)
+    # row of the player, if it was loaded already by Player.prefetch()
+    _prefetched: Optional[tuple] = field(compare=False, repr=False, default=None)
 
     def __post_init__(self):
         super().__post_init__()
         if self.id == 1:
             self.active = False
             return
-        conn = self.pool.getconn()
-        try:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute('SELECT p.discord_id, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END AS banned, '
-                               'p.manual, c.coalition FROM players p LEFT OUTER JOIN bans b ON p.ucid = b.ucid '
-                               'LEFT OUTER JOIN coalitions c ON p.ucid = c.player_ucid WHERE p.ucid = %s',
-                               (self.ucid, ))
-                # existing member found?
-                if cursor.rowcount == 1:
-                    row = cursor.fetchone()
-                    if row[0] != -1:
-                        self.member = self._member = self.bot.guilds[0].get_member(row[0])
-                        self._verified = row[2]
-                    self.banned = row[1]
-                    if row[3]:
-                        self.coalition = Coalition.RED if row[3] == 'red' else Coalition.BLUE
-                cursor.execute(
-                    'INSERT INTO players (ucid, discord_id, name, last_seen) VALUES (%s, -1, %s, NOW()) ON '
-                    'CONFLICT (ucid) DO UPDATE SET name=excluded.name, last_seen=excluded.last_seen',
-                    (self.ucid, self.name))
-                conn.commit()
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
+        if self._prefetched is not None:
+            self._load(self._prefetched)
+        else:
+            conn = self.pool.getconn()
+            try:
+                with closing(conn.cursor()) as cursor:
+                    PreparedStatements.execute(cursor, 'players.load', (self.ucid, ))
+                    # existing member found?
+                    if cursor.rowcount == 1:
+                        self._load(cursor.fetchone())
+                    PreparedStatements.execute(cursor, 'players.upsert', (self.ucid, self.name))
+                    conn.commit()
+            except (Exception, psycopg2.DatabaseError) as error:
+                self.log.exception(error)
+            finally:
+                self.pool.putconn(conn)
         # if automatch is enabled, try to match the user
         if not self.member and self.bot.config.getboolean('BOT', 'AUTOMATCH'):
             discord_user = self.bot.match_user({"ucid": self.ucid, "name": self.name})
             if discord_user:
                 self.member = discord_user
 
+    def _load(self, row: tuple) -> None:
+        if row[0] != -1:
+            self.member = self._member = self.bot.guilds[0].get_member(row[0])
+            self._verified = row[2]
+        self.banned = row[1]
+        if row[3]:
+            self.coalition = Coalition.RED if row[3] == 'red' else Coalition.BLUE
+
+    @staticmethod
+    def prefetch(conn, players: list[dict]) -> dict[str, tuple]:
+        """
+        Upserts all given players at once and returns their rows by ucid, to be handed over as _prefetched when
+        the Player objects are created. Used on registrations, where a whole server of players is created at once.
+        """
+        # the same player can't be upserted twice in one statement
+        names = {p['ucid']: p['name'] for p in players}
+        if not names:
+            return {}
+        with closing(conn.cursor()) as cursor:
+            psycopg2.extras.execute_values(cursor, 'INSERT INTO players (ucid, discord_id, name, last_seen) VALUES %s '
+                                                   'ON CONFLICT (ucid) DO UPDATE SET name=excluded.name, '
+                                                   'last_seen=excluded.last_seen',
+                                           list(names.items()), template='(%s, -1, %s, NOW())')
+            cursor.execute('SELECT p.ucid, p.discord_id, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END AS '
+                           'banned, p.manual, c.coalition FROM players p LEFT OUTER JOIN bans b ON p.ucid = b.ucid '
+                           'LEFT OUTER JOIN coalitions c ON p.ucid = c.player_ucid WHERE p.ucid = ANY(%s)',
+                           (list(names.keys()), ))
+            return {row[0]: row[1:] for row in cursor.fetchall()}
+
     def is_active(self) -> bool:
         return self.active
 
@@ -173,7 +206,7 @@ class Player(DataObject):
                     self.group_name = data['group_name']
                 if 'group_id' in data:
                     self.group_id = data['group_id']
-                cursor.execute('UPDATE players SET last_seen = NOW() WHERE ucid = %s', (self.ucid, ))
+                PreparedStatements.execute(cursor, 'players.last_seen', (self.ucid, ))
                 conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
@@ -1,12 +1,15 @@
 from __future__ import annotations
 import asyncio
 import discord
+import hashlib
 import json
 import luadata
+import msgpack
 import os
 import socket
 import subprocess
 import psycopg2
+import threading
 import uuid
 from contextlib import closing, suppress
 from dataclasses import dataclass, field
@@ -83,8 +86,16 @@ class Server(DataObject):
     on_mission_end: dict = field(default_factory=dict, compare=False)
     on_empty: dict = field(default_factory=dict, compare=False)
     dcs_version: str = field(default=None, compare=False)
+    encoding: str = field(default='json', compare=False)
     extensions: dict[str, Extension] = field(default_factory=dict, compare=False)
     _lock: asyncio.Lock = field(init=False, compare=False)
+    _batch: list[bytes] = field(default_factory=list, init=False, compare=False, repr=False)
+    _batch_lock: threading.Lock = field(default_factory=threading.Lock, init=False, compare=False, repr=False)
+    # hashes of the embeds that are displayed at the moment, to not update them if nothing changed
+    _embed_hashes: dict[str, str] = field(default_factory=dict, init=False, compare=False, repr=False)
+
+    # maximum size of a batch of commands sent to DCS in one datagram
+    MAX_BATCH_SIZE = 8000
 
     def __post_init__(self):
         super().__post_init__()
@@ -246,16 +257,63 @@ class Server(DataObject):
             filename = self.current_mission.filename
         return filename
 
-    def sendtoDCS(self, message: dict):
+    def _encode(self, message: dict) -> bytes:
         # As Lua does not support large numbers, convert them to strings
         for key, value in message.items():
             if type(value) == int:
                 message[key] = str(value)
-        msg = json.dumps(message)
-        self.log.debug(f"HOST->{self.name}: {msg}")
-        dcs_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        dcs_socket.sendto(msg.encode('utf-8'), (self.host, int(self.port)))
-        dcs_socket.close()
+        if self.encoding == 'msgpack':
+            self.log.debug(f"HOST->{self.name}: {message}")
+            return msgpack.packb(message)
+        else:
+            msg = json.dumps(message)
+            self.log.debug(f"HOST->{self.name}: {msg}")
+            return msg.encode('utf-8')
+
+    def sendtoDCS(self, message: dict):
+        msg = self._encode(message)
+        window = int(self.bot.config['BOT']['SEND_BATCH_WINDOW'])
+        if window > 0:
+            with self._batch_lock:
+                self._batch.append(msg)
+                # a flush is scheduled already
+                if len(self._batch) > 1:
+                    return
+            # sendtoDCS might be called from outside the event loop
+            self.bot.loop.call_soon_threadsafe(self.bot.loop.call_later, window / 1000, self._flush_batch)
+        else:
+            self.bot.dcs_socket.sendto(msg, (self.host, int(self.port)))
+
+    def _flush_batch(self):
+        with self._batch_lock:
+            messages = self._batch
+            self._batch = []
+        self._send_batched(messages)
+
+    def _send_batched(self, messages: list[bytes]):
+        # LuaSocket receives up to 8 KB per datagram, so split the batch if needed
+        batch: list[bytes] = []
+        size = 0
+        for msg in messages:
+            if batch and size + len(msg) > self.MAX_BATCH_SIZE:
+                self._send_batch(batch)
+                batch = []
+                size = 0
+            batch.append(msg)
+            size += len(msg) + 1
+        if batch:
+            self._send_batch(batch)
+
+    def _send_batch(self, batch: list[bytes]):
+        if len(batch) == 1:
+            msg = batch[0]
+        elif self.encoding == 'msgpack':
+            packer = msgpack.Packer()
+            msg = packer.pack_map_header(2) + packer.pack('command') + packer.pack('batch') + \
+                packer.pack('commands') + packer.pack_array_header(len(batch)) + b''.join(batch)
+        else:
+            msg = b'{"command": "batch", "commands": [' + b', '.join(batch) + b']}'
+        self.bot.dcs_socket.sendto(msg, (self.host, int(self.port)))
 
     async def sendtoDCSSync(self, message: dict, timeout: Optional[int] = 5.0):
         future = self.bot.loop.create_future()
@@ -268,6 +326,29 @@ class Server(DataObject):
         finally:
             del self.bot.listeners[token]
 
+    async def sendtoDCSSyncBatch(self, messages: list[dict],
+                                 timeout: Optional[int] = 5.0) -> list[Union[dict, asyncio.TimeoutError]]:
+        """
+        Sends multiple requests in one datagram. Returns the responses in the order of the requests, a
+        TimeoutError for every request that was not answered in time.
+        """
+        futures = []
+        tokens = []
+        for message in messages:
+            token = 'sync-' + str(uuid.uuid4())
+            message['channel'] = token
+            future = self.bot.loop.create_future()
+            self.bot.listeners[token] = future
+            futures.append(future)
+            tokens.append(token)
+        try:
+            self._send_batched([self._encode(message) for message in messages])
+            await asyncio.wait(futures, timeout=timeout)
+            return [f.result() if f.done() else asyncio.TimeoutError() for f in futures]
+        finally:
+            for token in tokens:
+                del self.bot.listeners[token]
+
     def sendChatMessage(self, coalition: Coalition, message: str, sender: str = None):
         if coalition == Coalition.ALL:
             self.sendtoDCS({
@@ -399,6 +480,7 @@ class Server(DataObject):
 
     async def setEmbed(self, embed_name: str, embed: discord.Embed, file: Optional[discord.File] = None,
                        channel_id: Optional[Union[Channel, int]] = Channel.STATUS) -> None:
+        digest = hashlib.sha1(json.dumps(embed.to_dict(), sort_keys=True, default=str).encode('utf-8')).hexdigest()
         async with self._lock:
             message = None
             channel = self.bot.get_channel(channel_id) if isinstance(channel_id, int) else self.get_channel(channel_id)
@@ -415,8 +497,11 @@ class Server(DataObject):
                         self.log.warning(f"Discord error during setEmbed({embed_name}): " + str(ex))
                         return
             if message:
+                if not file and self._embed_hashes.get(embed_name) == digest:
+                    return
                 try:
                     await message.edit(embed=embed)
+                    self._embed_hashes[embed_name] = digest
                 except discord.errors.NotFound:
                     message = None
                 except discord.errors.DiscordException as ex:
@@ -425,6 +510,7 @@ class Server(DataObject):
             if not message:
                 message = await channel.send(embed=embed, file=file)
                 self.embeds[embed_name] = message
+                self._embed_hashes[embed_name] = digest
                 conn = self.pool.getconn()
                 try:
                     with closing(conn.cursor()) as cursor:
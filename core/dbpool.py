@@ -0,0 +1,99 @@
+from __future__ import annotations
+import psycopg2.pool
+import sys
+import threading
+import time
+import traceback
+from typing import Optional, Union
+from logging import Logger
+
+
+class InstrumentedPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool that keeps track of every connection that is checked out (since when, by which thread
+    and from where), to find connections that are held too long or never returned.
+    The pool does not block if all connections are in use, it raises a PoolError, which is counted as "exhausted".
+    The code that took a connection is only recorded, if trace is set.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, log: Logger, trace: bool = True, **kwargs):
+        self.log = log
+        self.trace = trace
+        self._checkouts: dict[int, dict] = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {"checkouts": 0, "exhausted": 0, "peak": 0, "hold_time": 0.0, "max_hold": 0.0}
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        try:
+            conn = super().getconn(key)
+        except psycopg2.pool.PoolError as error:
+            with self._stats_lock:
+                self._stats['exhausted'] += 1
+            if not self.closed:
+                self.log.error(f'Database pool exhausted ({self.maxconn} connections), connections in use:\n' +
+                               self.format_checkouts())
+            raise error
+        if self.trace:
+            # skip this function, the source lines are only read when the stack is formatted
+            stack = traceback.StackSummary.extract(traceback.walk_stack(sys._getframe(1)), limit=8,
+                                                   lookup_lines=False)
+            stack.reverse()
+        else:
+            stack = None
+        with self._stats_lock:
+            self._checkouts[id(conn)] = {
+                "since": time.monotonic(),
+                "thread": threading.current_thread().name,
+                "stack": stack
+            }
+            self._stats['checkouts'] += 1
+            self._stats['peak'] = max(self._stats['peak'], len(self._checkouts))
+        return conn
+
+    def putconn(self, conn=None, key=None, close=False):
+        with self._stats_lock:
+            checkout = self._checkouts.pop(id(conn), None)
+            if checkout:
+                held = time.monotonic() - checkout['since']
+                self._stats['hold_time'] += held
+                self._stats['max_hold'] = max(self._stats['max_hold'], held)
+        super().putconn(conn, key, close)
+
+    def get_stats(self) -> dict[str, Union[int, float]]:
+        with self._stats_lock:
+            stats = self._stats.copy()
+            in_use = len(self._checkouts)
+        stats |= {
+            "min": self.minconn,
+            "max": self.maxconn,
+            "in_use": in_use,
+            "idle": len(self._pool),
+            "utilization": in_use / self.maxconn
+        }
+        return stats
+
+    def get_long_held(self, threshold: float, only_new: bool = False) -> list[dict]:
+        """
+        Returns all connections that are checked out longer than threshold seconds. If only_new is set, every
+        connection is returned only once.
+        """
+        now = time.monotonic()
+        result = []
+        with self._stats_lock:
+            for checkout in self._checkouts.values():
+                if now - checkout['since'] <= threshold or (only_new and checkout.get('reported')):
+                    continue
+                if only_new:
+                    checkout['reported'] = True
+                result.append(checkout | {"held": now - checkout['since']})
+        return result
+
+    def format_checkouts(self, checkouts: Optional[list[dict]] = None) -> str:
+        if checkouts is None:
+            checkouts = self.get_long_held(0)
+        return '\n'.join(
+            f"- held for {checkout['held']:.1f}s by thread {checkout['thread']}:\n" +
+            (''.join(traceback.format_list(checkout['stack'])) if checkout['stack'] else '')
+            for checkout in checkouts
+        )
@@ -1,12 +1,72 @@
 from __future__ import annotations
+import asyncio
+import time
 from abc import ABC
-from typing import Union, TypeVar, Any, TYPE_CHECKING
+from configparser import ConfigParser
+from typing import Union, TypeVar, Any, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from core import DCSServerBot, Plugin
 
 
+class EventQueue(asyncio.Queue):
+    """
+    Event queue with a load shedding policy for low priority events (EVENT_QUEUE_DROPPABLE).
+    If the queue is more than half full, only every n-th low priority event (EVENT_QUEUE_SAMPLE_RATE) is kept, if
+    it is full (EVENT_QUEUE_SIZE), all of them are dropped. All other events are only dropped, if the queue holds
+    twice as many events, replies to sync requests are never dropped.
+    """
+
+    def __init__(self, max_size: int = 0, sample_rate: int = 1, droppable: Optional[set[str]] = None):
+        super().__init__()
+        self.max_size = max_size
+        self.sample_rate = max(sample_rate, 1)
+        self.droppable = droppable or set()
+        self.stats = {"high_water": 0, "sampled": 0, "dropped": 0}
+
+    @classmethod
+    def from_config(cls, config: ConfigParser) -> EventQueue:
+        return cls(max_size=int(config['BOT']['EVENT_QUEUE_SIZE']),
+                   sample_rate=int(config['BOT']['EVENT_QUEUE_SAMPLE_RATE']),
+                   droppable={x.strip() for x in config['BOT']['EVENT_QUEUE_DROPPABLE'].split(',')})
+
+    @staticmethod
+    def is_sync(data: dict) -> bool:
+        # sync replies are never dropped, as someone is waiting for them
+        return 'channel' in data and str(data['channel']).startswith('sync-')
+
+    def is_droppable(self, data: dict) -> bool:
+        return not self.is_sync(data) and data['command'] in self.droppable
+
+    def offer(self, data: dict) -> bool:
+        """
+        Puts the event into the queue, if the load allows it. Returns False, if the event was dropped.
+        """
+        if self.max_size > 0 and self.qsize() >= (self.max_size / 2) and not self.is_sync(data):
+            # queue is overloaded even without the low priority events, drop everything
+            if self.qsize() >= 2 * self.max_size:
+                self.stats['dropped'] += 1
+                return False
+            if self.is_droppable(data):
+                # queue is full, drop all low priority events
+                if self.qsize() >= self.max_size:
+                    self.stats['dropped'] += 1
+                    return False
+                # queue is under pressure, only keep every n-th low priority event
+                self.stats['sampled'] += 1
+                if self.stats['sampled'] % self.sample_rate:
+                    self.stats['dropped'] += 1
+                    return False
+        self.put_nowait(data)
+        self.stats['high_water'] = max(self.stats['high_water'], self.qsize())
+        return True
+
+
 class EventListener(ABC):
+    # number of events processed in parallel, None = LISTENER_CONCURRENCY from dcsserverbot.ini
+    concurrency: Optional[int] = None
+    # process the events of each server one after the other, in the order they were received
+    ordered: bool = True
 
     def __init__(self, plugin):
         self.plugin: Plugin = plugin
@@ -16,7 +76,72 @@ class EventListener(ABC):
         self.pool = plugin.pool
         self.locals: dict = plugin.locals
         self.loop = plugin.loop
-        self.commands: list[str] = [m for m in dir(self) if m not in dir(EventListener) and not m.startswith('_')]
+        self.commands: set[str] = {
+            m for m in dir(self)
+            if m not in dir(EventListener) and not m.startswith('_') and callable(getattr(self, m))
+        }
+        if not self.concurrency:
+            self.concurrency = int(self.bot.config['BOT']['LISTENER_CONCURRENCY'])
+        self._queues: list[EventQueue] = []
+        self._workers: list[asyncio.Task] = []
+        self._stats = {"processed": 0, "busy": 0, "time": 0.0}
+
+    def enqueue(self, data: dict[str, Union[str, int]]) -> None:
+        if not self._workers:
+            # ordered listeners get one queue per worker, all events of a server go into the same queue
+            num_queues = self.concurrency if self.ordered else 1
+            self._queues = [EventQueue.from_config(self.bot.config) for _ in range(num_queues)]
+            self._workers = [
+                asyncio.create_task(self._work(self._queues[i % num_queues])) for i in range(self.concurrency)
+            ]
+        if self.ordered:
+            queue = self._queues[hash(data['server_name']) % len(self._queues)]
+        else:
+            queue = self._queues[0]
+        if not queue.offer(data):
+            dropped = sum(queue.stats['dropped'] for queue in self._queues)
+            if dropped % 1000 == 1:
+                self.log.warning(f'{type(self).__name__} can\'t keep up, {dropped} events dropped so far.')
+
+    async def _work(self, queue: EventQueue) -> None:
+        while True:
+            data = await queue.get()
+            self._stats['busy'] += 1
+            start = time.monotonic()
+            try:
+                await self.processEvent(data)
+            except Exception as ex:
+                self.log.exception(ex)
+            finally:
+                self._stats['busy'] -= 1
+                self._stats['processed'] += 1
+                self._stats['time'] += time.monotonic() - start
+                queue.task_done()
+
+    def get_stats(self) -> dict[str, Union[int, float]]:
+        return {
+            "depth": sum(queue.qsize() for queue in self._queues),
+            "high_water": max((queue.stats['high_water'] for queue in self._queues), default=0),
+            "dropped": sum(queue.stats['dropped'] for queue in self._queues),
+            "workers": self.concurrency
+        } | self._stats
+
+    async def shutdown(self, timeout: float = 10) -> None:
+        """
+        Processes the events that are still queued for at most timeout seconds and stops the workers afterwards.
+        """
+        if self._queues:
+            try:
+                await asyncio.wait_for(asyncio.gather(*[queue.join() for queue in self._queues]), timeout)
+            except asyncio.TimeoutError:
+                pass
+        discarded = sum(queue.qsize() for queue in self._queues)
+        if discarded:
+            self.log.warning(f'{type(self).__name__}: {discarded} queued events discarded on shutdown.')
+        for worker in self._workers:
+            worker.cancel()
+        self._workers.clear()
+        self._queues.clear()
 
     async def processEvent(self, data: dict[str, Union[str, int]]) -> Any:
         if data['command'] in self.commands:
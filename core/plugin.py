@@ -18,6 +18,8 @@ if TYPE_CHECKING:
 
 
 class Plugin(commands.Cog):
+    # tables with player data, that are pruned in batches together with the players (table => column with the ucid)
+    prune_tables: dict[str, str] = {}
 
     def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
         self.plugin_name = type(self).__module__.split('.')[-2]
@@ -36,7 +38,7 @@ class Plugin(commands.Cog):
 
     async def cog_unload(self):
         if self.eventlistener:
-            self.bot.unregister_eventListener(self.eventlistener)
+            await self.bot.unregister_eventListener(self.eventlistener)
         # delete a possible configuration
         self._config.clear()
         self.log.debug(f'- Plugin {type(self).__name__} unloaded.')
@@ -96,7 +98,7 @@ class Plugin(commands.Cog):
     async def after_dcs_update(self):
         pass
 
-    async def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
+    def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
         pass
 
     def init_db(self):
@@ -1,5 +1,9 @@
 from .env import *
+from .renderer import *
 from .elements import *
 from .utils import *
 from .errors import *
+from .plan import *
+from .cache import *
+from .scheduler import *
 from .base import *
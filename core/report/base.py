@@ -1,18 +1,15 @@
 from __future__ import annotations
 import asyncio
 import discord
-import inspect
-import json
-import os
+import copy
+import io
 import psycopg2
-import sys
 from abc import ABC, abstractmethod
 from contextlib import closing, suppress
 from discord.ext.commands import Context
 from os import path
 from typing import List, Tuple, Optional, TYPE_CHECKING, Any, cast, Union
-from . import ReportEnv, parse_params, parse_input, utils, UnknownReportElement, ReportElement, ClassNotFound, \
-    ValueNotInRange
+from . import ReportEnv, ReportPlan, ReportCache, CacheEntry, UpdateScheduler, parse_input, utils, ValueNotInRange
 
 if TYPE_CHECKING:
     from core import DCSServerBot, Server
@@ -25,6 +22,7 @@ class Report:
         self.log = bot.log
         self.pool = bot.pool
         self.env = ReportEnv(bot)
+        self.plugin = plugin
         default = f'./plugins/{plugin}/reports/{filename}'
         overwrite = f'./reports/{plugin}/{filename}'
         if path.exists(overwrite):
@@ -33,10 +31,40 @@ class Report:
             filename = default
         if not path.exists(filename):
             raise FileNotFoundError(filename)
-        with open(filename) as file:
-            self.report_def = json.load(file)
+        self.filename = filename
+        self.plan = ReportPlan.load(filename)
+        self.report_def = self.plan.report_def
+
+    def get_cache_ttl(self) -> int:
+        # reports have to enable caching in their definition, either with the default TTL (true) or their own one
+        cache = self.report_def.get('cache', False)
+        ttl = int(self.bot.config['BOT']['REPORT_CACHE_TTL'])
+        if not cache or not ttl:
+            return 0
+        return ttl if cache is True else int(cache)
+
+    def _from_cache(self, entry: CacheEntry, kwargs: dict) -> ReportEnv:
+        self.env.params = kwargs.copy()
+        self.env.params['bot'] = self.bot
+        self.env.embed = discord.Embed.from_dict(copy.deepcopy(entry.embed))
+        self.env.filename = entry.filename
+        self.env.buffer = io.BytesIO(entry.image) if entry.image else None
+        return self.env
 
     async def render(self, *args, **kwargs) -> ReportEnv:
+        ttl = self.get_cache_ttl()
+        key = ReportCache.key(self.plugin, self.filename, kwargs) if ttl else None
+        if key:
+            entry = ReportCache.get(key)
+            if entry:
+                return self._from_cache(entry, kwargs)
+        env = await self._render(*args, **kwargs)
+        if key:
+            ReportCache.put(key, ttl, env.embed, env.filename, env.buffer.getvalue() if env.buffer else None)
+        return env
+
+    async def _render(self, *args, **kwargs) -> ReportEnv:
+        self.env.filename = self.env.buffer = None
         if 'input' in self.report_def:
             self.env.params = await parse_input(self, kwargs, self.report_def['input'])
         else:
@@ -51,53 +79,34 @@ class Report:
         for name, item in self.report_def.items():
             # parse report parameters
             if name == 'title':
-                self.env.embed.title = utils.format_string(item, **self.env.params)[:256]
+                self.env.embed.title = self.plan.templates[name].format(**self.env.params)[:256]
             elif name == 'description':
-                self.env.embed.description = utils.format_string(item, **self.env.params)[:4096]
+                self.env.embed.description = self.plan.templates[name].format(**self.env.params)[:4096]
             elif name == 'url':
                 self.env.embed.url = item
             elif name == 'img':
                 self.env.embed.set_thumbnail(url=item)
             elif name == 'footer':
                 footer = self.env.embed.footer.text
-                text = utils.format_string(item, **self.env.params)
+                text = self.plan.templates[name].format(**self.env.params)
                 if footer is None:
                     footer = text
                 else:
                     footer += '\n' + text
                 self.env.embed.set_footer(text=footer[:2048])
             elif name == 'elements':
-                for element in item:
-                    if isinstance(element, dict):
-                        if 'params' in element:
-                            element_args = parse_params(self.env.params, element['params'])
-                        else:
-                            element_args = self.env.params.copy()
-                        element_class = utils.str_to_class(element['class']) if 'class' in element else None
-                        if not element_class and 'type' in element:
-                            element_class = getattr(sys.modules['core.report.elements'], element['type'])
-                    elif isinstance(element, str):
-                        element_class = getattr(sys.modules['core.report.elements'], element)
-                        element_args = self.env.params.copy()
-                    else:
-                        raise UnknownReportElement(str(element))
-                    if element_class:
-                        # remove parameters, that are not in the class __init__ signature
-                        signature = inspect.signature(element_class.__init__).parameters.keys()
-                        class_args = {name: value for name, value in element_args.items() if name in signature}
-                        element_class = element_class(self.env, **class_args)
-                        if isinstance(element_class, ReportElement):
-                            # remove parameters, that are not in the render classes signature
-                            signature = inspect.signature(element_class.render).parameters.keys()
-                            render_args = {name: value for name, value in element_args.items() if name in signature}
-                            try:
-                                element_class.render(**render_args)
-                            except Exception as ex:
-                                self.log.exception(ex)
+                for element in self.plan.elements:
+                    if element.error:
+                        raise element.error
+                    class_args, render_args = element.bind(self.env.params)
+                    element_class = element.element_class(self.env, **class_args)
+                    try:
+                        if element.is_async:
+                            await element_class.render(**render_args)
                         else:
-                            raise UnknownReportElement(element['class'])
-                    else:
-                        raise ClassNotFound(element['class'])
+                            element_class.render(**render_args)
+                    except Exception as ex:
+                        self.log.exception(ex)
         return self.env
 
 
@@ -171,12 +180,9 @@ class PaginationReport(Report):
                 try:
                     kwargs[name] = values[index]
                     env = await func(*args, **kwargs)
-                    file = discord.File(env.filename) if env.filename else None
+                    file = discord.File(env.buffer, filename=env.filename) if env.buffer else None
                     with suppress(Exception):
                         message = await self.ctx.send(embed=env.embed, file=file, delete_after=self.timeout)
-                    if env.filename:
-                        os.remove(env.filename)
-                        env.filename = None
                 except ValueNotInRange as ex:
                     await self.ctx.send(str(ex))
                 except Exception as ex:
@@ -215,6 +221,10 @@ class PersistentReport(Report):
 
     async def render(self, *args, **kwargs) -> ReportEnv:
         env = await super().render(*args, **kwargs)
-        file = discord.File(env.filename) if env.filename else None
-        self.bot.loop.call_soon(asyncio.create_task, self.server.setEmbed(self.embed_name, env.embed, file))
+        file = discord.File(env.buffer, filename=env.filename) if env.buffer else None
+        await self.server.setEmbed(self.embed_name, env.embed, file)
         return env
+
+    def schedule(self, *args, **kwargs) -> None:
+        # render the report with the next update of the embed, see UpdateScheduler
+        UpdateScheduler.schedule(self.bot, self.server, self.embed_name, lambda: self.render(*args, **kwargs))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+import copy
+import discord
+import time
+from collections.abc import Hashable
+from core.data.server import Server
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional, Union
+
+
+class NotCacheable(Exception):
+    pass
+
+
+def normalize_param(value: Any) -> Hashable:
+    """
+    Converts a report parameter into something that can be part of a cache key.
+    """
+    if value is None or isinstance(value, (str, int, float, bool, Enum)):
+        return value
+    elif isinstance(value, (list, tuple, set)):
+        return tuple(normalize_param(x) for x in value)
+    elif isinstance(value, dict):
+        return tuple(sorted((str(k), normalize_param(v)) for k, v in value.items()))
+    elif isinstance(value, type):
+        return f'{value.__module__}.{value.__qualname__}'
+    elif isinstance(value, discord.Message):
+        # reports only use the message to check in which channel they are displayed
+        return 'channel', value.channel.id
+    elif isinstance(value, (discord.abc.User, discord.abc.GuildChannel, discord.Guild)):
+        return type(value).__name__, value.id
+    elif isinstance(value, Server):
+        return 'server', value.name
+    raise NotCacheable(type(value).__name__)
+
+
+@dataclass
+class CacheEntry:
+    expires: float
+    embed: dict
+    filename: Optional[str] = None
+    image: Optional[bytes] = None
+
+
+class ReportCache:
+    """
+    Keeps finished renders (embed and image) of reports that enable caching in their definition ("cache").
+    Entries expire after REPORT_CACHE_TTL seconds or when the plugin the report belongs to invalidates them,
+    because the data of the report changed.
+    """
+    _entries: dict[tuple, CacheEntry] = {}
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def key(plugin: str, filename: str, params: dict) -> Optional[tuple]:
+        try:
+            return plugin, filename, normalize_param(params)
+        except NotCacheable:
+            return None
+
+    @classmethod
+    def get(cls, key: tuple) -> Optional[CacheEntry]:
+        entry = cls._entries.get(key)
+        if entry and entry.expires < time.monotonic():
+            del cls._entries[key]
+            entry = None
+        if entry:
+            cls.hits += 1
+        else:
+            cls.misses += 1
+        return entry
+
+    @classmethod
+    def put(cls, key: tuple, ttl: int, embed: discord.Embed, filename: Optional[str] = None,
+            image: Optional[bytes] = None) -> None:
+        now = time.monotonic()
+        # drop the expired entries on every write, so the cache can't grow beyond the renders of the last TTL
+        for k in [k for k, v in cls._entries.items() if v.expires < now]:
+            del cls._entries[k]
+        cls._entries[key] = CacheEntry(expires=now + ttl, embed=copy.deepcopy(embed.to_dict()), filename=filename,
+                                       image=image)
+
+    @classmethod
+    def invalidate(cls, plugin: Optional[str] = None, filename: Optional[str] = None) -> None:
+        """
+        To be called by plugins whenever the data of their reports changed.
+        If no filename is given, all reports of that plugin are invalidated, if no plugin is given, all reports.
+        """
+        for key in [key for key in cls._entries.keys()
+                    if (not plugin or key[0] == plugin) and (not filename or key[1].endswith('/' + filename))]:
+            del cls._entries[key]
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._entries.clear()
+        cls.hits = cls.misses = 0
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Union[int, dict[str, int]]]:
+        reports: dict[str, int] = {}
+        for plugin, filename, _ in cls._entries.keys():
+            name = f"{plugin}/{filename.split('/')[-1]}"
+            reports[name] = reports.get(name, 0) + 1
+        return {
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "entries": len(cls._entries),
+            "reports": reports
+        }
@@ -1,18 +1,24 @@
 from __future__ import annotations
-import concurrent
+import asyncio
+import concurrent.futures
+import functools
 import inspect
+import io
 import numpy as np
+import psycopg
 import psycopg2
 import sys
-import uuid
 from abc import ABC, abstractmethod
 from contextlib import closing
 from core import utils
 from core.report.env import ReportEnv
 from core.report.errors import UnknownGraphElement, ClassNotFound, TooManyElements, UnknownValue
+from core.report.renderer import GraphRenderer
 from core.report.utils import parse_params
 from datetime import timedelta
 from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
+from psycopg.rows import dict_row
 from typing import Optional, List, Any, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -88,7 +94,8 @@ class GraphElement(ReportElement):
     def __init__(self, env: ReportEnv, rows: int, cols: int, row: int, col: int,
                  colspan: Optional[int] = 1, rowspan: Optional[int] = 1):
         super().__init__(env)
-        self.axes = plt.subplot2grid((rows, cols), (row, col), colspan=colspan, rowspan=rowspan, fig=self.env.figure)
+        grid = self.env.figure.add_gridspec(rows, cols)
+        self.axes = self.env.figure.add_subplot(grid[row:row + rowspan, col:col + colspan])
 
     @abstractmethod
     def render(self, **kwargs):
@@ -99,13 +106,14 @@ class MultiGraphElement(ReportElement):
     def __init__(self, env: ReportEnv, rows: int, cols: int, params: List[dict]):
         super().__init__(env)
         self.axes = []
+        grid = self.env.figure.add_gridspec(rows, cols)
         for i in range(0, len(params)):
+            row, col = params[i]['row'], params[i]['col']
             colspan = params[i]['colspan'] if 'colspan' in params[i] else 1
             rowspan = params[i]['rowspan'] if 'rowspan' in params[i] else 1
             sharex = params[i]['sharex'] if 'sharex' in params[i] else False
-            self.axes.append(plt.subplot2grid((rows, cols), (params[i]['row'], params[i]['col']), colspan=colspan,
-                                              rowspan=rowspan, fig=self.env.figure,
-                                              sharex=self.axes[-1] if sharex else None))
+            self.axes.append(self.env.figure.add_subplot(grid[row:row + rowspan, col:col + colspan],
+                                                         sharex=self.axes[-1] if sharex else None))
 
     @abstractmethod
     def render(self, **kwargs):
@@ -113,16 +121,14 @@ class MultiGraphElement(ReportElement):
 
 
 class Graph(ReportElement):
-    def __init__(self, env: ReportEnv):
-        super().__init__(env)
-        plt.switch_backend('agg')
 
-    def render(self, width: int, height: int, cols: int, rows: int, elements: List[dict], facecolor: Optional[str] = None):
-        plt.style.use('dark_background')
-        plt.rcParams['axes.facecolor'] = '2C2F33'
-        self.env.figure = plt.figure(figsize=(width, height))
+    async def _build(self, width: int, height: int, cols: int, rows: int, elements: List[dict],
+                     facecolor: Optional[str] = None):
+        # no pyplot figure, as pyplot's global state is not safe to use from multiple reports at the same time
+        self.env.figure = Figure(figsize=(width, height))
         if facecolor:
             self.env.figure.set_facecolor(facecolor)
+        loop = asyncio.get_running_loop()
         futures = []
         with concurrent.futures.ThreadPoolExecutor(
                 max_workers=int(self.env.bot.config['REPORTS']['NUM_WORKERS'])) as executor:
@@ -144,19 +150,32 @@ class Graph(ReportElement):
                         # remove parameters, that are not in the render methods signature
                         signature = inspect.signature(element_class.render).parameters.keys()
                         render_args = {name: value for name, value in element_args.items() if name in signature}
-                        futures.append(executor.submit(element_class.render, **render_args))
+                        futures.append(loop.run_in_executor(executor,
+                                                            functools.partial(element_class.render, **render_args)))
                     else:
                         raise UnknownGraphElement(element['class'])
                 else:
                     raise ClassNotFound(element['class'])
-        # check for any exceptions and raise them
-        for future in futures:
-            if future.exception():
-                raise future.exception()
-        plt.subplots_adjust(hspace=0.5, wspace=0.5)
-        self.env.filename = f'{uuid.uuid4()}.png'
-        self.env.figure.savefig(self.env.filename, bbox_inches='tight', facecolor='#2C2F33')
-        plt.close(self.env.figure)
+            # raise any exception of the elements
+            await asyncio.gather(*futures)
+        self.env.figure.subplots_adjust(hspace=0.5, wspace=0.5)
+
+    async def render(self, width: int, height: int, cols: int, rows: int, elements: List[dict],
+                     facecolor: Optional[str] = None):
+        config = self.env.bot.config['REPORTS']
+        fmt = config['IMAGE_FORMAT'].lower()
+        if fmt == 'webp':
+            pil_kwargs = {"quality": int(config['WEBP_QUALITY'])}
+        else:
+            pil_kwargs = {"compress_level": int(config['PNG_COMPRESSION'])}
+        # the image has to fit into the upload limit of the guild
+        max_size = self.env.bot.guilds[0].filesize_limit if self.env.bot.guilds else 8 * 1024 * 1024
+        await self._build(width, height, cols, rows, elements, facecolor)
+        image = await GraphRenderer.render(self.env.bot, self.env.figure, max_size, format=fmt,
+                                           dpi=int(config['IMAGE_DPI']), pil_kwargs=pil_kwargs,
+                                           bbox_inches='tight', facecolor='#2C2F33')
+        self.env.buffer = io.BytesIO(image)
+        self.env.filename = f'graph.{fmt}'
         self.env.embed.set_image(url='attachment://' + self.env.filename)
         footer = self.env.embed.footer.text
         if footer is None:
@@ -167,49 +186,44 @@ class Graph(ReportElement):
 
 
 class SQLField(EmbedElement):
-    def render(self, sql: str, inline: Optional[bool] = True):
-        conn = self.pool.getconn()
+    async def render(self, sql: str, inline: Optional[bool] = True):
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(utils.format_string(sql, **self.env.params), self.env.params)
-                if cursor.rowcount > 0:
-                    row = cursor.fetchone()
-                    name = list(row.keys())[0]
-                    value = row[0]
-                    self.add_field(name=name, value=value, inline=inline)
-        except psycopg2.DatabaseError as error:
+            async with self.bot.apool.connection() as conn:
+                async with conn.cursor(row_factory=dict_row) as cursor:
+                    await cursor.execute(utils.format_string(sql, **self.env.params), self.env.params)
+                    row = await cursor.fetchone()
+                    if row:
+                        name = list(row.keys())[0]
+                        self.add_field(name=name, value=row[name], inline=inline)
+        except psycopg.DatabaseError as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class SQLTable(EmbedElement):
-    def render(self, sql: str, inline: Optional[bool] = True):
-        conn = self.pool.getconn()
+    async def render(self, sql: str, inline: Optional[bool] = True):
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(utils.format_string(sql, **self.env.params), self.env.params)
-                header = None
-                cols = []
-                elements = 0
-                for row in cursor.fetchall():
-                    elements = len(row)
-                    if not header:
-                        header = list(row.keys())
+            async with self.bot.apool.connection() as conn:
+                async with conn.cursor(row_factory=dict_row) as cursor:
+                    await cursor.execute(utils.format_string(sql, **self.env.params), self.env.params)
+                    header = None
+                    cols = []
+                    elements = 0
+                    for row in await cursor.fetchall():
+                        elements = len(row)
+                        if not header:
+                            header = list(row.keys())
+                        for i, value in enumerate(row.values()):
+                            if len(cols) <= i:
+                                cols.append(str(value) + '\n')
+                            else:
+                                cols[i] += str(value) + '\n'
                     for i in range(0, elements):
-                        if len(cols) <= i:
-                            cols.append(str(row[i]) + '\n')
-                        else:
-                            cols[i] += str(row[i]) + '\n'
-                for i in range(0, elements):
-                    self.add_field(name=header[i], value=cols[i], inline=inline)
-                if elements % 3 and inline:
-                    for i in range(0, 3 - elements % 3):
-                        self.add_field(name='_ _', value='_ _')
-        except psycopg2.DatabaseError as error:
+                        self.add_field(name=header[i], value=cols[i], inline=inline)
+                    if elements % 3 and inline:
+                        for i in range(0, 3 - elements % 3):
+                            self.add_field(name='_ _', value='_ _')
+        except psycopg.DatabaseError as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class BarChart(GraphElement):
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import discord
+import io
 from dataclasses import dataclass
 from matplotlib.figure import Figure
 from typing import TYPE_CHECKING
@@ -13,5 +14,7 @@ class ReportEnv:
     bot: DCSServerBot
     embed: discord.Embed = None
     figure: Figure = None
+    # the image (if any) and its name as an attachment
     filename: str = None
+    buffer: io.BytesIO = None
     params: dict = None
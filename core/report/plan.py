@@ -0,0 +1,119 @@
+from __future__ import annotations
+import inspect
+import json
+import os
+import string
+import sys
+from core import utils
+from typing import Any, Optional, Union
+from .elements import ReportElement
+from .errors import UnknownReportElement, ClassNotFound
+
+
+class FormatTemplate:
+    """
+    A format_string() template that is parsed only once.
+    Templates with positional or nested fields are handed over to format_string() as is.
+    """
+    formatter = string.Formatter()
+
+    def __init__(self, string_: str):
+        self.string = string_
+        try:
+            self.parts = list(self.formatter.parse(string_))
+        except ValueError:
+            self.parts = None
+        else:
+            for _, field, spec, _ in self.parts:
+                if field is not None and (not field or field[0].isdigit() or '{' in spec):
+                    self.parts = None
+                    break
+
+    def format(self, default_: Optional[str] = None, **kwargs) -> str:
+        if self.parts is None:
+            return utils.format_string(self.string, default_, **kwargs)
+        result = []
+        for literal, field, spec, conversion in self.parts:
+            result.append(literal)
+            if field is None:
+                continue
+            try:
+                value, _ = self.formatter.get_field(field, (), kwargs)
+            except KeyError:
+                return ""
+            value = self.formatter.convert_field(value, conversion)
+            if value is None:
+                value = default_ or ""
+                spec = ''
+            result.append(format(value, spec))
+        return ''.join(result)
+
+
+class ElementPlan:
+    """
+    A report element with its class resolved and the names of the parameters its __init__ and render take.
+    Errors are raised when the element is rendered, like they would be without the plan.
+    """
+
+    def __init__(self, element: Union[dict, str]):
+        self.element_class: Optional[type[ReportElement]] = None
+        self.error: Optional[Exception] = None
+        self.params: dict[str, Any] = {}
+        try:
+            if isinstance(element, dict):
+                if 'params' in element:
+                    params = element['params']
+                    self.params = params.copy() if isinstance(params, dict) else {"params": params}
+                name = element.get('class', element.get('type'))
+                element_class = utils.str_to_class(element['class']) if 'class' in element else None
+                if not element_class and 'type' in element:
+                    element_class = getattr(sys.modules['core.report.elements'], element['type'])
+            elif isinstance(element, str):
+                name = element
+                element_class = getattr(sys.modules['core.report.elements'], element)
+            else:
+                raise UnknownReportElement(str(element))
+            if not element_class:
+                raise ClassNotFound(name)
+            if not issubclass(element_class, ReportElement):
+                raise UnknownReportElement(name)
+        except Exception as ex:
+            self.error = ex
+            return
+        self.element_class = element_class
+        # only parameters that are in the signature of __init__ and render are passed
+        self.init_args = frozenset(inspect.signature(element_class.__init__).parameters.keys())
+        self.render_args = frozenset(list(inspect.signature(element_class.render).parameters.keys())[1:])
+        self.is_async = inspect.iscoroutinefunction(element_class.render)
+
+    def bind(self, params: dict) -> tuple[dict, dict]:
+        args = params | self.params
+        return ({name: value for name, value in args.items() if name in self.init_args},
+                {name: value for name, value in args.items() if name in self.render_args})
+
+
+class ReportPlan:
+    """
+    Compiled report definition. Plans are cached by their path and compiled again if the file was changed.
+    """
+    _cache: dict[str, tuple[float, ReportPlan]] = {}
+
+    def __init__(self, report_def: dict):
+        self.report_def = report_def
+        self.templates = {
+            name: FormatTemplate(report_def[name])
+            for name in ['title', 'description', 'footer'] if name in report_def
+        }
+        self.elements = [ElementPlan(element) for element in report_def.get('elements', [])]
+
+    @classmethod
+    def load(cls, filename: str) -> ReportPlan:
+        mtime = os.path.getmtime(filename)
+        cached = cls._cache.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(filename) as file:
+            plan = cls(json.load(file))
+        cls._cache[filename] = (mtime, plan)
+        return plan
+
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import asyncio
+import io
+import math
+import matplotlib
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from configparser import ConfigParser
+from matplotlib import pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+
+# images are not downscaled any further to stay below the upload limit
+MIN_DPI = 30
+# style of all graph reports
+STYLE = ['dark_background', {'axes.facecolor': '#2C2F33'}]
+
+
+def init_worker() -> None:
+    matplotlib.use('agg')
+    plt.style.use(STYLE)
+
+
+def render_image(data: bytes, max_size: int, kwargs: dict) -> bytes:
+    # runs in the worker processes
+    figure: Figure = pickle.loads(data)
+    return savefig(figure, max_size, **kwargs)
+
+
+def savefig(figure: Figure, max_size: int = 0, **kwargs) -> bytes:
+    FigureCanvasAgg(figure)
+    dpi = kwargs.pop('dpi', figure.dpi)
+    while True:
+        buffer = io.BytesIO()
+        figure.savefig(buffer, dpi=dpi, **kwargs)
+        size = buffer.getbuffer().nbytes
+        if not max_size or size <= max_size or dpi <= MIN_DPI:
+            return buffer.getvalue()
+        # the size grows with the number of pixels, which is the square of the dpi
+        dpi = max(MIN_DPI, int(dpi * math.sqrt(max_size / size) * 0.9))
+
+
+class GraphRenderer:
+    """
+    Draws the figures of graph reports into images in a pool of worker processes (REPORTS/NUM_RENDERERS), so that
+    multiple reports can be drawn at the same time and the bot is not blocked by them.
+    The elements still fill the figure inside the bot, as they are plugin classes that work on their axes directly,
+    the finished figure is pickled and sent to a worker. Figures that can't be pickled are drawn in the bot's
+    executor instead.
+    """
+    _executor: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def init() -> None:
+        # to be called once on start-up, no graph is ever shown on screen and all graphs share the same style,
+        # so it is set once for the whole process like in the workers and never changed afterwards
+        init_worker()
+
+    @classmethod
+    def get_executor(cls, config: ConfigParser) -> Optional[ProcessPoolExecutor]:
+        workers = int(config['REPORTS']['NUM_RENDERERS'])
+        if not cls._executor and workers > 0:
+            cls._executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        return cls._executor
+
+    @classmethod
+    async def render(cls, bot: DCSServerBot, figure: Figure, max_size: int = 0, **kwargs) -> bytes:
+        """
+        Returns the figure as an image. kwargs are passed to savefig(). If max_size (bytes) is given, the image is
+        rendered again with a lower resolution until it fits.
+        """
+        loop = asyncio.get_running_loop()
+        executor = cls.get_executor(bot.config)
+        if executor:
+            try:
+                data = pickle.dumps(figure)
+                return await loop.run_in_executor(executor, render_image, data, max_size, kwargs)
+            except BrokenProcessPool:
+                bot.log.warning('Graph renderer crashed, restarting the worker processes.')
+                cls.shutdown()
+            except Exception as ex:
+                bot.log.debug(f'Figure could not be rendered in a worker process: {ex}')
+        return await loop.run_in_executor(bot.executor, lambda: savefig(figure, max_size, **kwargs))
+
+    @classmethod
+    def shutdown(cls) -> None:
+        if cls._executor:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
@@ -0,0 +1,42 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Awaitable, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot, Server
+
+
+class UpdateScheduler:
+    """
+    Coalesces the updates of persistent embeds. An embed is updated at most once every EMBED_UPDATE_INTERVAL
+    seconds per server, all updates that are requested in between are merged into one with the latest state.
+    """
+    # (server, embed) => the latest update that was requested
+    _pending: dict[tuple[str, str], Callable[[], Awaitable]] = {}
+    _tasks: dict[tuple[str, str], asyncio.Task] = {}
+    _last: dict[tuple[str, str], float] = {}
+
+    @classmethod
+    def schedule(cls, bot: DCSServerBot, server: Server, embed_name: str, update: Callable[[], Awaitable]) -> None:
+        key = (server.name, embed_name)
+        cls._pending[key] = update
+        if key not in cls._tasks:
+            cls._tasks[key] = bot.loop.create_task(cls._run(bot, key))
+
+    @classmethod
+    async def _run(cls, bot: DCSServerBot, key: tuple[str, str]) -> None:
+        interval = float(bot.config['BOT']['EMBED_UPDATE_INTERVAL'])
+        try:
+            while key in cls._pending:
+                wait = cls._last.get(key, 0) + interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                update = cls._pending.pop(key)
+                cls._last[key] = time.monotonic()
+                try:
+                    await update()
+                except Exception as ex:
+                    bot.log.exception(ex)
+        finally:
+            del cls._tasks[key]
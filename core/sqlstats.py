@@ -0,0 +1,198 @@
+from __future__ import annotations
+import logging
+import psycopg2
+import psycopg2.extensions
+import random
+import re
+import threading
+import time
+from collections import deque
+from configparser import ConfigParser
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from typing import Optional, Union
+from .statements import PreparedStatements
+
+# everything that can be EXPLAINed
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'VALUES', 'EXECUTE')
+
+
+def fingerprint(query: Union[str, bytes]) -> str:
+    """
+    Normalizes a statement, so that all executions of the same statement share one fingerprint, independent of
+    their parameters.
+    """
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', errors='replace')
+    # statements executed by the PreparedStatements are fingerprinted by their SQL
+    match = re.match(r'\s*EXECUTE\s+(\w+)', query, re.IGNORECASE)
+    if match:
+        query = PreparedStatements.lookup(match.group(1)) or query
+    return _normalize(query)
+
+
+@lru_cache(maxsize=1024)
+def _normalize(query: str) -> str:
+    # the same statements are executed over and over again, so they are only normalized once
+    query = re.sub(r"'(?:[^']|'')*'", '?', query)
+    query = re.sub(r'%\(\w+\)s|%s|\$\d+', '?', query)
+    query = re.sub(r'\b\d+(\.\d+)?\b', '?', query)
+    query = re.sub(r'\s+', ' ', query).strip()
+    # IN-lists and VALUES of any length
+    query = re.sub(r'\(\s*\?(\s*,\s*\?)*\s*\)', '(?)', query)
+    query = re.sub(r'\(\?\)(\s*,\s*\(\?\))+', '(?)', query)
+    return query
+
+
+class QueryStatistics:
+    """
+    Collects call counts, latencies and rows of all statements executed on connections of the bot's pool.
+    Statements that take longer than SLOW_QUERY_THRESHOLD are written to the slow query log, a sample of them
+    (SLOW_QUERY_EXPLAIN_RATE, off by default) together with their execution plan.
+    """
+    # number of latencies kept per statement to calculate the percentiles
+    SAMPLES = 1000
+
+    _stats: dict[str, dict] = {}
+    _lock = threading.Lock()
+    threshold: float = 0.5
+    explain_rate: float = 0
+    log: Optional[logging.Logger] = None
+
+    @classmethod
+    def configure(cls, config: ConfigParser) -> None:
+        cls.threshold = int(config['BOT']['SLOW_QUERY_THRESHOLD']) / 1000
+        cls.explain_rate = float(config['BOT']['SLOW_QUERY_EXPLAIN_RATE'])
+        cls.log = logging.getLogger(name='dcsserverbot.sql')
+        cls.log.propagate = False
+        cls.log.setLevel(logging.INFO)
+        if not cls.log.handlers:
+            fh = RotatingFileHandler('slowqueries.log', encoding='utf-8',
+                                     maxBytes=int(config['BOT']['LOGROTATE_SIZE']),
+                                     backupCount=int(config['BOT']['LOGROTATE_COUNT']))
+            fh.setFormatter(logging.Formatter(fmt=u'%(asctime)s.%(msecs)03d %(threadName)s\t%(message)s',
+                                              datefmt='%Y-%m-%d %H:%M:%S'))
+            cls.log.addHandler(fh)
+
+    @classmethod
+    def record(cls, key: str, duration: float, rows: int) -> None:
+        with cls._lock:
+            stats = cls._stats.get(key)
+            if not stats:
+                stats = cls._stats[key] = {
+                    "calls": 0, "time": 0.0, "max": 0.0, "rows": 0, "slow": 0, "latencies": deque(maxlen=cls.SAMPLES)
+                }
+            stats['calls'] += 1
+            stats['time'] += duration
+            stats['max'] = max(stats['max'], duration)
+            stats['rows'] += max(rows, 0)
+            stats['latencies'].append(duration)
+            if duration >= cls.threshold:
+                stats['slow'] += 1
+
+    @classmethod
+    def top(cls, num: int = 10) -> list[dict]:
+        """
+        Returns the statements that took the most time in total, including their percentiles (in seconds).
+        """
+        result = []
+        with cls._lock:
+            for key, stats in cls._stats.items():
+                latencies = sorted(stats['latencies'])
+                result.append({
+                    "statement": key,
+                    "calls": stats['calls'],
+                    "time": stats['time'],
+                    "max": stats['max'],
+                    "rows": stats['rows'] / stats['calls'],
+                    "slow": stats['slow'],
+                    "p50": latencies[int(len(latencies) * 0.50)],
+                    "p95": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+                    "p99": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+                })
+        result.sort(key=lambda x: x['time'], reverse=True)
+        return result[:num] if num else result
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._stats.clear()
+
+    @classmethod
+    def slow_query(cls, cursor: psycopg2.extensions.cursor, query: Union[str, bytes], duration: float) -> None:
+        if not cls.log:
+            return
+        if isinstance(query, bytes):
+            query = query.decode('utf-8', errors='replace')
+        message = f'{duration * 1000:.0f} ms: {query}'
+        if cls.explain_rate and random.random() < cls.explain_rate:
+            plan = cls.explain(cursor, query)
+            if plan:
+                message += '\n' + plan
+        cls.log.info(message)
+
+    @staticmethod
+    def explain(cursor: psycopg2.extensions.cursor, query: str) -> Optional[str]:
+        conn = cursor.connection
+        if conn.autocommit or not query.lstrip().upper().startswith(EXPLAINABLE) or \
+                conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_INTRANS:
+            return None
+        # a plain cursor, so the EXPLAIN does not end up in the statistics itself
+        with psycopg2.extensions.cursor(conn) as explain:
+            # no ANALYZE, as that would run the statement a second time, the savepoint keeps the transaction of the
+            # caller intact, if the EXPLAIN fails
+            explain.execute('SAVEPOINT dcsbot_explain')
+            try:
+                explain.execute('EXPLAIN ' + query)
+                return '\n'.join(row[0] for row in explain.fetchall())
+            except psycopg2.DatabaseError as error:
+                return f'EXPLAIN failed: {error}'
+            finally:
+                explain.execute('ROLLBACK TO SAVEPOINT dcsbot_explain')
+                explain.execute('RELEASE SAVEPOINT dcsbot_explain')
+
+
+class InstrumentedCursor:
+    """
+    Mixin for all cursor classes that times every execution and hands it over to the QueryStatistics.
+    """
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(query, vars, time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(query, None, time.perf_counter() - start)
+
+    def _record(self, query, vars, duration: float) -> None:
+        try:
+            QueryStatistics.record(fingerprint(query), duration, self.rowcount)
+            if duration >= QueryStatistics.threshold:
+                QueryStatistics.slow_query(self, self.mogrify(query, vars) if vars else query, duration)
+        except Exception as ex:
+            logging.getLogger(name='dcsserverbot').exception(ex)
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """
+    Connection class for the pool (connection_factory), that hands out instrumented cursors for every cursor_factory
+    that is being used.
+    """
+    _cursor_classes: dict[type, type] = {}
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        if not issubclass(factory, InstrumentedCursor):
+            instrumented = self._cursor_classes.get(factory)
+            if not instrumented:
+                instrumented = type(f'Instrumented{factory.__name__}', (InstrumentedCursor, factory), {})
+                self._cursor_classes[factory] = instrumented
+            kwargs['cursor_factory'] = instrumented
+        return super().cursor(*args, **kwargs)
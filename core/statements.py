@@ -0,0 +1,70 @@
+from __future__ import annotations
+import itertools
+import re
+import threading
+import weakref
+from typing import Optional, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from psycopg2.extensions import cursor as Cursor
+
+
+class PreparedStatements:
+    """
+    Registry of named SQL statements that are executed as server-side prepared statements.
+    Statements are declared once with the usual %s placeholders and are prepared lazily on every pooled connection
+    the first time they are executed on it, so Postgres does not need to parse and plan them again.
+    """
+    # statement name => (name of the prepared statement, SQL with $n placeholders, number of parameters)
+    _statements = dict[str, tuple[str, str, int]]()
+    # connection => names of the statements that are prepared on it already
+    _prepared = weakref.WeakKeyDictionary()
+    _lock = threading.Lock()
+    _ids = itertools.count(1)
+
+    @staticmethod
+    def _convert(sql: str) -> tuple[str, int]:
+        if re.search(r'%\(\w+\)s', sql):
+            raise ValueError('Named parameters are not supported in prepared statements.')
+        num = 0
+
+        def replace(match: re.Match) -> str:
+            nonlocal num
+            if match.group(0) == '%%':
+                return '%'
+            num += 1
+            return f'${num}'
+
+        return re.sub(r'%%|%s', replace, sql), num
+
+    @classmethod
+    def register(cls, name: str, sql: str) -> None:
+        query, num = cls._convert(sql)
+        with cls._lock:
+            # reloading a plugin registers its statements again, a changed statement gets prepared under a new name
+            if name not in cls._statements or cls._statements[name][1] != query:
+                cls._statements[name] = (f'dcsbot_{next(cls._ids)}', query, num)
+
+    @classmethod
+    def lookup(cls, statement: str) -> Optional[str]:
+        # returns the SQL of a prepared statement by its name in the database
+        for name, query, _ in cls._statements.values():
+            if name == statement:
+                return query
+        return None
+
+    @classmethod
+    def execute(cls, cursor: Cursor, name: str, params: Optional[Union[tuple, list]] = None) -> None:
+        statement, query, num = cls._statements[name]
+        params = tuple(params or ())
+        if len(params) != num:
+            raise ValueError(f'Statement "{name}" expects {num} parameters, {len(params)} given.')
+        with cls._lock:
+            prepared = cls._prepared.setdefault(cursor.connection, set())
+        if statement not in prepared:
+            cursor.execute(f'PREPARE {statement} AS {query}')
+            prepared.add(statement)
+        if num:
+            cursor.execute(f"EXECUTE {statement} ({', '.join(['%s'] * num)})", params)
+        else:
+            cursor.execute(f'EXECUTE {statement}')
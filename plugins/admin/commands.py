@@ -20,6 +20,7 @@ from pathlib import Path
 from typing import Union, List, Optional
 from zipfile import ZipFile
 from .listener import AdminEventListener
+from .prune import PruneEngine
 
 
 STATUS_EMOJI = {
@@ -567,6 +568,15 @@ class Agent(Plugin):
 
 class Master(Agent):
 
+    def __init__(self, bot, listener):
+        super().__init__(bot, listener)
+        self.prune_engine = PruneEngine(bot)
+
+    async def cog_unload(self):
+        if self.prune_engine.is_running():
+            self.prune_engine.task.cancel()
+        await super().cog_unload()
+
     class CleanupView(View):
         def __init__(self, ctx: commands.Context):
             super().__init__()
@@ -616,6 +626,9 @@ class Master(Agent):
     @utils.has_role('Admin')
     @commands.guild_only()
     async def cleanup(self, ctx):
+        if self.prune_engine.is_running():
+            await ctx.send('A prune is running already, please wait until it has finished.')
+            return
         embed = discord.Embed(title=":warning: Database Prune :warning:")
         embed.description = "You are going to delete data from your database. Be advised.\n\n" \
                             "Please select the data to be pruned:"
@@ -627,41 +640,60 @@ class Master(Agent):
             await ctx.send('Aborted.')
             return
 
-        conn = self.pool.getconn()
-        try:
-            with closing(conn.cursor()) as cursor:
-                if view.what in ['users', 'non-members']:
-                    sql = f"SELECT ucid FROM players WHERE last_seen < (DATE(NOW()) - interval '{view.age} days')"
-                    if view.what == 'non-members':
-                        sql += ' AND discord_id = -1'
-
+        if view.what in ['users', 'non-members']:
+            sql = f"SELECT ucid FROM players WHERE last_seen < (DATE(NOW()) - interval '{view.age} days')"
+            if view.what == 'non-members':
+                sql += ' AND discord_id = -1'
+            conn = self.pool.getconn()
+            try:
+                with closing(conn.cursor()) as cursor:
                     cursor.execute(sql)
                     ucids = [row[0] for row in cursor.fetchall()]
-                    if not ucids:
-                        await ctx.send('No players to prune.')
-                        return
-                    if not await utils.yn_question(ctx, f"This will delete {len(ucids)} players incl. their stats "
-                                                        f"from the database.\nAre you sure?"):
-                        return
-                    for plugin in self.bot.cogs.values():  # type: Plugin
-                        await plugin.prune(conn, ucids=ucids)
-                    for ucid in ucids:
-                        cursor.execute('DELETE FROM players WHERE ucid = %s', (ucid, ))
-                    await ctx.send(f"{len(ucids)} players pruned.")
-                elif view.what == 'data':
-                    days = int(view.age)
-                    if not await utils.yn_question(ctx, f"This will delete all data older than {days} days from the "
-                                                        f"database.\nAre you sure?"):
-                        return
-                    for plugin in self.bot.cogs.values():  # type: Plugin
-                        await plugin.prune(conn, days=days)
-                    await ctx.send(f"All data older than {days} days pruned.")
-            conn.commit()
-        except (Exception, psycopg2.DatabaseError) as error:
-            conn.rollback()
-            self.bot.log.exception(error)
-        finally:
-            self.bot.pool.putconn(conn)
+            except (Exception, psycopg2.DatabaseError) as error:
+                self.log.exception(error)
+                return
+            finally:
+                self.pool.putconn(conn)
+            if not ucids:
+                await ctx.send('No players to prune.')
+                return
+            if not await utils.yn_question(ctx, f"This will delete {len(ucids)} players incl. their stats "
+                                                f"from the database.\nAre you sure?"):
+                return
+            job = self.prune_players(ctx, ucids)
+        elif view.what == 'data':
+            days = int(view.age)
+            if not await utils.yn_question(ctx, f"This will delete all data older than {days} days from the "
+                                                f"database.\nAre you sure?"):
+                return
+            job = self.prune_data(ctx, days)
+        else:
+            return
+        if self.prune_engine.is_running():
+            job.close()
+            await ctx.send('A prune is running already, please wait until it has finished.')
+            return
+        self.prune_engine.start(job)
+
+    async def prune_players(self, ctx, ucids: list[str]):
+        msg = await ctx.send(f'Pruning {len(ucids)} players ...')
+
+        async def progress(text: str):
+            await msg.edit(content=text)
+
+        deleted = await self.prune_engine.prune_players(ucids, progress)
+        await msg.edit(content=f"{len(ucids)} players pruned.\n" +
+                               '\n'.join(f'- {table}: {rows} rows' for table, rows in deleted.items() if rows))
+        await self.bot.audit(f'pruned {len(ucids)} players from the database', user=ctx.message.author)
+
+    async def prune_data(self, ctx, days: int):
+        msg = await ctx.send(f'Pruning all data older than {days} days ...')
+
+        async def progress(text: str):
+            await msg.edit(content=text)
+
+        await self.prune_engine.prune_data(days, progress)
+        await msg.edit(content=f"All data older than {days} days pruned.")
         await self.bot.audit(f'pruned the database', user=ctx.message.author)
 
     @commands.command(description='Bans a user by ucid or discord id', usage='<member|ucid> [reason]')
@@ -778,6 +810,8 @@ class Master(Agent):
                 self.bot.log.debug(f'- Delete stats of member {member.display_name}')
                 cursor.execute('DELETE FROM statistics WHERE player_ucid IN (SELECT ucid FROM players WHERE '
                                'discord_id = %s)', (member.id, ))
+                cursor.execute('DELETE FROM statistics_daily WHERE player_ucid IN (SELECT ucid FROM players WHERE '
+                               'discord_id = %s)', (member.id, ))
                 conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.bot.log.exception(error)
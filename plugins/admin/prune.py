@@ -0,0 +1,94 @@
+from __future__ import annotations
+import asyncio
+import inspect
+import psycopg2
+from contextlib import closing
+from core import DCSServerBot, Plugin, ReportCache
+from typing import Awaitable, Callable, Optional
+
+Progress = Callable[[str], Awaitable[None]]
+
+
+class PruneEngine:
+    """
+    Prunes the database in the background. Players are deleted in batches, each table in its own short transaction,
+    so that the tables are not locked for long. The tables to be pruned are registered by the plugins
+    (Plugin.prune_tables).
+    """
+
+    def __init__(self, bot: DCSServerBot):
+        self.bot = bot
+        self.log = bot.log
+        self.pool = bot.pool
+        self.batch_size = int(bot.config['BOT']['PRUNE_BATCH_SIZE'])
+        self.delay = float(bot.config['BOT']['PRUNE_BATCH_DELAY'])
+        self.task: Optional[asyncio.Task] = None
+
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def get_plan(self) -> list[tuple[str, str]]:
+        plan = []
+        for plugin in self.bot.cogs.values():  # type: Plugin
+            if isinstance(plugin, Plugin):
+                plan.extend(plugin.prune_tables.items())
+        # players have to be deleted last
+        plan.append(('players', 'ucid'))
+        return plan
+
+    @staticmethod
+    def _delete(conn, table: str, column: str, ucids: list[str]) -> int:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE {column} = ANY(%s)', (ucids, ))
+            return cursor.rowcount
+
+    async def _plugin_prune(self, plugin: Plugin, **kwargs) -> None:
+        try:
+            # plugins that were written against the former async API are still awaited on the loop
+            if inspect.iscoroutinefunction(plugin.prune):
+                conn = self.pool.getconn()
+                try:
+                    await plugin.prune(conn, **kwargs)
+                    conn.commit()
+                except (Exception, psycopg2.DatabaseError):
+                    conn.rollback()
+                    raise
+                finally:
+                    self.pool.putconn(conn)
+            else:
+                await self.bot.run_sync_db(lambda conn: plugin.prune(conn, **kwargs))
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+
+    async def prune_players(self, ucids: list[str], progress: Progress) -> dict[str, int]:
+        plan = self.get_plan()
+        deleted = {table: 0 for table, _ in plan}
+        for i in range(0, len(ucids), self.batch_size):
+            batch = ucids[i:i + self.batch_size]
+            # plugins that prune more than their registered tables
+            for plugin in list(self.bot.cogs.values()):  # type: Plugin
+                if isinstance(plugin, Plugin):
+                    await self._plugin_prune(plugin, ucids=batch)
+            for table, column in plan:
+                deleted[table] += await self.bot.run_sync_db(self._delete, table, column, batch)
+            await progress(f'{min(i + self.batch_size, len(ucids))} / {len(ucids)} players pruned ...')
+            await asyncio.sleep(self.delay)
+        ReportCache.invalidate()
+        return deleted
+
+    async def prune_data(self, days: int, progress: Progress) -> None:
+        plugins = [plugin for plugin in self.bot.cogs.values() if isinstance(plugin, Plugin)]
+        for i, plugin in enumerate(plugins, start=1):
+            await self._plugin_prune(plugin, days=days)
+            await progress(f'{i} / {len(plugins)} plugins pruned ...')
+            await asyncio.sleep(self.delay)
+        ReportCache.invalidate()
+
+    def start(self, job: Awaitable) -> None:
+        async def run():
+            try:
+                await job
+            except Exception as ex:
+                self.log.exception(ex)
+
+        self.task = asyncio.create_task(run())
@@ -216,7 +216,7 @@ class GameMasterMaster(GameMasterAgent):
         if version == '1.3':
             self.log.warning('  => Coalition system has been updated. All player coalitions have been reset!')
 
-    async def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
+    def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
         self.log.debug('Pruning Gamemaster ...')
         with closing(conn.cursor()) as cursor:
             if days > 0:
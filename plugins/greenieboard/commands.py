@@ -15,6 +15,7 @@ from .listener import GreenieBoardEventListener
 
 
 class GreenieBoard(Plugin):
+    prune_tables = {'greenieboard': 'player_ucid'}
 
     def migrate(self, version: str):
         if version != '1.3':
@@ -33,13 +34,10 @@ class GreenieBoard(Plugin):
                 json.dump(old, outfile, indent=2)
                 self.log.info('  => config/greenieboard.json migrated to new format, please verify!')
 
-    async def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
+    def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
         self.log.debug('Pruning Greenieboard ...')
         with closing(conn.cursor()) as cursor:
-            if ucids:
-                for ucid in ucids:
-                    cursor.execute('DELETE FROM greenieboard WHERE player_ucid = %s', (ucid,))
-            elif days > 0:
+            if days > 0:
                 cursor.execute(f"DELETE FROM greenieboard WHERE time < (DATE(NOW()) - interval '{days} days')")
         self.log.debug('Greenieboard pruned.')
 
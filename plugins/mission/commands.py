@@ -42,7 +42,7 @@ class Mission(Plugin):
         finally:
             self.pool.putconn(conn)
 
-    async def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
+    def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
         self.log.debug('Pruning Mission ...')
         with closing(conn.cursor()) as cursor:
             if days > 0:
@@ -148,22 +148,39 @@ class Mission(Plugin):
     @commands.guild_only()
     async def atis(self, ctx, *args):
         name = ' '.join(args)
+        servers: list[Server] = []
+        airbases: list[dict] = []
         for server_name, server in self.bot.servers.items():
             if server.status not in [Status.RUNNING, Status.PAUSED]:
                 continue
             for airbase in server.current_mission.airbases:
                 if (name.casefold() in airbase['name'].casefold()) or (name.upper() == airbase['code']):
-                    data = await server.sendtoDCSSync({
-                        "command": "getWeatherInfo",
-                        "x": airbase['position']['x'],
-                        "y": airbase['position']['y'],
-                        "z": airbase['position']['z']
-                    })
-                    report = Report(self.bot, self.plugin_name, 'atis.json')
-                    env = await report.render(airbase=airbase, data=data)
-                    timeout = int(self.bot.config['BOT']['MESSAGE_AUTODELETE'])
-                    await ctx.send(embed=env.embed, delete_after=timeout if timeout > 0 else None)
+                    servers.append(server)
+                    airbases.append(airbase)
                     break
+        # query the weather of all matching servers at once
+        responses = await asyncio.gather(*[server.sendtoDCSSync({
+            "command": "getWeatherInfo",
+            "x": airbase['position']['x'],
+            "y": airbase['position']['y'],
+            "z": airbase['position']['z']
+        }) for server, airbase in zip(servers, airbases)], return_exceptions=True)
+        timeout = int(self.bot.config['BOT']['MESSAGE_AUTODELETE'])
+        failed: list[str] = []
+        for server, airbase, data in zip(servers, airbases, responses):
+            if isinstance(data, Exception):
+                if isinstance(data, asyncio.TimeoutError):
+                    self.log.warning(f'Server {server.name} did not answer the weather request for {airbase["name"]}.')
+                else:
+                    self.log.exception(data, exc_info=data)
+                failed.append(server.name)
+                continue
+            report = Report(self.bot, self.plugin_name, 'atis.json')
+            env = await report.render(airbase=airbase, data=data)
+            await ctx.send(embed=env.embed, delete_after=timeout if timeout > 0 else None)
+        if failed:
+            await ctx.send('No weather information received from server(s) {}.'.format(', '.join(failed)),
+                           delete_after=timeout if timeout > 0 else None)
 
     @commands.command(description='List the current players on this server')
     @utils.has_role('DCS')
@@ -351,10 +368,14 @@ class Mission(Plugin):
             return
         if server.status in [Status.RUNNING, Status.PAUSED, Status.STOPPED]:
             if len(filename) == 0:
-                data = await server.sendtoDCSSync({"command": "listMissions"})
-                installed = [mission[(mission.rfind('\\') + 1):] for mission in data['missionList']]
-                data = await server.sendtoDCSSync({"command": "listMizFiles"})
-                available = data['missions']
+                responses = await server.sendtoDCSSyncBatch([
+                    {"command": "listMissions"}, {"command": "listMizFiles"}
+                ])
+                for response in responses:
+                    if isinstance(response, Exception):
+                        raise response
+                installed = [mission[(mission.rfind('\\') + 1):] for mission in responses[0]['missionList']]
+                available = responses[1]['missions']
                 files: list = list(set(available) - set(installed))
                 if len(files) == 0:
                     await ctx.send('No (new) mission found to add.')
@@ -472,6 +493,7 @@ class Mission(Plugin):
                                                     f"dcs.{timestamp}.log\nIf the scheduler is configured for this "
                                                     f"server, it will relaunch it automatically.")
 
+        servers: list[Server] = []
         for server_name, server in self.bot.servers.items():
             if server.status in [Status.UNREGISTERED, Status.SHUTDOWN]:
                 continue
@@ -480,10 +502,15 @@ class Mission(Plugin):
                     server.status = Status.SHUTDOWN
                     server.process = None
                 continue
+            servers.append(server)
+        # we set a longer timeout in here because, we don't want to risk false restarts
+        timeout = 20 if self.bot.config.getboolean('BOT', 'SLOW_SYSTEM') else 10
+        # poll all servers at once, so that one hung server does not delay the others
+        responses = await self.bot.sendtoDCSSyncAll(servers, {"command": "getMissionUpdate"}, timeout)
+        for server, data in zip(servers, responses):
             try:
-                # we set a longer timeout in here because, we don't want to risk false restarts
-                timeout = 20 if self.bot.config.getboolean('BOT', 'SLOW_SYSTEM') else 10
-                data = await server.sendtoDCSSync({"command": "getMissionUpdate"}, timeout)
+                if isinstance(data, Exception):
+                    raise data
                 # remove any hung flag, if the server has responded
                 if server.name in self.hung:
                     del self.hung[server.name]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import asyncio
+import psycopg2
 from core import utils, EventListener, PersistentReport, Plugin, Report, Status, Side, Mission, Player, Coalition, \
     Channel, DataObjectFactory
 from typing import TYPE_CHECKING
@@ -88,7 +89,7 @@ class MissionEventListener(EventListener):
             players = server.get_active_players()
             num_players = len(players) + 1
             report = PersistentReport(self.bot, self.plugin_name, 'serverStatus.json', server, 'mission_embed')
-            self.bot.loop.call_soon(asyncio.create_task, report.render(server=server, num_players=num_players))
+            report.schedule(server=server, num_players=num_players)
         except Exception as ex:
             self.log.exception(ex)
 
@@ -96,8 +97,7 @@ class MissionEventListener(EventListener):
     def _display_player_embed(self, server: Server):
         if not self.bot.config.getboolean(server.installation, 'COALITIONS'):
             report = PersistentReport(self.bot, self.plugin_name, 'players.json', server, 'players_embed')
-            self.bot.loop.call_soon(asyncio.create_task,
-                                    report.render(server=server, sides=[Coalition.BLUE, Coalition.RED]))
+            report.schedule(server=server, sides=[Coalition.BLUE, Coalition.RED])
 
     async def callback(self, data):
         server: Server = self.bot.servers[data['server_name']]
@@ -124,15 +124,21 @@ class MissionEventListener(EventListener):
         if 'players' not in data:
             data['players'] = []
             server.status = Status.STOPPED
-        for p in data['players']:
-            if p['id'] == 1:
-                continue
+        players = [p for p in data['players'] if p['id'] != 1]
+        # load all players with one query instead of one per player
+        try:
+            rows = await self.bot.run_sync_db(Player.prefetch, players)
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            rows = {}
+        for p in players:
             player: Player = DataObjectFactory().new(Player.__name__, bot=self.bot, server=server, id=p['id'],
                                                      name=p['name'], active=p['active'], side=Side(p['side']),
                                                      ucid=p['ucid'], slot=int(p['slot']), sub_slot=p['sub_slot'],
                                                      unit_callsign=p['unit_callsign'], unit_name=p['unit_name'],
                                                      unit_type=p['unit_type'], group_id=p['group_id'],
-                                                     group_name=p['group_name'], banned=False)
+                                                     group_name=p['group_name'], banned=False,
+                                                     _prefetched=rows.get(p['ucid']))
             server.add_player(player)
         self._display_mission_embed(server)
         self._display_player_embed(server)
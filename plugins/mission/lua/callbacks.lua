@@ -32,6 +32,7 @@ function mission.onMissionLoadEnd()
     log.write('DCSServerBot', log.DEBUG, 'Mission: onMissionLoadEnd()')
     net.dostring_in('mission', 'a_do_script("dofile(\\"' .. lfs.writedir():gsub('\\', '/') .. 'Scripts/net/DCSServerBot/DCSServerBot.lua' .. '\\")")')
     net.dostring_in('mission', 'a_do_script("dofile(\\"' .. lfs.writedir():gsub('\\', '/') .. 'Scripts/net/DCSServerBot/mission/mission.lua' .. '\\")")')
+    net.dostring_in('mission', 'a_do_script("dcsbot.encoding = \\"' .. utils.encoding .. '\\"")')
     local msg = {}
     msg.command = 'onMissionLoadEnd'
     msg.filename = DCS.getMissionFilename()
@@ -34,6 +34,8 @@ function dcsbot.registerDCSServer(json)
 		msg.statistics = true
 	end
 	msg.options = DCS.getUserOptions()
+	-- wire encodings supported by this hook
+	msg.encodings = {'json', 'msgpack'}
     -- airbases
     msg.airbases = {}
     local airdromes = Terrain.GetTerrainConfig("Airdromes")
@@ -156,6 +158,15 @@ function dcsbot.registerDCSServer(json)
     dcsbot.registered = true
 end
 
+function dcsbot.setEncoding(json)
+    log.write('DCSServerBot', log.DEBUG, 'Mission: setEncoding(' .. json.encoding .. ')')
+    utils.encoding = json.encoding
+    -- the mission environment sends its own messages, so it needs to know the encoding, too
+    if DCS.getCurrentMission() then
+        net.dostring_in('mission', 'a_do_script("if dcsbot then dcsbot.encoding = \\"' .. json.encoding .. '\\" end")')
+    end
+end
+
 function dcsbot.getMissionDetails(json)
     log.write('DCSServerBot', log.DEBUG, 'Mission: getMissionDetails()')
 	local msg = {}
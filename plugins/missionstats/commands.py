@@ -1,15 +1,22 @@
 import discord
 import psycopg2
 from contextlib import closing
-from core import DCSServerBot, Plugin, PluginRequiredError, utils, Report, PaginationReport, Status, Server
-from discord.ext import commands
+from core import DCSServerBot, Plugin, PluginRequiredError, utils, Report, PaginationReport, Status, Server, \
+    TEventListener
+from discord.ext import commands, tasks
 from plugins.userstats.commands import parse_params
 from plugins.userstats.filter import StatisticsFilter, MissionStatisticsFilter
-from typing import Optional, Union
+from typing import Optional, Union, Type
 from .listener import MissionStatisticsEventListener
 
 
 class MissionStatisticsAgent(Plugin):
+
+    async def cog_unload(self):
+        # write the remaining events before shutting down
+        await self.eventlistener.flush_all()
+        await super().cog_unload()
+
     @commands.command(description='Display Mission Statistics')
     @utils.has_role('DCS')
     @commands.guild_only()
@@ -31,17 +38,38 @@ class MissionStatisticsAgent(Plugin):
 
 
 class MissionStatisticsMaster(MissionStatisticsAgent):
+    prune_tables = {'missionstats': 'init_id'}
+
+    def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
+        super().__init__(bot, eventlistener)
+        self.partitions.start()
 
-    async def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
+    async def cog_unload(self):
+        self.partitions.cancel()
+        await super().cog_unload()
+
+    def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
         self.log.debug('Pruning Missionstats ...')
         with closing(conn.cursor()) as cursor:
-            if ucids:
-                for ucid in ucids:
-                    cursor.execute('DELETE FROM missionstats WHERE init_id = %s', (ucid,))
-            elif days > 0:
-                cursor.execute(f"DELETE FROM missionstats WHERE time < (DATE(NOW()) - interval '{days} days')")
+            if days > 0:
+                # drop all monthly partitions that are completely outdated and the outdated rows of the default one
+                cursor.execute(f"SELECT drop_time_partitions('missionstats', (DATE(NOW()) - interval '{days} days'))")
         self.log.debug('Missionstats pruned.')
 
+    @tasks.loop(hours=12.0)
+    async def partitions(self):
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute("SELECT create_time_partitions('missionstats', NOW()::TIMESTAMP, "
+                               "(NOW() + interval '3 months')::TIMESTAMP)")
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
+            self.log.exception(error)
+        finally:
+            self.pool.putconn(conn)
+
     @commands.command(description='Display statistics about sorties', usage='[user] [period]')
     @utils.has_role('DCS')
     @commands.guild_only()
@@ -1,3 +1,5 @@
-CREATE TABLE IF NOT EXISTS missionstats (id SERIAL PRIMARY KEY, mission_id INTEGER NOT NULL, event TEXT NOT NULL, init_id TEXT, init_side TEXT, init_type TEXT, init_cat TEXT, target_id TEXT, target_side TEXT, target_type TEXT, target_cat TEXT, weapon TEXT, place TEXT, comment TEXT, time TIMESTAMP NOT NULL DEFAULT NOW());
+CREATE TABLE IF NOT EXISTS missionstats (id SERIAL, mission_id INTEGER NOT NULL, event TEXT NOT NULL, init_id TEXT, init_side TEXT, init_type TEXT, init_cat TEXT, target_id TEXT, target_side TEXT, target_type TEXT, target_cat TEXT, weapon TEXT, place TEXT, comment TEXT, time TIMESTAMP NOT NULL DEFAULT NOW(), PRIMARY KEY (id, time)) PARTITION BY RANGE (time);
+CREATE TABLE IF NOT EXISTS missionstats_default PARTITION OF missionstats DEFAULT;
+SELECT create_time_partitions('missionstats', NOW()::TIMESTAMP, (NOW() + INTERVAL '3 months')::TIMESTAMP);
 CREATE INDEX IF NOT EXISTS idx_missionstats_init_id ON missionstats(init_id);
 CREATE INDEX IF NOT EXISTS idx_missionstats_target_id ON missionstats(target_id);
@@ -0,0 +1,12 @@
+DROP INDEX IF EXISTS idx_missionstats_init_id;
+DROP INDEX IF EXISTS idx_missionstats_target_id;
+ALTER TABLE missionstats RENAME TO missionstats_old;
+ALTER SEQUENCE missionstats_id_seq OWNED BY NONE;
+CREATE TABLE missionstats (id INTEGER NOT NULL DEFAULT NEXTVAL('missionstats_id_seq'), mission_id INTEGER NOT NULL, event TEXT NOT NULL, init_id TEXT, init_side TEXT, init_type TEXT, init_cat TEXT, target_id TEXT, target_side TEXT, target_type TEXT, target_cat TEXT, weapon TEXT, place TEXT, comment TEXT, time TIMESTAMP NOT NULL DEFAULT NOW(), PRIMARY KEY (id, time)) PARTITION BY RANGE (time);
+ALTER SEQUENCE missionstats_id_seq OWNED BY missionstats.id;
+CREATE TABLE IF NOT EXISTS missionstats_default PARTITION OF missionstats DEFAULT;
+SELECT create_time_partitions('missionstats', COALESCE((SELECT MIN(time) FROM missionstats_old), NOW()::TIMESTAMP), (NOW() + INTERVAL '3 months')::TIMESTAMP);
+INSERT INTO missionstats (id, mission_id, event, init_id, init_side, init_type, init_cat, target_id, target_side, target_type, target_cat, weapon, place, comment, time) SELECT id, mission_id, event, init_id, init_side, init_type, init_cat, target_id, target_side, target_type, target_cat, weapon, place, comment, time FROM missionstats_old;
+DROP TABLE missionstats_old;
+CREATE INDEX IF NOT EXISTS idx_missionstats_init_id ON missionstats(init_id);
+CREATE INDEX IF NOT EXISTS idx_missionstats_target_id ON missionstats(target_id);
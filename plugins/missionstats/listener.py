@@ -1,10 +1,13 @@
 import asyncio
-import psycopg2
-from contextlib import closing
+import psycopg
+from collections import deque
 from core import EventListener, Plugin, PersistentReport, Status, Server, Coalition, Channel
+from datetime import datetime
 
 
 class MissionStatisticsEventListener(EventListener):
+    # mission events don't depend on each other
+    ordered = False
 
     COALITION = {
         0: Coalition.NEUTRAL,
@@ -33,8 +36,24 @@ class MissionStatisticsEventListener(EventListener):
         }
     }
 
+    # events are written to the database in batches of BATCH_SIZE rows or after BATCH_TIMEOUT seconds
+    BATCH_SIZE = 500
+    BATCH_TIMEOUT = 1.0
+    # maximum number of events to keep per server, if the database is not available
+    MAX_BUFFER = 10000
+    # log the traceback of a failing flush only every LOG_ERRORS tries
+    LOG_ERRORS = 60
+
+    SQL_COPY = 'COPY missionstats (mission_id, event, init_id, init_side, init_type, init_cat, target_id, ' \
+               'target_side, target_type, target_cat, weapon, place, comment, time) FROM STDIN'
+
     def __init__(self, plugin: Plugin):
         super().__init__(plugin)
+        self.buffer: dict[str, deque[tuple]] = {}
+        self.timers: dict[str, asyncio.TimerHandle] = {}
+        self.tasks: set[asyncio.Task] = set()
+        self.errors: dict[str, int] = {}
+        self.dropped = 0
         if not self.bot.mission_stats:
             self.bot.mission_stats = dict()
         if 'EVENT_FILTER' in self.bot.config['FILTER']:
@@ -60,8 +79,12 @@ class MissionStatisticsEventListener(EventListener):
             self._toggle_mission_stats(data)
 
     async def onMissionLoadEnd(self, data):
+        await self.flush(data['server_name'])
         self._toggle_mission_stats(data)
 
+    async def onSimulationStop(self, data):
+        await self.flush(data['server_name'])
+
     def _display_mission_stats(self, data):
         server: Server = self.bot.servers[data['server_name']]
         # Hide the mission statistics embed, if coalitions are enabled
@@ -70,61 +93,110 @@ class MissionStatisticsEventListener(EventListener):
             stats = self.bot.mission_stats[data['server_name']]
             if 'coalitions' in stats:
                 report = PersistentReport(self.bot, self.plugin_name, 'missionstats.json', server, 'stats_embed')
-                self.bot.loop.call_soon(asyncio.create_task, report.render(stats=stats,
-                                                                           mission_id=server.mission_id,
-                                                                           sides=[Coalition.BLUE, Coalition.RED]))
+                report.schedule(stats=stats, mission_id=server.mission_id, sides=[Coalition.BLUE, Coalition.RED])
 
-    def _update_database(self, data):
+    async def _update_database(self, data):
         if data['eventName'] in self.filter:
             return
-        conn = self.pool.getconn()
+        server: Server = self.bot.servers[data['server_name']]
+
+        def get_value(values: dict, index1, index2):
+            if index1 not in values:
+                return None
+            if index2 not in values[index1]:
+                return None
+            return values[index1][index2]
+
+        player = get_value(data, 'initiator', 'name')
+        init_player = server.get_player(name=player) if player else None
+        player = get_value(data, 'target', 'name')
+        target_player = server.get_player(name=player) if player else None
+        if self.bot.config.getboolean(server.installation, 'PERSIST_AI_STATISTICS') or init_player or \
+                target_player:
+            self._add_row(server.name, (
+                server.mission_id,
+                data['eventName'],
+                init_player.ucid if init_player else -1,
+                get_value(data, 'initiator', 'coalition'),
+                get_value(data, 'initiator', 'unit_type'),
+                self.UNIT_CATEGORY[get_value(data, 'initiator', 'category')],
+                target_player.ucid if target_player else -1,
+                get_value(data, 'target', 'coalition'),
+                get_value(data, 'target', 'unit_type'),
+                self.UNIT_CATEGORY[get_value(data, 'target', 'category')],
+                get_value(data, 'weapon', 'name'),
+                get_value(data, 'place', 'name'),
+                data['comment'] if 'comment' in data else '',
+                # the time of the event, not the time of the flush
+                datetime.now()
+            ))
+            if len(self.buffer[server.name]) >= self.BATCH_SIZE:
+                await self.flush(server.name)
+
+    def _add_row(self, server_name: str, row: tuple) -> None:
+        rows = self.buffer.get(server_name)
+        if rows is None:
+            rows = self.buffer[server_name] = deque(maxlen=self.MAX_BUFFER)
+        if len(rows) == rows.maxlen:
+            # the deque drops the oldest event
+            self._drop(server_name, 1)
+        rows.append(row)
+        self._schedule_flush(server_name)
+
+    def _drop(self, server_name: str, count: int) -> None:
+        before = self.dropped
+        self.dropped += count
+        if self.dropped // 1000 > before // 1000 or before == 0:
+            self.log.warning(f'Mission statistics buffer for server {server_name} is full, {self.dropped} '
+                             f'events dropped so far.')
+
+    def _schedule_flush(self, server_name: str) -> None:
+        def run():
+            task = asyncio.create_task(self.flush(server_name))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+        if server_name not in self.timers:
+            self.timers[server_name] = self.loop.call_later(self.BATCH_TIMEOUT, run)
+
+    async def flush(self, server_name: str) -> None:
+        timer = self.timers.pop(server_name, None)
+        if timer:
+            timer.cancel()
+        rows = self.buffer.pop(server_name, None)
+        if not rows:
+            return
         try:
-            server: Server = self.bot.servers[data['server_name']]
-            with closing(conn.cursor()) as cursor:
-                def get_value(values: dict, index1, index2):
-                    if index1 not in values:
-                        return None
-                    if index2 not in values[index1]:
-                        return None
-                    return values[index1][index2]
-
-                player = get_value(data, 'initiator', 'name')
-                init_player = server.get_player(name=player) if player else None
-                player = get_value(data, 'target', 'name')
-                target_player = server.get_player(name=player) if player else None
-                if self.bot.config.getboolean(server.installation, 'PERSIST_AI_STATISTICS') or init_player or \
-                        target_player:
-                    dataset = {
-                        'mission_id': server.mission_id,
-                        'event': data['eventName'],
-                        'init_id': init_player.ucid if init_player else -1,
-                        'init_side': get_value(data, 'initiator', 'coalition'),
-                        'init_type': get_value(data, 'initiator', 'unit_type'),
-                        'init_cat': self.UNIT_CATEGORY[get_value(data, 'initiator', 'category')],
-                        'target_id': target_player.ucid if target_player else -1,
-                        'target_side': get_value(data, 'target', 'coalition'),
-                        'target_type': get_value(data, 'target', 'unit_type'),
-                        'target_cat': self.UNIT_CATEGORY[get_value(data, 'target', 'category')],
-                        'weapon': get_value(data, 'weapon', 'name'),
-                        'place': get_value(data, 'place', 'name'),
-                        'comment': data['comment'] if 'comment' in data else ''
-                    }
-                    cursor.execute('INSERT INTO missionstats (mission_id, event, init_id, init_side, init_type, '
-                                   'init_cat, target_id, target_side, target_type, target_cat, weapon, '
-                                   'place, comment) VALUES (%(mission_id)s, %(event)s, %(init_id)s, %(init_side)s, '
-                                   '%(init_type)s, %(init_cat)s, %(target_id)s, %(target_side)s, %(target_type)s, '
-                                   '%(target_cat)s, %(weapon)s, %(place)s, %(comment)s)', dataset)
-                    conn.commit()
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
-            conn.rollback()
-        finally:
-            self.pool.putconn(conn)
+            async with self.bot.apool.connection() as conn:
+                async with conn.cursor() as cursor:
+                    async with cursor.copy(self.SQL_COPY) as copy:
+                        for row in rows:
+                            await copy.write_row(row)
+        except psycopg.Error as error:
+            errors = self.errors.get(server_name, 0)
+            if errors % self.LOG_ERRORS == 0:
+                self.log.exception(error)
+            self.errors[server_name] = errors + 1
+            # keep the events for the next try, in front of the ones that came in meanwhile
+            pending = self.buffer.pop(server_name, [])
+            count = len(rows) + len(pending)
+            rows.extend(pending)
+            if len(rows) < count:
+                self._drop(server_name, count - len(rows))
+            self.buffer[server_name] = rows
+            self._schedule_flush(server_name)
+        else:
+            if self.errors.pop(server_name, 0) > 0:
+                self.log.info(f'Mission statistics of server {server_name} are written again.')
+
+    async def flush_all(self) -> None:
+        for server_name in list(self.buffer.keys()):
+            await self.flush(server_name)
 
     async def onMissionEvent(self, data):
         server: Server = self.bot.servers[data['server_name']]
         if self.bot.config.getboolean(server.installation, 'PERSIST_MISSION_STATISTICS'):
-            self._update_database(data)
+            await self._update_database(data)
         if data['server_name'] in self.bot.mission_stats:
             stats = self.bot.mission_stats[data['server_name']]
             update = False
@@ -155,6 +155,7 @@ class PunishmentAgent(Plugin):
 
 
 class PunishmentMaster(PunishmentAgent):
+    prune_tables = {'pu_events': 'init_id'}
 
     def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
         super().__init__(bot, eventlistener)
@@ -179,13 +180,10 @@ class PunishmentMaster(PunishmentAgent):
         finally:
             self.pool.putconn(conn)
 
-    async def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
+    def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
         self.log.debug('Pruning Punishment ...')
         with closing(conn.cursor()) as cursor:
-            if ucids:
-                for ucid in ucids:
-                    cursor.execute('DELETE FROM pu_events WHERE init_id = %s', (ucid,))
-            elif days > 0:
+            if days > 0:
                 cursor.execute(f"DELETE FROM pu_events WHERE time < (DATE(NOW()) - interval '{days} days')")
         self.log.debug('Punishment pruned.')
 
@@ -10,6 +10,8 @@ if TYPE_CHECKING:
 
 
 class SchedulerListener(EventListener):
+    # restarts and shutdowns wait for the server, so don't hold back other events meanwhile
+    ordered = False
 
     def _run(self, server: Server, method: str) -> None:
         if method.startswith('load:'):
@@ -1,6 +1,5 @@
 import discord
 import icmplib
-import os
 import platform
 import psutil
 import psycopg2
@@ -16,13 +15,11 @@ class AgentServerStats(Plugin):
 
     def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
         super().__init__(bot, eventlistener)
-        self.cleanup.start()
         self.schedule.start()
         self.io_counters = {}
         self.net_io_counters = None
 
     async def cog_unload(self):
-        self.cleanup.cancel()
         self.schedule.cancel()
         await super().cog_unload()
 
@@ -54,10 +51,8 @@ class AgentServerStats(Plugin):
     async def display_report(self, ctx, schema: str, period: str, server_name: str):
         report = Report(self.bot, self.plugin_name, schema)
         env = await report.render(period=period, server_name=server_name, agent_host=platform.node())
-        file = discord.File(env.filename) if env.filename else None
+        file = discord.File(env.buffer, filename=env.filename) if env.buffer else None
         await ctx.send(embed=env.embed, file=file)
-        if env.filename:
-            os.remove(env.filename)
 
     @commands.command(description='Shows servers load', usage='[period]')
     @utils.has_role('Admin')
@@ -130,12 +125,26 @@ class AgentServerStats(Plugin):
         finally:
             self.pool.putconn(conn)
 
+class MasterServerStats(AgentServerStats):
+
+    def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
+        super().__init__(bot, eventlistener)
+        self.cleanup.start()
+
+    async def cog_unload(self):
+        self.cleanup.cancel()
+        await super().cog_unload()
+
+    # runs on the master only, as the partitions are shared by all nodes
     @tasks.loop(hours=12.0)
     async def cleanup(self):
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
-                cursor.execute("DELETE FROM serverstats WHERE time < (CURRENT_TIMESTAMP - interval '1 month')")
+                # serverstats is partitioned by month, so create the upcoming partitions and drop the outdated ones
+                cursor.execute("SELECT create_time_partitions('serverstats', NOW()::TIMESTAMP, "
+                               "(NOW() + interval '3 months')::TIMESTAMP)")
+                cursor.execute("SELECT drop_time_partitions('serverstats', (LOCALTIMESTAMP - interval '1 month'))")
             conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             conn.rollback()
@@ -143,9 +152,6 @@ class AgentServerStats(Plugin):
         finally:
             self.pool.putconn(conn)
 
-
-class MasterServerStats(AgentServerStats):
-
     @commands.command(description='Shows servers load', usage='[period]')
     @utils.has_role('Admin')
     @commands.guild_only()
@@ -0,0 +1,12 @@
+DROP INDEX IF EXISTS idx_serverstats_server_name;
+DROP INDEX IF EXISTS idx_serverstats_server_time;
+ALTER TABLE serverstats RENAME TO serverstats_old;
+ALTER SEQUENCE serverstats_id_seq OWNED BY NONE;
+CREATE TABLE serverstats (id INTEGER NOT NULL DEFAULT NEXTVAL('serverstats_id_seq'), agent_host TEXT NOT NULL, server_name TEXT NOT NULL, mission_id INTEGER NOT NULL, users INTEGER NOT NULL, status TEXT NOT NULL, cpu NUMERIC(5,2) NOT NULL, mem_total NUMERIC NOT NULL, mem_ram NUMERIC NOT NULL, read_bytes NUMERIC NOT NULL, write_bytes NUMERIC NOT NULL, bytes_sent NUMERIC NOT NULL, bytes_recv NUMERIC NOT NULL, fps NUMERIC(5,2) NOT NULL, ping NUMERIC NULL, time TIMESTAMP NOT NULL DEFAULT NOW(), PRIMARY KEY (id, time)) PARTITION BY RANGE (time);
+ALTER SEQUENCE serverstats_id_seq OWNED BY serverstats.id;
+CREATE TABLE IF NOT EXISTS serverstats_default PARTITION OF serverstats DEFAULT;
+SELECT create_time_partitions('serverstats', COALESCE((SELECT MIN(time) FROM serverstats_old), NOW()::TIMESTAMP), (NOW() + INTERVAL '3 months')::TIMESTAMP);
+INSERT INTO serverstats (id, agent_host, server_name, mission_id, users, status, cpu, mem_total, mem_ram, read_bytes, write_bytes, bytes_sent, bytes_recv, fps, ping, time) SELECT id, COALESCE(agent_host, ''), server_name, mission_id, users, status, cpu, mem_total, mem_ram, read_bytes, write_bytes, bytes_sent, bytes_recv, fps, ping, time FROM serverstats_old;
+DROP TABLE serverstats_old;
+CREATE INDEX IF NOT EXISTS idx_serverstats_server_name ON serverstats(server_name);
+CREATE INDEX IF NOT EXISTS idx_serverstats_server_time ON serverstats(time);
@@ -189,7 +189,7 @@ class ServerLoad(report.MultiGraphElement):
               f"AVG(mem_ram)/(1024*1024) AS \"Memory (RAM)\", SUM(read_bytes)/1024 AS \"Read\", SUM(write_bytes)/1024 " \
               f"AS \"Write\", ROUND(AVG(bytes_sent)) AS \"Sent\", ROUND(AVG(bytes_recv)) AS \"Recv\", ROUND(AVG(fps), " \
               f"2) AS \"FPS\", ROUND(AVG(ping), 2) AS \"Ping\" FROM serverstats " \
-              f"WHERE time > (CURRENT_TIMESTAMP - interval '1 {period}') "
+              f"WHERE time > (LOCALTIMESTAMP - interval '1 {period}') "
         if server_name:
             sql += f" AND server_name = '{server_name}' "
         if agent_host:
@@ -1,11 +1,10 @@
 import asyncio
 import discord
-import os
 import psycopg2
 import random
 from contextlib import closing
 from core import utils, DCSServerBot, Plugin, PluginRequiredError, Report, PaginationReport, Status, Server, Player, \
-    DataObjectFactory, Member
+    DataObjectFactory, Member, ReportCache
 from discord.ext import commands, tasks
 from typing import Union, Optional, Tuple
 from .filter import StatisticsFilter
@@ -34,6 +33,34 @@ def parse_params(self, ctx, member: Optional[Union[discord.Member, str]], *param
 
 
 class UserStatisticsAgent(Plugin):
+
+    def __init__(self, bot, listener):
+        super().__init__(bot, listener)
+        self.flush_statistics.start()
+
+    async def cog_unload(self):
+        self.flush_statistics.cancel()
+        # process the queued events first, then write the remaining statistics before shutting down
+        await super().cog_unload()
+        await self.eventlistener.flush()
+
+    @tasks.loop(seconds=10.0)
+    async def flush_statistics(self):
+        await self.eventlistener.flush()
+
+    def rename(self, old_name: str, new_name: str):
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('UPDATE statistics_daily SET server_name = %s WHERE server_name = %s',
+                               (new_name, old_name))
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn)
+
     @commands.command(description='Deletes the statistics of a server')
     @utils.has_role('Admin')
     @commands.guild_only()
@@ -49,11 +76,13 @@ class UserStatisticsAgent(Plugin):
                             cursor.execute(
                                 'DELETE FROM statistics WHERE mission_id in (SELECT id FROM missions WHERE '
                                 'server_name = %s)', (server.name, ))
+                            cursor.execute('DELETE FROM statistics_daily WHERE server_name = %s', (server.name, ))
                             cursor.execute(
                                 'DELETE FROM missionstats WHERE mission_id in (SELECT id FROM missions WHERE '
                                 'server_name = %s)', (server.name, ))
                             cursor.execute('DELETE FROM missions WHERE server_name = %s', (server.name, ))
                             conn.commit()
+                        ReportCache.invalidate(self.plugin_name)
                         await ctx.send(f'Statistics for server "{server.name}" have been wiped.')
                         await self.bot.audit('reset statistics', user=ctx.message.author, server=server)
                 except (Exception, psycopg2.DatabaseError) as error:
@@ -112,6 +141,7 @@ class UserStatisticsAgent(Plugin):
 
 
 class UserStatisticsMaster(UserStatisticsAgent):
+    prune_tables = {'statistics': 'player_ucid', 'statistics_daily': 'player_ucid'}
 
     def __init__(self, bot, listener):
         super().__init__(bot, listener)
@@ -121,14 +151,12 @@ class UserStatisticsMaster(UserStatisticsAgent):
         self.expire_token.cancel()
         await super().cog_unload()
 
-    async def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
+    def prune(self, conn, *, days: int = 0, ucids: list[str] = None):
         self.log.debug('Pruning Userstats ...')
         with closing(conn.cursor()) as cursor:
-            if ucids:
-                for ucid in ucids:
-                    cursor.execute('DELETE FROM statistics WHERE player_ucid = %s', (ucid, ))
-            elif days > 0:
+            if days > 0:
                 cursor.execute(f"DELETE FROM statistics WHERE hop_off < (DATE(NOW()) - interval '{days} days')")
+                cursor.execute(f"DELETE FROM statistics_daily WHERE day < (DATE(NOW()) - interval '{days} days')")
         self.log.debug('Userstats pruned.')
 
     @commands.command(brief='Shows player statistics',
@@ -213,10 +241,8 @@ class UserStatisticsMaster(UserStatisticsAgent):
             else:
                 report = Report(self.bot, self.plugin_name, file)
                 env = await report.render(period=period, message=ctx.message, server_name=server.name, flt=flt)
-                file = discord.File(env.filename)
+                file = discord.File(env.buffer, filename=env.filename) if env.buffer else None
                 await ctx.send(embed=env.embed, file=file, delete_after=timeout if timeout > 0 else None)
-                if file:
-                    os.remove(env.filename)
         finally:
             await ctx.message.delete()
 
@@ -1,2 +1,4 @@
 CREATE TABLE IF NOT EXISTS statistics (mission_id INTEGER NOT NULL, player_ucid TEXT NOT NULL, slot TEXT NOT NULL, side INTEGER DEFAULT 0, kills INTEGER DEFAULT 0, pvp INTEGER DEFAULT 0, deaths INTEGER DEFAULT 0, ejections INTEGER DEFAULT 0, crashes INTEGER DEFAULT 0, teamkills INTEGER DEFAULT 0, kills_planes INTEGER DEFAULT 0, kills_helicopters INTEGER DEFAULT 0, kills_ships INTEGER DEFAULT 0, kills_sams INTEGER DEFAULT 0, kills_ground INTEGER DEFAULT 0, deaths_pvp INTEGER DEFAULT 0, deaths_planes INTEGER DEFAULT 0, deaths_helicopters INTEGER DEFAULT 0, deaths_ships INTEGER DEFAULT 0, deaths_sams INTEGER DEFAULT 0, deaths_ground INTEGER DEFAULT 0, takeoffs INTEGER DEFAULT 0, landings INTEGER DEFAULT 0, hop_on TIMESTAMP NOT NULL DEFAULT NOW(), hop_off TIMESTAMP, PRIMARY KEY (mission_id, player_ucid, slot, hop_on));
 CREATE INDEX IF NOT EXISTS idx_statistics_player_ucid ON statistics(player_ucid);
+CREATE TABLE IF NOT EXISTS statistics_daily (day DATE NOT NULL, server_name TEXT NOT NULL, player_ucid TEXT NOT NULL, side INTEGER NOT NULL DEFAULT 0, sorties INTEGER NOT NULL DEFAULT 0, playtime NUMERIC NOT NULL DEFAULT 0, takeoffs INTEGER NOT NULL DEFAULT 0, landings INTEGER NOT NULL DEFAULT 0, ejections INTEGER NOT NULL DEFAULT 0, crashes INTEGER NOT NULL DEFAULT 0, deaths INTEGER NOT NULL DEFAULT 0, kills INTEGER NOT NULL DEFAULT 0, pvp INTEGER NOT NULL DEFAULT 0, kills_planes INTEGER NOT NULL DEFAULT 0, kills_helicopters INTEGER NOT NULL DEFAULT 0, teamkills INTEGER NOT NULL DEFAULT 0, kills_ships INTEGER NOT NULL DEFAULT 0, kills_sams INTEGER NOT NULL DEFAULT 0, kills_ground INTEGER NOT NULL DEFAULT 0, deaths_pvp INTEGER NOT NULL DEFAULT 0, deaths_planes INTEGER NOT NULL DEFAULT 0, deaths_helicopters INTEGER NOT NULL DEFAULT 0, deaths_ships INTEGER NOT NULL DEFAULT 0, deaths_sams INTEGER NOT NULL DEFAULT 0, deaths_ground INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (day, server_name, player_ucid, side));
+CREATE INDEX IF NOT EXISTS idx_statistics_daily_player_ucid ON statistics_daily(player_ucid);
@@ -0,0 +1,3 @@
+CREATE TABLE IF NOT EXISTS statistics_daily (day DATE NOT NULL, server_name TEXT NOT NULL, player_ucid TEXT NOT NULL, side INTEGER NOT NULL DEFAULT 0, sorties INTEGER NOT NULL DEFAULT 0, playtime NUMERIC NOT NULL DEFAULT 0, takeoffs INTEGER NOT NULL DEFAULT 0, landings INTEGER NOT NULL DEFAULT 0, ejections INTEGER NOT NULL DEFAULT 0, crashes INTEGER NOT NULL DEFAULT 0, deaths INTEGER NOT NULL DEFAULT 0, kills INTEGER NOT NULL DEFAULT 0, pvp INTEGER NOT NULL DEFAULT 0, kills_planes INTEGER NOT NULL DEFAULT 0, kills_helicopters INTEGER NOT NULL DEFAULT 0, teamkills INTEGER NOT NULL DEFAULT 0, kills_ships INTEGER NOT NULL DEFAULT 0, kills_sams INTEGER NOT NULL DEFAULT 0, kills_ground INTEGER NOT NULL DEFAULT 0, deaths_pvp INTEGER NOT NULL DEFAULT 0, deaths_planes INTEGER NOT NULL DEFAULT 0, deaths_helicopters INTEGER NOT NULL DEFAULT 0, deaths_ships INTEGER NOT NULL DEFAULT 0, deaths_sams INTEGER NOT NULL DEFAULT 0, deaths_ground INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (day, server_name, player_ucid, side));
+CREATE INDEX IF NOT EXISTS idx_statistics_daily_player_ucid ON statistics_daily(player_ucid);
+INSERT INTO statistics_daily (day, server_name, player_ucid, side, sorties, playtime, takeoffs, landings, ejections, crashes, deaths, kills, pvp, kills_planes, kills_helicopters, teamkills, kills_ships, kills_sams, kills_ground, deaths_pvp, deaths_planes, deaths_helicopters, deaths_ships, deaths_sams, deaths_ground) SELECT DATE(s.hop_on), m.server_name, s.player_ucid, COALESCE(s.side, 0), COUNT(*), SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))), COALESCE(SUM(s.takeoffs), 0), COALESCE(SUM(s.landings), 0), COALESCE(SUM(s.ejections), 0), COALESCE(SUM(s.crashes), 0), COALESCE(SUM(s.deaths), 0), COALESCE(SUM(s.kills), 0), COALESCE(SUM(s.pvp), 0), COALESCE(SUM(s.kills_planes), 0), COALESCE(SUM(s.kills_helicopters), 0), COALESCE(SUM(s.teamkills), 0), COALESCE(SUM(s.kills_ships), 0), COALESCE(SUM(s.kills_sams), 0), COALESCE(SUM(s.kills_ground), 0), COALESCE(SUM(s.deaths_pvp), 0), COALESCE(SUM(s.deaths_planes), 0), COALESCE(SUM(s.deaths_helicopters), 0), COALESCE(SUM(s.deaths_ships), 0), COALESCE(SUM(s.deaths_sams), 0), COALESCE(SUM(s.deaths_ground), 0) FROM statistics s, missions m WHERE s.mission_id = m.id AND s.hop_off IS NOT NULL GROUP BY 1, 2, 3, 4;
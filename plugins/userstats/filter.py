@@ -22,6 +22,11 @@ class StatisticsFilter(ABC):
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         pass
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[str]:
+        # filter on the daily rollup (statistics_daily s) or None, if the filter can't be applied on it
+        return None
+
     @staticmethod
     def detect(bot: DCSServerBot, period: str) -> Any:
         if MissionFilter.supports(bot, period):
@@ -56,6 +61,19 @@ class PeriodFilter(StatisticsFilter):
         else:
             return f'DATE(s.hop_on) > (DATE(NOW()) - interval \'1 {period}\')'
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[str]:
+        if period and period.startswith('period:'):
+            period = period[7:]
+        if period in [None, 'all']:
+            return '1 = 1'
+        elif period == 'yesterday':
+            return "s.day = current_date - 1"
+        elif period == 'today':
+            return "s.day = current_date"
+        else:
+            return f's.day > (DATE(NOW()) - interval \'1 {period}\')'
+
     @staticmethod
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         if period and period.startswith('period:'):
@@ -85,6 +103,26 @@ class CampaignFilter(StatisticsFilter):
         return f"tsrange(s.hop_on, s.hop_off) && (SELECT tsrange(start, stop) FROM campaigns " \
                f"WHERE name ILIKE '{period}')"
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[str]:
+        if period and period.startswith('campaign:'):
+            period = period[9:]
+        # the rollup is per day, so it can only be used for campaigns that start and end at midnight
+        conn = bot.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute("SELECT start::TIME = '00:00' AND (stop IS NULL OR stop::TIME = '00:00') "
+                               "FROM campaigns WHERE name ILIKE %s", (period, ))
+                row = cursor.fetchone()
+                if not row or not row[0]:
+                    return None
+        except (Exception, psycopg2.DatabaseError) as error:
+            bot.log.exception(error)
+            return None
+        finally:
+            bot.pool.putconn(conn)
+        return f"s.day <@ (SELECT daterange(DATE(start), DATE(stop), '[)') FROM campaigns WHERE name ILIKE '{period}')"
+
     @staticmethod
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         if period and period.startswith('campaign:'):
@@ -111,6 +149,20 @@ class MixedFilter(StatisticsFilter):
         else:
             return PeriodFilter.filter(bot, period, server_name)
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[str]:
+        if not server_name and len(bot.servers) == 1:
+            server = list(bot.servers.values())[0]
+        elif server_name in bot.servers:
+            server = bot.servers[server_name]
+        else:
+            return PeriodFilter.rollup(bot, period)
+        _, name = utils.get_running_campaign(server)
+        if name:
+            return CampaignFilter.rollup(bot, name, server_name)
+        else:
+            return PeriodFilter.rollup(bot, period, server_name)
+
     @staticmethod
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         if not server_name and len(bot.servers) == 1:
@@ -163,6 +215,11 @@ class MonthFilter(StatisticsFilter):
         month = MonthFilter.get_month(period[6:])
         return f"DATE_PART('month', s.hop_on) = {month} AND DATE_PART('year', s.hop_on) = DATE_PART('year', CURRENT_DATE)"
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[str]:
+        month = MonthFilter.get_month(period[6:])
+        return f"DATE_PART('month', s.day) = {month} AND DATE_PART('year', s.day) = DATE_PART('year', CURRENT_DATE)"
+
     @staticmethod
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         month = MonthFilter.get_month(period[6:])
@@ -9,11 +9,17 @@ from .filter import StatisticsFilter
 class HighscorePlaytime(report.GraphElement):
 
     def render(self, server_name: str, period: str, limit: int, message: discord.Message, flt: StatisticsFilter):
-        sql = "SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, ROUND(SUM(EXTRACT(EPOCH FROM (s.hop_off - " \
-              "s.hop_on)))) AS playtime FROM statistics s, players p, missions m WHERE p.ucid = s.player_ucid AND " \
-              "s.hop_off IS NOT NULL AND s.mission_id = m.id "
+        rollup = flt.rollup(self.env.bot, period, server_name)
+        if rollup:
+            # closed sessions are summed up per day already
+            sql = "SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, ROUND(SUM(s.playtime)) AS playtime " \
+                  "FROM statistics_daily s, players p WHERE p.ucid = s.player_ucid "
+        else:
+            sql = "SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, ROUND(SUM(EXTRACT(EPOCH FROM (" \
+                  "s.hop_off - s.hop_on)))) AS playtime FROM statistics s, players p, missions m WHERE p.ucid = " \
+                  "s.player_ucid AND s.hop_off IS NOT NULL AND s.mission_id = m.id "
         if server_name:
-            sql += "AND m.server_name = '{}'".format(server_name.replace('\'', '\'\''))
+            sql += "AND {}.server_name = '{}'".format('s' if rollup else 'm', server_name.replace('\'', '\'\''))
             if server_name in self.bot.servers:
                 server = self.bot.servers[server_name]
                 tmp = utils.get_sides(message, server)
@@ -27,7 +33,7 @@ class HighscorePlaytime(report.GraphElement):
                     sides = [Side.SPECTATOR.value, Side.BLUE.value, Side.RED.value]
                 sql += ' AND s.side in (' + ','.join([str(x) for x in sides]) + ')'
         self.env.embed.title = flt.format(self.env.bot, period, server_name) + ' ' + self.env.embed.title
-        sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
+        sql += ' AND ' + (rollup or flt.filter(self.env.bot, period, server_name))
         sql += f' GROUP BY 1, 2 ORDER BY 3 DESC LIMIT {limit}'
 
         conn = self.pool.getconn()
@@ -58,6 +64,8 @@ class HighscorePlaytime(report.GraphElement):
 class HighscoreElement(report.GraphElement):
 
     def render(self, server_name: str, period: str, limit: int, kill_type: str, message: discord.Message, flt: StatisticsFilter):
+        rollup = flt.rollup(self.env.bot, period, server_name)
+        playtime = 's.playtime' if rollup else 'EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))'
         sql_parts = {
             'Air Targets': 'SUM(s.kills_planes+s.kills_helicopters)',
             'Ships': 'SUM(s.kills_ships)',
@@ -68,8 +76,8 @@ class HighscoreElement(report.GraphElement):
                         'deaths_helicopters + deaths_ships + deaths_sams + deaths_ground)::DECIMAL) END',
             'PvP-KD-Ratio': 'CASE WHEN SUM(s.deaths_pvp) = 0 THEN SUM(s.pvp) ELSE SUM(s.pvp::DECIMAL)/SUM('
                             's.deaths_pvp::DECIMAL) END',
-            'Most Efficient Killers': 'SUM(s.kills) / (SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))) / 3600.0)',
-            'Most Wasteful Pilots': 'SUM(s.crashes) / (SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))) / 3600.0)'
+            'Most Efficient Killers': f'SUM(s.kills) / (SUM({playtime}) / 3600.0)',
+            'Most Wasteful Pilots': f'SUM(s.crashes) / (SUM({playtime}) / 3600.0)'
         }
         xlabels = {
             'Air Targets': 'kills',
@@ -82,10 +90,15 @@ class HighscoreElement(report.GraphElement):
             'Most Wasteful Pilots': 'airframes wasted / h'
         }
         colors = ['#CD7F32', 'silver', 'gold']
-        sql = f"SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, {sql_parts[kill_type]} AS value FROM " \
-              f"players p, statistics s, missions m WHERE s.player_ucid = p.ucid AND s.mission_id = m.id "
+        if rollup:
+            sql = f"SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, {sql_parts[kill_type]} AS value FROM " \
+                  f"players p, statistics_daily s WHERE s.player_ucid = p.ucid "
+        else:
+            sql = f"SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, {sql_parts[kill_type]} AS value FROM " \
+                  f"players p, statistics s, missions m WHERE s.player_ucid = p.ucid AND s.mission_id = m.id " \
+                  f"AND s.hop_off IS NOT NULL "
         if server_name:
-            sql += "AND m.server_name = '{}'".format(server_name.replace('\'', '\'\''))
+            sql += "AND {}.server_name = '{}'".format('s' if rollup else 'm', server_name.replace('\'', '\'\''))
             if server_name in self.bot.servers:
                 server = self.bot.servers[server_name]
                 tmp = utils.get_sides(message, server)
@@ -98,8 +111,8 @@ class HighscoreElement(report.GraphElement):
                 if len(sides) == 0:
                     sides = [0, 1, 2]
                 sql += ' AND s.side in (' + ','.join([str(x) for x in sides]) + ')'
-        sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
-        sql += f' AND s.hop_off IS NOT NULL GROUP BY 1, 2 HAVING {sql_parts[kill_type]} > 0 ORDER BY 3 DESC LIMIT {limit}'
+        sql += ' AND ' + (rollup or flt.filter(self.env.bot, period, server_name))
+        sql += f' GROUP BY 1, 2 HAVING {sql_parts[kill_type]} > 0 ORDER BY 3 DESC LIMIT {limit}'
 
         conn = self.pool.getconn()
         try:
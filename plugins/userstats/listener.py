@@ -1,33 +1,55 @@
+import asyncio
 import psycopg2
+import psycopg2.extras
 from contextlib import closing
-from core import EventListener, Plugin, Status, Server, Side, Player, Channel
-from typing import Union, Any
+from core import EventListener, Plugin, Status, Server, Side, Player, Channel, PreparedStatements, ReportCache
+from typing import Union, Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
 
 
 class UserStatisticsEventListener(EventListener):
 
-    SQL_EVENT_UPDATES = {
-        'takeoff': 'UPDATE statistics SET takeoffs = takeoffs + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'landing': 'UPDATE statistics SET landings = landings + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'eject': 'UPDATE statistics SET ejections = ejections + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'crash': 'UPDATE statistics SET crashes = crashes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'pilot_death': 'UPDATE statistics SET deaths = deaths + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'pvp_planes': 'UPDATE statistics SET kills = kills + 1, pvp = pvp + 1, kills_planes = kills_planes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'pvp_helicopters': 'UPDATE statistics SET kills = kills + 1, pvp = pvp + 1, kills_helicopters = kills_helicopters + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'teamkill': 'UPDATE statistics SET teamkills = teamkills + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_planes': 'UPDATE statistics SET kills = kills + 1, kills_planes = kills_planes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_helicopters': 'UPDATE statistics SET kills = kills + 1, kills_helicopters = kills_helicopters + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_ships': 'UPDATE statistics SET kills = kills + 1, kills_ships = kills_ships + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_sams': 'UPDATE statistics SET kills = kills + 1, kills_sams = kills_sams + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_ground': 'UPDATE statistics SET kills = kills + 1, kills_ground = kills_ground + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_pvp_planes': 'UPDATE statistics SET deaths_pvp = deaths_pvp + 1, deaths_planes = deaths_planes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_pvp_helicopters': 'UPDATE statistics SET deaths_pvp = deaths_pvp + 1, deaths_helicopters = deaths_helicopters + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_planes': 'UPDATE statistics SET deaths_planes = deaths_planes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_helicopters': 'UPDATE statistics SET deaths_helicopters = deaths_helicopters + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_ships': 'UPDATE statistics SET deaths_ships = deaths_ships + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_sams': 'UPDATE statistics SET deaths_sams = deaths_sams + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_ground': 'UPDATE statistics SET deaths_ground = deaths_ground + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL'
+    # counters that are increased by an event
+    EVENT_COUNTERS = {
+        'takeoff': ['takeoffs'],
+        'landing': ['landings'],
+        'eject': ['ejections'],
+        'crash': ['crashes'],
+        'pilot_death': ['deaths'],
+        'pvp_planes': ['kills', 'pvp', 'kills_planes'],
+        'pvp_helicopters': ['kills', 'pvp', 'kills_helicopters'],
+        'teamkill': ['teamkills'],
+        'kill_planes': ['kills', 'kills_planes'],
+        'kill_helicopters': ['kills', 'kills_helicopters'],
+        'kill_ships': ['kills', 'kills_ships'],
+        'kill_sams': ['kills', 'kills_sams'],
+        'kill_ground': ['kills', 'kills_ground'],
+        'deaths_pvp_planes': ['deaths_pvp', 'deaths_planes'],
+        'deaths_pvp_helicopters': ['deaths_pvp', 'deaths_helicopters'],
+        'deaths_planes': ['deaths_planes'],
+        'deaths_helicopters': ['deaths_helicopters'],
+        'deaths_ships': ['deaths_ships'],
+        'deaths_sams': ['deaths_sams'],
+        'deaths_ground': ['deaths_ground']
     }
+    COUNTERS = list(dict.fromkeys(c for counters in EVENT_COUNTERS.values() for c in counters))
+    SQL_FLUSH_COUNTERS = 'UPDATE statistics s SET {} FROM (VALUES %s) AS v(mission_id, player_ucid, {}) ' \
+                         'WHERE s.mission_id = v.mission_id AND s.player_ucid = v.player_ucid AND s.hop_off IS NULL'\
+        .format(', '.join(f'{c} = s.{c} + v.{c}' for c in COUNTERS), ', '.join(COUNTERS))
+
+    # adds the sessions that were closed in the current transaction (hop_off = NOW()) to the daily rollup that is
+    # used by the highscores
+    SQL_ROLLUP = 'INSERT INTO statistics_daily (day, server_name, player_ucid, side, sorties, playtime, {}) ' \
+                 'SELECT DATE(c.hop_on), m.server_name, c.player_ucid, COALESCE(c.side, 0), COUNT(*), ' \
+                 'SUM(EXTRACT(EPOCH FROM (c.hop_off - c.hop_on))), {} ' \
+                 'FROM statistics c, missions m WHERE c.mission_id = m.id AND c.hop_off = NOW() AND {{}} ' \
+                 'GROUP BY 1, 2, 3, 4 ON CONFLICT (day, server_name, player_ucid, side) DO UPDATE SET ' \
+                 'sorties = statistics_daily.sorties + excluded.sorties, ' \
+                 'playtime = statistics_daily.playtime + excluded.playtime, {}'
+    SQL_ROLLUP = SQL_ROLLUP.format(
+        ', '.join(COUNTERS), ', '.join(f'COALESCE(SUM(c.{c}), 0)' for c in COUNTERS),
+        ', '.join(f'{c} = statistics_daily.{c} + excluded.{c}' for c in COUNTERS))
 
     SQL_MISSION_HANDLING = {
         'start_mission': 'INSERT INTO missions (server_name, mission_name, mission_theatre) VALUES (%s, %s, %s)',
@@ -42,10 +64,122 @@ class UserStatisticsEventListener(EventListener):
         'stop_player': 'UPDATE statistics SET hop_off = NOW() WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
         'all_players': 'SELECT player_ucid FROM statistics WHERE mission_id = %s AND hop_off IS NULL'
     }
+    # the rollups of the statements that close sessions
+    SQL_ROLLUP_HANDLING = {
+        'close_statistics': SQL_ROLLUP.format('c.mission_id = %s'),
+        'close_all_statistics': SQL_ROLLUP.format('c.mission_id IN (SELECT id FROM missions WHERE server_name = %s '
+                                                  'AND mission_end IS NULL)'),
+        'stop_player': SQL_ROLLUP.format('c.mission_id = %s AND c.player_ucid = %s')
+    }
+    # statements that run on every slot change, these are executed as prepared statements
+    PREPARED = ['check_player', 'start_player', 'stop_player']
+    # number of failed writes (every 10 seconds) after which the collected counter changes are discarded
+    MAX_RETRIES = 30
 
     def __init__(self, plugin: Plugin):
         super().__init__(plugin)
         self.statistics = set()
+        # counter changes that are not written to the database yet, per (mission_id, player_ucid)
+        self.deltas: dict[tuple[int, str], dict[str, int]] = {}
+        # number of failed writes of the counter changes in a row
+        self.failures = 0
+        # a flush must not be in progress while sessions are closed
+        self.lock = asyncio.Lock()
+        for name in self.PREPARED:
+            PreparedStatements.register(f'userstats.{name}', self.SQL_MISSION_HANDLING[name])
+            if name in self.SQL_ROLLUP_HANDLING:
+                PreparedStatements.register(f'userstats.{name}.rollup', self.SQL_ROLLUP_HANDLING[name])
+
+    def add_event(self, mission_id: int, ucid: str, event: str) -> None:
+        delta = self.deltas.setdefault((mission_id, ucid), {})
+        for counter in self.EVENT_COUNTERS[event]:
+            delta[counter] = delta.get(counter, 0) + 1
+
+    def _write_deltas(self, cursor, deltas: dict[tuple[int, str], dict[str, int]]) -> None:
+        psycopg2.extras.execute_values(cursor, self.SQL_FLUSH_COUNTERS, [
+            (mission_id, ucid, *[delta.get(c, 0) for c in self.COUNTERS])
+            for (mission_id, ucid), delta in deltas.items()
+        ])
+
+    def _restore(self, deltas: dict[tuple[int, str], dict[str, int]]) -> None:
+        self.failures += 1
+        if self.failures % self.MAX_RETRIES == 0:
+            self.log.error(f'Statistics could not be written {self.failures} times in a row, the changes of '
+                           f'{len(deltas)} sessions are discarded.')
+            return
+        # keep the changes for the next try
+        for key, delta in deltas.items():
+            current = self.deltas.setdefault(key, {})
+            for counter, value in delta.items():
+                current[counter] = current.get(counter, 0) + value
+
+    async def _write(self, func: Optional[Callable[..., T]] = None, *args) -> Optional[T]:
+        """
+        Writes the collected counter changes to the database and runs func(cursor, *args) afterwards in the same
+        transaction. Sessions must only be closed (hop_off is set) in func, as only open sessions get updated.
+        If the counters can't be written, func is run nevertheless and the changes are kept for the next try, up to
+        MAX_RETRIES times. Raises the database error, if func fails.
+        """
+        async with self.lock:
+            deltas = self.deltas
+            if not deltas and not func:
+                return None
+            self.deltas = {}
+
+            def _run(conn) -> tuple[Optional[T], Optional[Exception]]:
+                error = None
+                with closing(conn.cursor()) as cursor:
+                    if deltas:
+                        cursor.execute('SAVEPOINT deltas')
+                        try:
+                            self._write_deltas(cursor, deltas)
+                            cursor.execute('RELEASE SAVEPOINT deltas')
+                        except psycopg2.DatabaseError as ex:
+                            cursor.execute('ROLLBACK TO SAVEPOINT deltas')
+                            error = ex
+                    return func(cursor, *args) if func else None, error
+
+            try:
+                result, error = await self.bot.run_sync_db(_run)
+            except (Exception, psycopg2.DatabaseError):
+                if deltas:
+                    self._restore(deltas)
+                raise
+            if error:
+                if not self.failures:
+                    self.log.exception(error)
+                self._restore(deltas)
+            elif deltas:
+                self.failures = 0
+            return result
+
+    async def flush(self) -> bool:
+        """
+        Writes the collected counter changes to the database. Returns False, if they could not be written.
+        """
+        try:
+            await self._write()
+            return not self.failures
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            return False
+
+    def _close_sessions(self, cursor, name: str, params: tuple) -> None:
+        if name in self.PREPARED:
+            PreparedStatements.execute(cursor, f'userstats.{name}', params)
+        else:
+            cursor.execute(self.SQL_MISSION_HANDLING[name], params)
+        # the sessions are closed, even if they can't be added to the rollup
+        cursor.execute('SAVEPOINT rollup')
+        try:
+            if name in self.PREPARED:
+                PreparedStatements.execute(cursor, f'userstats.{name}.rollup', params)
+            else:
+                cursor.execute(self.SQL_ROLLUP_HANDLING[name], params)
+            cursor.execute('RELEASE SAVEPOINT rollup')
+        except psycopg2.DatabaseError as error:
+            cursor.execute('ROLLBACK TO SAVEPOINT rollup')
+            self.log.exception(error)
 
     async def processEvent(self, data: dict[str, Union[str, int]]) -> Any:
         if (data['command'] == 'registerDCSServer') or \
@@ -62,6 +196,56 @@ class UserStatisticsEventListener(EventListener):
             unit_type += ' (Crew)'
         return unit_type
 
+    def _register(self, cursor, server: Server, data: dict, players: list[Player]) -> tuple[int, list[Player]]:
+        mission_id = -1
+        cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
+        if cursor.rowcount == 1:
+            row = cursor.fetchone()
+            if row[1] == data['current_mission']:
+                mission_id = row[0]
+            else:
+                self.log.warning('The mission in the database does not match the mission that is live '
+                                 'on this server. Fixing...')
+        if mission_id == -1:
+            # close ambiguous missions
+            if cursor.rowcount >= 1:
+                self._close_sessions(cursor, 'close_all_statistics', (server.name,))
+                cursor.execute(self.SQL_MISSION_HANDLING['close_all_missions'], (server.name,))
+            # create a new mission
+            cursor.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name, data['current_mission'],
+                                                                        data['current_map']))
+            cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
+            if cursor.rowcount == 1:
+                mission_id = cursor.fetchone()[0]
+            else:
+                self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
+                               'gathered for this session.')
+                return mission_id, []
+        # initialize active players
+        started = []
+        for player in players:
+            # make sure we get slot changes that might have occurred in the meantime
+            PreparedStatements.execute(cursor, 'userstats.check_player', (mission_id, player.ucid))
+            if cursor.rowcount == 1:
+                # the player is there already ...
+                if cursor.fetchone()[0] != player.unit_type:
+                    # ... but with a different aircraft, so close the old session
+                    self._close_sessions(cursor, 'stop_player', (mission_id, player.ucid))
+                else:
+                    # session will be kept
+                    continue
+            if player.side != Side.SPECTATOR:
+                PreparedStatements.execute(cursor, 'userstats.start_player',
+                                           (mission_id, player.ucid, self.get_unit_type(player), player.side.value))
+                started.append(player)
+        # close dead entries in the database (if existent)
+        ucids = [player.ucid for player in players]
+        cursor.execute(self.SQL_MISSION_HANDLING['all_players'], (mission_id, ))
+        for row in cursor.fetchall():
+            if row[0] not in ucids:
+                self._close_sessions(cursor, 'stop_player', (mission_id, row[0]))
+        return mission_id, started
+
     async def registerDCSServer(self, data: dict) -> None:
         server: Server = self.bot.servers[data['server_name']]
         if data['statistics']:
@@ -70,129 +254,67 @@ class UserStatisticsEventListener(EventListener):
             return
         # registering a running instance
         if data['channel'].startswith('sync-') and 'current_mission' in data:
-            conn = self.pool.getconn()
             try:
-                with closing(conn.cursor()) as cursor:
-                    mission_id = -1
-                    cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
-                    if cursor.rowcount == 1:
-                        row = cursor.fetchone()
-                        if row[1] == data['current_mission']:
-                            mission_id = row[0]
-                        else:
-                            self.log.warning('The mission in the database does not match the mission that is live '
-                                             'on this server. Fixing...')
-                    if mission_id == -1:
-                        # close ambiguous missions
-                        if cursor.rowcount >= 1:
-                            cursor.execute(self.SQL_MISSION_HANDLING['close_all_statistics'], (server.name,))
-                            cursor.execute(self.SQL_MISSION_HANDLING['close_all_missions'], (server.name,))
-                        # create a new mission
-                        cursor.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name,
-                                                                                    data['current_mission'],
-                                                                                    data['current_map']))
-                        cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
-                        if cursor.rowcount == 1:
-                            mission_id = cursor.fetchone()[0]
-                        else:
-                            self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
-                                           'gathered for this session.')
-                    server.mission_id = mission_id
-                    if mission_id != -1:
-                        # initialize active players
-                        players = server.get_active_players()
-                        ucids = []
-                        for player in players:
-                            ucids.append(player.ucid)
-                            # make sure we get slot changes that might have occurred in the meantime
-                            cursor.execute(self.SQL_MISSION_HANDLING['check_player'], (mission_id, player.ucid))
-                            player_started = False
-                            if cursor.rowcount == 1:
-                                # the player is there already ...
-                                if cursor.fetchone()[0] != player.unit_type:
-                                    # ... but with a different aircraft, so close the old session
-                                    cursor.execute(self.SQL_MISSION_HANDLING['stop_player'],
-                                                   (mission_id, player.ucid))
-                                else:
-                                    # session will be kept
-                                    player_started = True
-                            if not player_started and player.side != Side.SPECTATOR:
-                                # only warn for unknown users if it is a non-public server and automatch is on
-                                if not player.member and self.bot.config.getboolean('BOT', 'AUTOMATCH') and \
-                                        len(server.settings['password']) > 0:
-                                    await server.get_channel(Channel.ADMIN).send(
-                                        'Player {} (ucid={}) can\'t be matched to a discord user.'.format(
-                                            data['name'], data['ucid']))
-                                cursor.execute(self.SQL_MISSION_HANDLING['start_player'],
-                                               (mission_id, player.ucid, self.get_unit_type(player),
-                                                player.side.value))
-                        # close dead entries in the database (if existent)
-                        cursor.execute(self.SQL_MISSION_HANDLING['all_players'], (mission_id, ))
-                        for row in cursor.fetchall():
-                            if row[0] not in ucids:
-                                cursor.execute(self.SQL_MISSION_HANDLING['stop_player'], (mission_id, row[0]))
-                    conn.commit()
+                server.mission_id, started = await self._write(self._register, server, data,
+                                                                server.get_active_players())
             except (Exception, psycopg2.DatabaseError) as error:
-                conn.rollback()
                 self.log.exception(error)
-            finally:
-                self.pool.putconn(conn)
+                return
+            # only warn for unknown users if it is a non-public server and automatch is on
+            if self.bot.config.getboolean('BOT', 'AUTOMATCH') and len(server.settings['password']) > 0:
+                for player in started:
+                    if not player.member:
+                        await server.get_channel(Channel.ADMIN).send(
+                            'Player {} (ucid={}) can\'t be matched to a discord user.'.format(player.name,
+                                                                                            player.ucid))
+
+    def _start_mission(self, cursor, server_name: str, mission_name: str, theatre: str) -> int:
+        self._close_sessions(cursor, 'close_all_statistics', (server_name,))
+        cursor.execute(self.SQL_MISSION_HANDLING['close_all_missions'], (server_name,))
+        cursor.execute(self.SQL_MISSION_HANDLING['start_mission'], (server_name, mission_name, theatre))
+        cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server_name,))
+        if cursor.rowcount == 1:
+            return cursor.fetchone()[0]
+        self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
+                       'gathered for this session.')
+        return -1
 
     async def onMissionLoadEnd(self, data):
         server: Server = self.bot.servers[data['server_name']]
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute(self.SQL_MISSION_HANDLING['close_all_statistics'], (server.name,))
-                cursor.execute(self.SQL_MISSION_HANDLING['close_all_missions'], (server.name,))
-                cursor.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name,
-                                                                            data['current_mission'],
-                                                                            data['current_map']))
-                cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
-                if cursor.rowcount == 1:
-                    server.mission_id = cursor.fetchone()[0]
-                else:
-                    server.mission_id = -1
-                    self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
-                                   'gathered for this session.')
-                conn.commit()
+            server.mission_id = await self._write(self._start_mission, server.name, data['current_mission'],
+                                                   data['current_map'])
+            # all sessions of the last mission are closed now
+            ReportCache.invalidate(self.plugin_name)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-            conn.rollback()
-        finally:
-            self.pool.putconn(conn)
+
+    def _close_mission(self, cursor, mission_id: int) -> None:
+        self._close_sessions(cursor, 'close_statistics', (mission_id,))
+        cursor.execute(self.SQL_MISSION_HANDLING['close_mission'], (mission_id,))
 
     async def onSimulationStop(self, data):
         server: Server = self.bot.servers[data['server_name']]
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute(self.SQL_MISSION_HANDLING['close_statistics'], (server.mission_id,))
-                cursor.execute(self.SQL_MISSION_HANDLING['close_mission'], (server.mission_id,))
-                conn.commit()
+            await self._write(self._close_mission, server.mission_id)
+            ReportCache.invalidate(self.plugin_name)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-            conn.rollback()
-        finally:
-            self.pool.putconn(conn)
+
+    def _change_slot(self, cursor, mission_id: int, ucid: str, unit_type: str, side: int) -> None:
+        self._close_sessions(cursor, 'stop_player', (mission_id, ucid))
+        if Side(side) != Side.SPECTATOR:
+            PreparedStatements.execute(cursor, 'userstats.start_player', (mission_id, ucid, unit_type, side))
 
     async def onPlayerChangeSlot(self, data):
         if 'side' not in data:
             return
         server: Server = self.bot.servers[data['server_name']]
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute(self.SQL_MISSION_HANDLING['stop_player'], (server.mission_id, data['ucid']))
-                if Side(data['side']) != Side.SPECTATOR:
-                    cursor.execute(self.SQL_MISSION_HANDLING['start_player'],
-                                   (server.mission_id, data['ucid'], self.get_unit_type(data), data['side']))
-                conn.commit()
+            await self._write(self._change_slot, server.mission_id, data['ucid'], self.get_unit_type(data),
+                               data['side'])
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-            conn.rollback()
-        finally:
-            self.pool.putconn(conn)
 
     async def disableUserStats(self, data):
         self.statistics.discard(data['server_name'])
@@ -209,123 +331,89 @@ class UserStatisticsEventListener(EventListener):
                 if not player:
                     self.log.warning(f"Player id={data['arg1']} not found. Can't close their statistics.")
                     return
-                conn = self.pool.getconn()
                 try:
-                    with closing(conn.cursor()) as cursor:
-                        cursor.execute(self.SQL_MISSION_HANDLING['stop_player'],
-                                       (server.mission_id, player.ucid))
-                        conn.commit()
+                    await self._write(self._close_sessions, 'stop_player', (server.mission_id, player.ucid))
                 except (Exception, psycopg2.DatabaseError) as error:
                     self.log.exception(error)
-                    conn.rollback()
-                finally:
-                    self.pool.putconn(conn)
+        elif data['eventName'] == 'mission_end':
+            await self.flush()
         elif data['eventName'] == 'kill':
-            conn = self.pool.getconn()
-            try:
-                with closing(conn.cursor()) as cursor:
-                    # Player is not an AI
-                    if data['arg1'] != -1:
-                        if data['arg4'] != -1:
-                            # selfkill
-                            if data['arg1'] == data['arg4']:
-                                kill_type = 'self_kill'
-                            # teamkills
-                            elif data['arg3'] == data['arg6']:
-                                kill_type = 'teamkill'
-                            # PVP
-                            elif data['victimCategory'] == 'Planes':
-                                kill_type = 'pvp_planes'
-                            elif data['victimCategory'] == 'Helicopters':
-                                kill_type = 'pvp_helicopters'
-                        elif data['victimCategory'] == 'Planes':
-                            kill_type = 'kill_planes'
-                        elif data['victimCategory'] == 'Helicopters':
-                            kill_type = 'kill_helicopters'
-                        elif data['victimCategory'] == 'Ships':
-                            kill_type = 'kill_ships'
-                        elif data['victimCategory'] == 'Air Defence':
-                            kill_type = 'kill_sams'
-                        elif data['victimCategory'] in ['Unarmed', 'Armor', 'Infantry', 'Fortification', 'Artillery',
-                                                        'MissilesSS']:
-                            kill_type = 'kill_ground'
-                        else:
-                            kill_type = 'kill_other'  # Static objects
-                        if kill_type in self.SQL_EVENT_UPDATES.keys():
-                            pilot: Player = server.get_player(id=data['arg1'])
-                            for crew_member in server.get_crew_members(pilot):
-                                cursor.execute(self.SQL_EVENT_UPDATES[kill_type], (server.mission_id, crew_member.ucid))
+            # Player is not an AI
+            if data['arg1'] != -1:
+                if data['arg4'] != -1:
+                    # selfkill
+                    if data['arg1'] == data['arg4']:
+                        kill_type = 'self_kill'
+                    # teamkills
+                    elif data['arg3'] == data['arg6']:
+                        kill_type = 'teamkill'
+                    # PVP
+                    elif data['victimCategory'] == 'Planes':
+                        kill_type = 'pvp_planes'
+                    elif data['victimCategory'] == 'Helicopters':
+                        kill_type = 'pvp_helicopters'
+                elif data['victimCategory'] == 'Planes':
+                    kill_type = 'kill_planes'
+                elif data['victimCategory'] == 'Helicopters':
+                    kill_type = 'kill_helicopters'
+                elif data['victimCategory'] == 'Ships':
+                    kill_type = 'kill_ships'
+                elif data['victimCategory'] == 'Air Defence':
+                    kill_type = 'kill_sams'
+                elif data['victimCategory'] in ['Unarmed', 'Armor', 'Infantry', 'Fortification', 'Artillery',
+                                                'MissilesSS']:
+                    kill_type = 'kill_ground'
+                else:
+                    kill_type = 'kill_other'  # Static objects
+                if kill_type in self.EVENT_COUNTERS.keys():
+                    pilot: Player = server.get_player(id=data['arg1'])
+                    for crew_member in server.get_crew_members(pilot):
+                        self.add_event(server.mission_id, crew_member.ucid, kill_type)
 
-                    # Victim is not an AI
-                    if data['arg4'] != -1:
-                        if data['arg1'] != -1:
-                            if data['arg1'] == data['arg4']:  # self kill
-                                death_type = 'self_kill'
-                            elif data['arg3'] == data['arg6']:  # killed by team member - no death counted
-                                death_type = 'teamdeath'
-                            # PVP
-                            elif data['killerCategory'] == 'Planes':
-                                death_type = 'deaths_pvp_planes'
-                            elif data['killerCategory'] == 'Helicopters':
-                                death_type = 'deaths_pvp_helicopters'
-                        elif data['killerCategory'] == 'Planes':
-                            death_type = 'deaths_planes'
-                        elif data['killerCategory'] == 'Helicopters':
-                            death_type = 'deaths_helicopters'
-                        elif data['killerCategory'] == 'Ships':
-                            death_type = 'deaths_ships'
-                        elif data['killerCategory'] == 'Air Defence':
-                            death_type = 'deaths_sams'
-                        elif data['killerCategory'] in ['Armor', 'Infantry' 'Fortification', 'Artillery',
-                                                        'MissilesSS']:
-                            death_type = 'deaths_ground'
-                        else:
-                            death_type = 'other'
-                        if death_type in self.SQL_EVENT_UPDATES.keys():
-                            pilot: Player = server.get_player(id=data['arg4'])
-                            for crew_member in server.get_crew_members(pilot):
-                                cursor.execute(self.SQL_EVENT_UPDATES[death_type], (server.mission_id, crew_member.ucid))
-                    conn.commit()
-            except (Exception, psycopg2.DatabaseError) as error:
-                self.log.exception(error)
-                conn.rollback()
-            finally:
-                self.pool.putconn(conn)
+            # Victim is not an AI
+            if data['arg4'] != -1:
+                if data['arg1'] != -1:
+                    if data['arg1'] == data['arg4']:  # self kill
+                        death_type = 'self_kill'
+                    elif data['arg3'] == data['arg6']:  # killed by team member - no death counted
+                        death_type = 'teamdeath'
+                    # PVP
+                    elif data['killerCategory'] == 'Planes':
+                        death_type = 'deaths_pvp_planes'
+                    elif data['killerCategory'] == 'Helicopters':
+                        death_type = 'deaths_pvp_helicopters'
+                elif data['killerCategory'] == 'Planes':
+                    death_type = 'deaths_planes'
+                elif data['killerCategory'] == 'Helicopters':
+                    death_type = 'deaths_helicopters'
+                elif data['killerCategory'] == 'Ships':
+                    death_type = 'deaths_ships'
+                elif data['killerCategory'] == 'Air Defence':
+                    death_type = 'deaths_sams'
+                elif data['killerCategory'] in ['Armor', 'Infantry' 'Fortification', 'Artillery',
+                                                'MissilesSS']:
+                    death_type = 'deaths_ground'
+                else:
+                    death_type = 'other'
+                if death_type in self.EVENT_COUNTERS.keys():
+                    pilot: Player = server.get_player(id=data['arg4'])
+                    for crew_member in server.get_crew_members(pilot):
+                        self.add_event(server.mission_id, crew_member.ucid, death_type)
         elif data['eventName'] in ['takeoff', 'landing', 'crash', 'pilot_death']:
             if data['arg1'] != -1:
-                if data['eventName'] in self.SQL_EVENT_UPDATES.keys():
-                    conn = self.pool.getconn()
-                    try:
-                        with closing(conn.cursor()) as cursor:
-                            player: Player = server.get_player(id=data['arg1'])
-                            if not player:
-                                return
-                            cursor.execute(self.SQL_EVENT_UPDATES[data['eventName']],
-                                           (server.mission_id, player.ucid))
-                            conn.commit()
-                    except (Exception, psycopg2.DatabaseError) as error:
-                        self.log.exception(error)
-                        conn.rollback()
-                    finally:
-                        self.pool.putconn(conn)
+                if data['eventName'] in self.EVENT_COUNTERS.keys():
+                    player: Player = server.get_player(id=data['arg1'])
+                    if not player:
+                        return
+                    self.add_event(server.mission_id, player.ucid, data['eventName'])
         elif data['eventName'] in ['eject']:
             if data['arg1'] != -1:
-                if data['eventName'] in self.SQL_EVENT_UPDATES.keys():
+                if data['eventName'] in self.EVENT_COUNTERS.keys():
                     # TODO: when DCS bug wih multicrew eject gets fixed, change this to single player only
                     pilot: Player = server.get_player(id=data['arg1'])
                     crew_members = server.get_crew_members(pilot)
                     if len(crew_members) == 1:
-                        conn = self.pool.getconn()
-                        try:
-                            with closing(conn.cursor()) as cursor:
-                                cursor.execute(self.SQL_EVENT_UPDATES[data['eventName']],
-                                               (server.mission_id, crew_members[0].ucid))
-                                conn.commit()
-                        except (Exception, psycopg2.DatabaseError) as error:
-                            self.log.exception(error)
-                            conn.rollback()
-                        finally:
-                            self.pool.putconn(conn)
+                        self.add_event(server.mission_id, crew_members[0].ucid, data['eventName'])
 
     async def onChatCommand(self, data: dict) -> None:
         if data['subcommand'] == 'linkme':
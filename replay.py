@@ -0,0 +1,65 @@
+import argparse
+import json
+import msgpack
+import socket
+import time
+from core import utils
+from typing import Iterator, Tuple
+
+# has to match MAX_CHUNK_SIZE in DCSServerBotUtils.lua
+MAX_CHUNK_SIZE = 60000
+
+
+def read_capture(filename: str) -> Iterator[Tuple[float, str, dict]]:
+    with open(filename, 'rb') as file:
+        for timestamp, server_name, data in msgpack.Unpacker(file, unicode_errors='replace'):
+            yield timestamp, server_name, data
+
+
+def send(sock: socket.socket, address: Tuple[str, int], data: dict, msg_id: int):
+    message = json.dumps(data).encode('utf-8')
+    if len(message) <= MAX_CHUNK_SIZE:
+        sock.sendto(message, address)
+        return
+    chunks = [message[i:i + MAX_CHUNK_SIZE] for i in range(0, len(message), MAX_CHUNK_SIZE)]
+    for seq, chunk in enumerate(chunks, start=1):
+        sock.sendto(f'#{msg_id}:{seq}:{len(chunks)}#'.encode('utf-8') + chunk, address)
+
+
+def replay(filename: str, address: Tuple[str, int], speed: float, servers: list[str]):
+    num = 0
+    start = time.monotonic()
+    first = None
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for timestamp, server_name, data in read_capture(filename):
+            if servers and server_name not in servers:
+                continue
+            if first is None:
+                first = timestamp
+            # speed 0 means "as fast as possible"
+            if speed > 0:
+                delay = (timestamp - first) / speed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            num += 1
+            send(sock, address, data, num)
+    duration = time.monotonic() - start
+    print(f'{num} messages replayed in {duration:.2f} seconds ({num / duration if duration else 0:.0f} msg/s).')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Replays a capture of DCS events (see EVENT_CAPTURE) into '
+                                                 'a running DCSServerBot.')
+    parser.add_argument('capture', help='capture file to replay')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='replay speed, 1 = real time, 2 = twice as fast, 0 = as fast as possible')
+    parser.add_argument('--server', action='append', default=[], help='only replay events of this server')
+    parser.add_argument('--host', default=utils.config['BOT']['HOST'], help='host the bot is listening on')
+    parser.add_argument('--port', type=int, default=int(utils.config['BOT']['PORT']),
+                        help='port the bot is listening on')
+    args = parser.parse_args()
+    host = '127.0.0.1' if args.host == '0.0.0.0' else args.host
+    try:
+        replay(args.capture, (host, args.port), args.speed, args.server)
+    except KeyboardInterrupt:
+        exit(-1)
@@ -1,5 +1,6 @@
 import asyncio
 import discord
+import io
 import logging
 import os
 import platform
@@ -9,14 +10,14 @@ import shutil
 import string
 import subprocess
 import sys
-from core import utils, Server, DCSServerBot, Status
+from core import utils, Server, DCSServerBot, Status, QueryStatistics, InstrumentedConnection, InstrumentedPool, \
+    ReportCache, GraphRenderer
 from contextlib import closing, suppress
 from discord import SelectOption
 from discord.ext import commands
 from install import Install
 from logging.handlers import RotatingFileHandler
 from os import path
-from psycopg2 import pool
 from typing import Optional
 from version import __version__
 
@@ -90,7 +91,12 @@ class Main:
         # Initialize the database
         pool_min = self.config['BOT']['MASTER_POOL_MIN'] if self.config.getboolean('BOT', 'MASTER') else self.config['BOT']['AGENT_POOL_MIN']
         pool_max = self.config['BOT']['MASTER_POOL_MAX'] if self.config.getboolean('BOT', 'MASTER') else self.config['BOT']['AGENT_POOL_MAX']
-        db_pool = pool.ThreadedConnectionPool(pool_min, pool_max, self.config['BOT']['DATABASE_URL'], sslmode='allow')
+        kwargs = {}
+        if self.config.getboolean('BOT', 'SQL_STATISTICS'):
+            QueryStatistics.configure(self.config)
+            kwargs['connection_factory'] = InstrumentedConnection
+        db_pool = InstrumentedPool(pool_min, pool_max, self.config['BOT']['DATABASE_URL'], sslmode='allow',
+                                   log=self.log, trace=int(self.config['BOT']['POOL_HOLD_WARNING']) > 0, **kwargs)
         conn = db_pool.getconn()
         try:
             with suppress(Exception):
@@ -204,8 +210,12 @@ class Main:
     async def run(self):
         self.log.info('- Starting {}-Node on {}'.format('Master' if self.config.getboolean(
             'BOT', 'MASTER') is True else 'Agent', platform.node()))
-        async with self.bot:
-            await self.bot.start(self.config['BOT']['TOKEN'], reconnect=True)
+        GraphRenderer.init()
+        try:
+            async with self.bot:
+                await self.bot.start(self.config['BOT']['TOKEN'], reconnect=True)
+        finally:
+            GraphRenderer.shutdown()
 
     def add_commands(self):
 
@@ -289,6 +299,113 @@ class Main:
                 else:
                     await ctx.send('Please shut down server "{}" before unregistering!'.format(server.name))
 
+        @self.bot.command(description='Shows the event queues of this node')
+        @utils.has_role('Admin')
+        @commands.guild_only()
+        async def queues(ctx):
+            stats = self.bot.get_queue_stats()
+            if not stats:
+                await ctx.send('No events received yet.')
+                return
+            embed = discord.Embed(title=f'Event Queues ({platform.node()})', color=discord.Color.blue())
+            names = depths = dropped = ''
+            for server_name, queue in stats.items():
+                names += server_name + '\n'
+                depths += f"{queue['depth']} / {queue['high_water']}\n"
+                dropped += f"{queue['dropped']}\n"
+            embed.add_field(name='Server', value=names)
+            embed.add_field(name='Depth / Max', value=depths)
+            embed.add_field(name='Dropped', value=dropped)
+            names = depths = processed = ''
+            for listener_name, listener in self.bot.get_listener_stats().items():
+                names += listener_name + '\n'
+                depths += f"{listener['depth']} / {listener['high_water']} ({listener['dropped']})\n"
+                avg = listener['time'] / listener['processed'] * 1000 if listener['processed'] else 0
+                processed += f"{listener['processed']} ({avg:.1f} ms)\n"
+            if names:
+                embed.add_field(name='▬' * 10, value='_ _', inline=False)
+                embed.add_field(name='Listener', value=names)
+                embed.add_field(name='Depth / Max (Dropped)', value=depths)
+                embed.add_field(name='Processed (avg)', value=processed)
+            await ctx.send(embed=embed)
+
+        @self.bot.command(description='Shows the database statements that took the most time', usage='[num]')
+        @utils.has_role('Admin')
+        @commands.guild_only()
+        async def sqlstats(ctx, num: Optional[int] = 10):
+            if not self.config.getboolean('BOT', 'SQL_STATISTICS'):
+                await ctx.send('SQL_STATISTICS is disabled in your dcsserverbot.ini.')
+                return
+            stats = QueryStatistics.top(0)
+            # the embed has to stay below Discord's size limit
+            num = max(1, min(num, 15))
+            if not stats:
+                await ctx.send('No statements executed yet.')
+                return
+            report = f"{'Calls':>8} {'Total':>9} {'p50':>7} {'p95':>7} {'p99':>7} {'Rows':>7} {'Slow':>5}  Statement\n"
+            for stmt in stats:
+                report += f"{stmt['calls']:>8} {stmt['time']:>8.1f}s {stmt['p50'] * 1000:>5.0f}ms " \
+                          f"{stmt['p95'] * 1000:>5.0f}ms {stmt['p99'] * 1000:>5.0f}ms {stmt['rows']:>7.1f} " \
+                          f"{stmt['slow']:>5}  {stmt['statement']}\n"
+            embed = discord.Embed(title=f'Top {num} Statements ({platform.node()})', color=discord.Color.blue())
+            for i, stmt in enumerate(stats[:num], start=1):
+                embed.add_field(name=f"{i}. {stmt['calls']} calls, {stmt['time']:.1f} s total",
+                                value=f"p50 / p95 / p99: {stmt['p50'] * 1000:.0f} / {stmt['p95'] * 1000:.0f} / "
+                                      f"{stmt['p99'] * 1000:.0f} ms, rows: {stmt['rows']:.1f}\n"
+                                      f"```{stmt['statement'][:200]}```", inline=False)
+            embed.set_footer(text='All statements are attached.')
+            await ctx.send(embed=embed, file=discord.File(io.BytesIO(report.encode('utf-8')), filename='sqlstats.txt'))
+
+        @self.bot.command(description='Shows the database pool usage of this node', aliases=['dbpool'])
+        @utils.has_role('Admin')
+        @commands.guild_only()
+        async def pool(ctx):
+            stats = self.pool.get_stats()
+            embed = discord.Embed(title=f'Database Pool ({platform.node()})', color=discord.Color.blue())
+            embed.add_field(name='In Use / Idle', value=f"{stats['in_use']} / {stats['idle']}")
+            embed.add_field(name='Peak / Max', value=f"{stats['peak']} / {stats['max']}")
+            embed.add_field(name='Exhausted', value=str(stats['exhausted']))
+            embed.add_field(name='Checkouts', value=str(stats['checkouts']))
+            held = stats['checkouts'] - stats['in_use']
+            avg_hold = stats['hold_time'] / held * 1000 if held else 0
+            embed.add_field(name='Hold (avg / max)', value=f"{avg_hold:.1f} / {stats['max_hold'] * 1000:.1f} ms")
+            if self.bot.apool:
+                astats = self.bot.apool.get_stats()
+                embed.add_field(name='▬' * 10, value='_ _', inline=False)
+                embed.add_field(name='Async Pool Size / Idle',
+                                value=f"{astats.get('pool_size', 0)} / {astats.get('pool_available', 0)}")
+                embed.add_field(name='Requests / Waiting',
+                                value=f"{astats.get('requests_num', 0)} / {astats.get('requests_waiting', 0)}")
+                embed.add_field(name='Wait (total)', value=f"{astats.get('requests_wait_ms', 0)} ms")
+            threshold = int(self.config['BOT']['POOL_HOLD_WARNING'])
+            checkouts = self.pool.get_long_held(threshold) if threshold > 0 else []
+            if checkouts:
+                embed.set_footer(text=f'{len(checkouts)} connection(s) held longer than '
+                                      f'{self.config["BOT"]["POOL_HOLD_WARNING"]} seconds, see log for details.')
+                self.log.warning(self.pool.format_checkouts(checkouts))
+            await ctx.send(embed=embed)
+
+        @self.bot.command(description='Shows the usage of the report cache', usage='[clear]')
+        @utils.has_role('Admin')
+        @commands.guild_only()
+        async def reportcache(ctx, param: Optional[str] = None):
+            if param == 'clear':
+                ReportCache.clear()
+                await ctx.send('Report cache cleared.')
+                return
+            stats = ReportCache.get_stats()
+            embed = discord.Embed(title=f'Report Cache ({platform.node()})', color=discord.Color.blue())
+            requests = stats['hits'] + stats['misses']
+            embed.add_field(name='Hits / Misses', value=f"{stats['hits']} / {stats['misses']}")
+            embed.add_field(name='Hit Ratio', value=f"{stats['hits'] / requests * 100:.1f} %" if requests else 'n/a')
+            embed.add_field(name='Entries', value=str(stats['entries']))
+            if stats['reports']:
+                embed.add_field(name='Report', value='\n'.join(stats['reports'].keys()))
+                embed.add_field(name='Entries', value='\n'.join(str(x) for x in stats['reports'].values()))
+                embed.add_field(name='_ _', value='_ _')
+            embed.set_footer(text=f"TTL: {self.config['BOT']['REPORT_CACHE_TTL']} seconds")
+            await ctx.send(embed=embed)
+
         @self.bot.command(description='Upgrades the bot')
         @utils.has_role('Admin')
         @commands.guild_only()
@@ -368,6 +485,10 @@ async def main():
         await Main().run()
 
 if __name__ == "__main__":
+    # psycopg's async pool (bot.apool) does not work with the ProactorEventLoop, which is the default on Windows.
+    # The bot only needs the ProactorEventLoop for asyncio subprocesses and pipes, which it does not use.
+    if sys.platform == 'win32' and isinstance(asyncio.get_event_loop_policy(), asyncio.WindowsProactorEventLoopPolicy):
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     try:
         asyncio.run(main())
     except discord.errors.LoginFailure:
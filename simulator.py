@@ -0,0 +1,343 @@
+import argparse
+import asyncio
+import json
+import msgpack
+import psycopg2
+import random
+import string
+import time
+from contextlib import closing
+from core import utils
+from typing import Optional, Tuple
+from version import __version__
+
+# has to match MAX_CHUNK_SIZE in DCSServerBotUtils.lua
+MAX_CHUNK_SIZE = 60000
+UNIT_TYPES = {
+    'Planes': ['F-16C_50', 'FA-18C_hornet', 'F-14B', 'A-10C_2', 'M-2000C', 'MiG-29S', 'Su-27'],
+    'Helicopters': ['AH-64D_BLK_II', 'Mi-24P', 'UH-1H', 'Ka-50_3']
+}
+AI_TYPES = {
+    'Planes': ['Su-25T', 'MiG-21Bis'],
+    'Air Defence': ['SA-11 Buk LN 9A310M1', 'ZSU-23-4 Shilka'],
+    'Armor': ['T-72B', 'BMP-2'],
+    'Ships': ['PERRY']
+}
+WEAPONS = ['AIM_120C', 'AIM_9X', 'AGM_65D', 'GBU_12', 'Mk_82', 'Gun']
+MISSION_EVENTS = ['S_EVENT_SHOT', 'S_EVENT_HIT', 'S_EVENT_TAKEOFF', 'S_EVENT_LAND', 'S_EVENT_BIRTH', 'S_EVENT_KILL',
+                  'S_EVENT_ENGINE_STARTUP', 'S_EVENT_ENGINE_SHUTDOWN']
+GAME_EVENTS = ['takeoff', 'landing', 'kill', 'crash', 'eject', 'pilot_death']
+
+
+class Statistics:
+
+    def __init__(self):
+        self.sent: dict[str, int] = {}
+        self.received: dict[str, int] = {}
+        self.latencies: list[float] = []
+
+    def report(self, duration: float) -> str:
+        sent = sum(self.sent.values())
+        received = sum(self.received.values())
+        text = f'{duration:.0f}s: {sent} messages sent ({sent / duration:.0f}/s), ' \
+               f'{received} received ({received / duration:.0f}/s)'
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            text += ', greeting latency (ms) min/avg/p95/max: {:.1f}/{:.1f}/{:.1f}/{:.1f}'.format(
+                latencies[0] * 1000, sum(latencies) / len(latencies) * 1000,
+                latencies[int(len(latencies) * 0.95)] * 1000, latencies[-1] * 1000)
+        return text
+
+
+class DatabaseStatistics:
+    """
+    Measures the write rate of the bot's database with the counters of pg_stat_user_tables and pg_stat_database.
+    PostgreSQL updates these counters with a small delay, so the rates are only exact over longer runs.
+    """
+    QUERY = """
+        SELECT (SELECT COALESCE(SUM(n_tup_ins), 0) FROM pg_stat_user_tables),
+               (SELECT COALESCE(SUM(n_tup_upd), 0) FROM pg_stat_user_tables),
+               (SELECT COALESCE(SUM(n_tup_del), 0) FROM pg_stat_user_tables),
+               (SELECT xact_commit FROM pg_stat_database WHERE datname = current_database())
+    """
+
+    def __init__(self, url: str):
+        self.conn = psycopg2.connect(url, sslmode='allow')
+        # the statistics are cached for the duration of a transaction
+        self.conn.autocommit = True
+        self.start = self.sample()
+
+    def sample(self) -> Tuple[int, int, int, int]:
+        with closing(self.conn.cursor()) as cursor:
+            cursor.execute(self.QUERY)
+            return cursor.fetchone()
+
+    def report(self, duration: float) -> str:
+        inserts, updates, deletes, commits = [b - a for a, b in zip(self.start, self.sample())]
+        return f'database: {inserts} rows inserted ({inserts / duration:.0f}/s), {updates} updated ' \
+               f'({updates / duration:.0f}/s), {deletes} deleted ({deletes / duration:.0f}/s), ' \
+               f'{commits} commits ({commits / duration:.0f}/s)'
+
+    def close(self):
+        self.conn.close()
+
+
+class Player:
+
+    def __init__(self, _id: int, server_name: str):
+        self.id = _id
+        self.name = f'{server_name} Pilot {_id}'
+        self.ucid = ''.join(random.choices(string.hexdigits.lower(), k=32))
+        self.active = False
+        self.side = 0
+        self.slot = -1
+        self.category = 'Planes'
+        self.unit_type = ''
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id, "name": self.name, "ucid": self.ucid, "active": self.active, "side": self.side,
+            "slot": self.slot, "sub_slot": 0, "unit_type": self.unit_type, "unit_name": f'{self.name} Unit',
+            "group_name": f'{self.name} Group', "group_id": self.id, "unit_callsign": f'Enfield{self.id}'
+        }
+
+
+class SimulatedServer(asyncio.DatagramProtocol):
+    """
+    Pretends to be a DCS server with the DCSServerBot hook installed. Each simulated server needs its own
+    section in dcsserverbot.ini and a serverSettings.lua with a matching name, as the bot looks them up on
+    registration.
+    """
+
+    def __init__(self, name: str, bot: Tuple[str, int], num_players: int, game_event_rate: float,
+                 mission_event_rate: float, session: float, stats: Statistics):
+        self.name = name
+        self.bot = bot
+        self.game_event_rate = game_event_rate
+        self.mission_event_rate = mission_event_rate
+        self.session = session
+        self.stats = stats
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.encoding = 'json'
+        self.msg_id = 0
+        self.start = time.monotonic()
+        self.players = [Player(i, name) for i in range(2, num_players + 2)]
+        # players waiting for their greeting message, to measure the end-to-end latency
+        self.greetings: dict[int, float] = {}
+
+    def connection_made(self, transport: asyncio.DatagramTransport):
+        self.transport = transport
+
+    def datagram_received(self, message: bytes, addr: Tuple[str, int]):
+        data = json.loads(message) if message[:1] == b'{' else msgpack.unpackb(message, unicode_errors='replace')
+        # several commands, sent by the bot in one datagram (see dcsbot.batch in DCSServerBotMain.lua)
+        if data['command'] == 'batch':
+            self.stats.received['batch'] = self.stats.received.get('batch', 0) + 1
+            for cmd in data['commands']:
+                self.handle(cmd)
+        else:
+            self.handle(data)
+
+    def handle(self, data: dict):
+        command = data['command']
+        self.stats.received[command] = self.stats.received.get(command, 0) + 1
+        if command == 'registerDCSServer':
+            self.register(data['channel'])
+        elif command == 'getMissionUpdate':
+            self.send({"command": "getMissionUpdate", "pause": False, "mission_time": self.mission_time,
+                       "real_time": self.mission_time}, data['channel'])
+        elif command == 'getMissionSituation':
+            self.send({"command": "getMissionSituation", "coalitions": {
+                coalition: {
+                    "airbases": [f'{coalition} Airbase {i}' for i in range(3)],
+                    "units": {"Airplanes": [f'{coalition} Unit {i}' for i in range(20)]},
+                    "statics": [f'{coalition} Static {i}' for i in range(5)]
+                } for coalition in ['BLUE', 'RED']
+            }}, data['channel'])
+        elif command == 'setEncoding':
+            self.encoding = data['encoding']
+        elif command == 'sendChatMessage' and int(data.get('to', -1)) in self.greetings:
+            self.stats.latencies.append(time.monotonic() - self.greetings.pop(int(data['to'])))
+
+    @property
+    def mission_time(self) -> float:
+        return time.monotonic() - self.start
+
+    def send(self, data: dict, channel: Optional[str] = "-1"):
+        data['server_name'] = self.name
+        data['channel'] = channel
+        self.stats.sent[data['command']] = self.stats.sent.get(data['command'], 0) + 1
+        if self.encoding == 'msgpack':
+            message = msgpack.packb(data)
+        else:
+            message = json.dumps(data).encode('utf-8')
+        if len(message) <= MAX_CHUNK_SIZE:
+            self.transport.sendto(message, self.bot)
+            return
+        self.msg_id += 1
+        chunks = [message[i:i + MAX_CHUNK_SIZE] for i in range(0, len(message), MAX_CHUNK_SIZE)]
+        for seq, chunk in enumerate(chunks, start=1):
+            self.transport.sendto(f'#{self.msg_id}:{seq}:{len(chunks)}#'.encode('utf-8') + chunk, self.bot)
+
+    def mission(self) -> dict:
+        return {
+            "current_mission": "Simulated Mission", "current_map": "Caucasus", "filename": "simulated.miz",
+            "mission_time": self.mission_time, "real_time": self.mission_time, "start_time": 28800,
+            "date": {"Year": 2016, "Month": 6, "Day": 21}, "pause": False,
+            "num_slots_blue": len(self.players), "num_slots_red": len(self.players),
+            "weather": {
+                "season": {"temperature": 20}, "qnh": 760, "enable_fog": False,
+                "visibility": {"distance": 80000},
+                "wind": {key: {"dir": 270, "speed": 5} for key in ['atGround', 'at2000', 'at8000']},
+                "clouds": {"base": 2500, "density": 4, "thickness": 1000}
+            },
+            "clouds": {"base": 2500, "density": 4, "thickness": 1000},
+            "airbases": []
+        }
+
+    def register(self, channel: Optional[str] = "-1"):
+        data = {
+            "command": "registerDCSServer",
+            "hook_version": __version__[:__version__.rfind('.')],
+            "dcs_version": "2.7.18.30348",
+            "host": "127.0.0.1",
+            "port": self.transport.get_extra_info('sockname')[1],
+            "statistics": True,
+            "options": {"plugins": {}},
+            "encodings": ['json', 'msgpack'],
+            "dsmc_enabled": False,
+            "players": [{"id": 1, "name": "Server", "ucid": "", "active": False, "side": 0, "slot": -1,
+                         "sub_slot": 0, "unit_type": "", "unit_name": "", "group_name": "", "group_id": 0,
+                         "unit_callsign": ""}] + [p.as_dict() for p in self.players if p.active]
+        } | self.mission()
+        self.send(data, channel)
+
+    def game_event(self):
+        players = [p for p in self.players if p.active and p.side]
+        if not players:
+            return
+        player = random.choice(players)
+        event = random.choice(GAME_EVENTS)
+        data = {"command": "onGameEvent", "eventName": event, "arg1": player.id, "arg2": player.unit_type,
+                "arg3": player.side}
+        if event == 'kill':
+            category = random.choice(list(AI_TYPES.keys()))
+            data |= {"arg4": -1, "arg5": random.choice(AI_TYPES[category]), "arg6": 3 - player.side,
+                     "arg7": random.choice(WEAPONS), "victimCategory": category, "killerCategory": player.category}
+        elif event in ['takeoff', 'landing']:
+            data['arg3'] = 'Batumi'
+        self.send(data)
+
+    def mission_event(self):
+        players = [p for p in self.players if p.active and p.side]
+        event = random.choice(MISSION_EVENTS)
+        if players and random.random() < 0.5:
+            player = random.choice(players)
+            initiator = {"type": "UNIT", "unit_name": f'{player.name} Unit', "group_name": f'{player.name} Group',
+                         "name": player.name, "coalition": player.side, "unit_type": player.unit_type,
+                         "category": 0 if player.category == 'Planes' else 1}
+        else:
+            side = random.choice([1, 2])
+            initiator = {"type": "UNIT", "unit_name": f'AI Unit {random.randint(1, 100)}', "coalition": side,
+                         "unit_type": random.choice(AI_TYPES['Armor']), "category": 2}
+        data = {"command": "onMissionEvent", "eventName": event, "time": self.mission_time, "initiator": initiator}
+        if event in ['S_EVENT_SHOT', 'S_EVENT_HIT', 'S_EVENT_KILL']:
+            data['weapon'] = {"name": random.choice(WEAPONS)}
+        if event in ['S_EVENT_HIT', 'S_EVENT_KILL']:
+            data['target'] = {"type": "UNIT", "unit_name": f'AI Unit {random.randint(1, 100)}',
+                              "coalition": 3 - initiator['coalition'], "unit_type": random.choice(AI_TYPES['Armor']),
+                              "category": 2}
+        elif event in ['S_EVENT_TAKEOFF', 'S_EVENT_LAND']:
+            data['place'] = {"id": 22, "name": "Batumi"}
+        self.send(data)
+
+    async def player_session(self, player: Player):
+        while True:
+            await asyncio.sleep(random.expovariate(1 / 10))
+            player.active = True
+            player.side = 0
+            self.send({"command": "onPlayerConnect", "id": player.id, "name": player.name, "ucid": player.ucid,
+                       "side": 0, "active": True})
+            self.greetings[player.id] = time.monotonic()
+            self.send({"command": "onPlayerStart", "id": player.id, "name": player.name, "ucid": player.ucid,
+                       "side": 0, "active": True})
+            player.side = random.choice([1, 2])
+            player.category = random.choice(list(UNIT_TYPES.keys()))
+            player.unit_type = random.choice(UNIT_TYPES[player.category])
+            player.slot = random.randint(1, 500)
+            self.send({"command": "onPlayerChangeSlot"} | player.as_dict())
+            await asyncio.sleep(random.expovariate(1 / self.session))
+            self.send({"command": "onGameEvent", "eventName": "disconnect", "arg1": player.id, "arg2": 0,
+                       "arg3": player.side, "arg4": player.unit_type})
+            self.send({"command": "onPlayerStop", "id": player.id, "name": player.name, "ucid": player.ucid,
+                       "active": False})
+            player.active = False
+            self.greetings.pop(player.id, None)
+
+    async def emit(self, rate: float, func):
+        if rate <= 0:
+            return
+        while True:
+            await asyncio.sleep(random.expovariate(rate))
+            func()
+
+    async def run(self):
+        self.register()
+        mission = self.mission()
+        self.send({"command": "onMissionLoadBegin"} | mission)
+        self.send({"command": "onMissionLoadEnd"} | mission)
+        self.send({"command": "onSimulationStart"})
+        self.send({"command": "onSimulationResume"})
+        await asyncio.gather(*[self.player_session(p) for p in self.players],
+                             self.emit(self.game_event_rate, self.game_event),
+                             self.emit(self.mission_event_rate, self.mission_event))
+
+
+async def main(args: argparse.Namespace):
+    loop = asyncio.get_running_loop()
+    stats = Statistics()
+    host = '127.0.0.1' if args.host == '0.0.0.0' else args.host
+    servers = []
+    for i in range(0, args.servers):
+        server = SimulatedServer(f'{args.name} {i + 1}', (host, args.port), args.players, args.game_events,
+                                 args.mission_events, args.session, stats)
+        await loop.create_datagram_endpoint(lambda: server, local_addr=('127.0.0.1', args.dcs_port + i))
+        servers.append(server)
+    db_stats = await loop.run_in_executor(None, DatabaseStatistics, args.database) if args.database else None
+    tasks = [asyncio.create_task(server.run()) for server in servers]
+    start = time.monotonic()
+    try:
+        while not args.duration or time.monotonic() - start < args.duration:
+            await asyncio.sleep(args.interval)
+            duration = time.monotonic() - start
+            print(stats.report(duration))
+            if db_stats:
+                print(await loop.run_in_executor(None, db_stats.report, duration))
+    finally:
+        for task in tasks:
+            task.cancel()
+        if db_stats:
+            db_stats.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Simulates DCS servers talking to a running DCSServerBot.')
+    parser.add_argument('--servers', type=int, default=1, help='number of simulated servers')
+    parser.add_argument('--name', default='Simulated Server', help='server name prefix, a number is appended')
+    parser.add_argument('--dcs-port', type=int, default=6666, help='UDP port of the first simulated server')
+    parser.add_argument('--players', type=int, default=20, help='number of players per server')
+    parser.add_argument('--session', type=float, default=600, help='average seconds a player stays connected')
+    parser.add_argument('--game-events', type=float, default=1, help='onGameEvent messages per second and server')
+    parser.add_argument('--mission-events', type=float, default=10,
+                        help='onMissionEvent messages per second and server')
+    parser.add_argument('--duration', type=int, default=0, help='seconds to run, 0 = until interrupted')
+    parser.add_argument('--interval', type=int, default=10, help='seconds between statistics reports')
+    parser.add_argument('--host', default=utils.config['BOT']['HOST'], help='host the bot is listening on')
+    parser.add_argument('--port', type=int, default=int(utils.config['BOT']['PORT']),
+                        help='port the bot is listening on')
+    parser.add_argument('--database', default=utils.config['BOT'].get('DATABASE_URL'),
+                        help='database of the bot to measure the write rate, "" = don\'t measure')
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        exit(-1)
@@ -0,0 +1,3 @@
+CREATE OR REPLACE FUNCTION create_time_partitions(tbl TEXT, from_date TIMESTAMP, to_date TIMESTAMP) RETURNS INTEGER AS $$ DECLARE part_start DATE := DATE_TRUNC('month', from_date); part_name TEXT; created INTEGER := 0; BEGIN WHILE part_start <= to_date LOOP part_name := tbl || '_' || TO_CHAR(part_start, 'YYYYMM'); IF TO_REGCLASS(part_name) IS NULL THEN IF TO_REGCLASS(tbl || '_default') IS NULL THEN EXECUTE FORMAT('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)', part_name, tbl, part_start, part_start + INTERVAL '1 month'); ELSE EXECUTE FORMAT('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part_name, tbl); EXECUTE FORMAT('WITH moved AS (DELETE FROM %I WHERE time >= %L AND time < %L RETURNING *) INSERT INTO %I SELECT * FROM moved', tbl || '_default', part_start, part_start + INTERVAL '1 month', part_name); EXECUTE FORMAT('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', tbl, part_name, part_start, part_start + INTERVAL '1 month'); END IF; created := created + 1; END IF; part_start := part_start + INTERVAL '1 month'; END LOOP; RETURN created; END; $$ LANGUAGE plpgsql;
+CREATE OR REPLACE FUNCTION drop_time_partitions(tbl TEXT, older_than TIMESTAMP) RETURNS INTEGER AS $$ DECLARE part_name TEXT; dropped INTEGER := 0; BEGIN FOR part_name IN SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = tbl::REGCLASS AND c.relname ~ ('^' || tbl || '_[0-9]{6}$') LOOP IF TO_DATE(RIGHT(part_name, 6), 'YYYYMM') + INTERVAL '1 month' <= older_than THEN EXECUTE FORMAT('ALTER TABLE %I DETACH PARTITION %I', tbl, part_name); EXECUTE FORMAT('DROP TABLE %I', part_name); dropped := dropped + 1; END IF; END LOOP; IF TO_REGCLASS(tbl || '_default') IS NOT NULL THEN EXECUTE FORMAT('DELETE FROM %I WHERE time < %L', tbl || '_default', older_than); END IF; RETURN dropped; END; $$ LANGUAGE plpgsql;
+UPDATE version SET version='v1.7';
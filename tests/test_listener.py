@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import unittest
+from configparser import ConfigParser
+from core.listener import EventListener
+from types import SimpleNamespace
+
+
+class SlowListener(EventListener):
+    concurrency = 1
+
+    def __init__(self, plugin):
+        super().__init__(plugin)
+        self.received: dict[str, int] = {}
+
+    async def onMissionEvent(self, data):
+        await asyncio.sleep(0.001)
+        self.received['onMissionEvent'] = self.received.get('onMissionEvent', 0) + 1
+
+    async def onPlayerChangeSlot(self, data):
+        await asyncio.sleep(0.001)
+        self.received['onPlayerChangeSlot'] = self.received.get('onPlayerChangeSlot', 0) + 1
+
+
+class TestEventListener(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        config = ConfigParser()
+        config['BOT'] = {
+            'LISTENER_CONCURRENCY': '1',
+            'EVENT_QUEUE_SIZE': '100',
+            'EVENT_QUEUE_SAMPLE_RATE': '2',
+            'EVENT_QUEUE_DROPPABLE': 'onMissionEvent'
+        }
+        bot = SimpleNamespace(config=config)
+        plugin = SimpleNamespace(bot=bot, log=logging.getLogger(__name__), pool=None, locals={},
+                                 loop=asyncio.get_running_loop())
+        self.listener = SlowListener(plugin)
+
+    async def asyncTearDown(self):
+        await self.listener.shutdown()
+
+    async def test_flood(self):
+        # the events arrive faster than the listener can process them
+        for i in range(1000):
+            self.listener.enqueue({"command": "onMissionEvent", "server_name": "test", "id": i})
+            if i % 10 == 0:
+                self.listener.enqueue({"command": "onPlayerChangeSlot", "server_name": "test", "id": i})
+        await asyncio.gather(*[queue.join() for queue in self.listener._queues])
+        stats = self.listener.get_stats()
+        # low priority events are dropped, the queue stays bounded ...
+        self.assertGreater(stats['dropped'], 0)
+        self.assertEqual(self.listener.received['onMissionEvent'], 1000 - stats['dropped'])
+        self.assertLessEqual(stats['high_water'], 100 + 100)
+        # ... but no other event is lost
+        self.assertEqual(self.listener.received['onPlayerChangeSlot'], 100)
+        self.assertEqual(stats['processed'], 1100 - stats['dropped'])
+
+    async def test_hard_limit(self):
+        # the events that are never sampled are dropped, too, if the queue holds twice its size
+        for i in range(1000):
+            self.listener.enqueue({"command": "onPlayerChangeSlot", "server_name": "test", "id": i})
+        await asyncio.gather(*[queue.join() for queue in self.listener._queues])
+        stats = self.listener.get_stats()
+        self.assertEqual(stats['high_water'], 200)
+        self.assertEqual(stats['dropped'], 800)
+        self.assertEqual(self.listener.received['onPlayerChangeSlot'], 200)
+
+    async def test_sync_replies_are_not_dropped(self):
+        for i in range(500):
+            self.listener.enqueue({"command": "onMissionEvent", "server_name": "test", "channel": f"sync-{i}"})
+        await asyncio.gather(*[queue.join() for queue in self.listener._queues])
+        self.assertEqual(self.listener.get_stats()['dropped'], 0)
+        self.assertEqual(self.listener.received['onMissionEvent'], 500)
+
+    async def test_shutdown_drains_the_queues(self):
+        for i in range(10):
+            self.listener.enqueue({"command": "onPlayerChangeSlot", "server_name": "test", "id": i})
+        await self.listener.shutdown()
+        self.assertEqual(self.listener.received['onPlayerChangeSlot'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()